@@ -1,17 +1,26 @@
 """
 Product Normalizer - SQL-First Pipeline
-Pipeline: Cache → LLM Interpret → SQL Search → Business Rerank → LLM Select → Validate
+Pipeline: Cache → Rule/LLM Interpret → SQL Search → Business Rerank → LLM Select → Validate
 Note: Vector Search RIMOSSO - usa SQL FTS + Fuzzy Matching
 """
 import asyncio
-from typing import Dict, List, Optional, Any
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from app.config import settings
+from app.services.blocking_executor import blocking_executor
 from app.services.cache_service import CacheService
 from app.services.llm_interpret_service import LLMInterpretService
 from app.services.sql_retriever_service import SQLRetrieverService
 from app.services.business_reranker_service import BusinessRerankerService
 from app.services.llm_select_service import LLMSelectService
 from app.services.llm_validate_service import LLMValidateService
+from app.services.llm_select_validate_service import LLMSelectValidateService
+from app.services.llm_validate_service import build_validation
+from app.services.mapping_writeback_service import mapping_writeback_service
+from app.services.openai_client_service import openai_client_service
+from app.services.rule_interpret_service import rule_interpret_service
+from app.utils.single_flight import SingleFlight
 
 
 class ProductNormalizerV2:
@@ -25,17 +34,49 @@ class ProductNormalizerV2:
         self.business_reranker_service = BusinessRerankerService()
         self.llm_select_service = LLMSelectService()
         self.llm_validate_service = LLMValidateService()
+        self.llm_select_validate_service = LLMSelectValidateService()
+
+        # Limite normalizzazioni in corso condiviso tra tutte le richieste del worker
+        self._global_semaphore = asyncio.Semaphore(settings.NORMALIZATION_GLOBAL_CONCURRENCY)
+
+        # Deduplica pipeline concorrenti per stesso prodotto (es. più households, stessa catena)
+        self._single_flight = SingleFlight()
+
+        # Metriche fast path (LLM Select/Validate saltati su candidato dominante)
+        self._fast_path_accepted = 0
+        self._fast_path_rejected = 0
+        self._llm_stage_runs = 0
+        self._llm_stage_seconds = 0.0
+
+        # Modalità degradata (LLM non disponibile)
+        self._degraded = 0
+
+        # Interpretazione rule-based (LLM Interpret evitato se coverage sufficiente)
+        if settings.RULE_INTERPRET_ENABLED:
+            rule_interpret_service.load_lexicon(
+                settings.RULE_INTERPRET_LEXICON_PATH,
+                settings.RULE_INTERPRET_LEXICON_MIN_SUPPORT
+            )
+        self._rule_interpret_hits = 0
+        self._rule_interpret_misses = 0
 
     async def normalize_product(
         self,
         raw_product_name: str,
         household_id: str,
         store_name: Optional[str] = None,
-        price: Optional[float] = None
+        price: Optional[float] = None,
+        skip_cache: bool = False,
+        interpret_result: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Normalizza singolo prodotto
 
+        skip_cache=True salta lo step 1 quando il chiamante ha già fatto
+        il lookup cache (es. batch lookup di normalize_batch);
+        interpret_result salta lo step 2 se l'interpretazione è già stata
+        fatta (es. batch interpret di tutti i miss dello scontrino)
+
         Pipeline:
         1. Cache Lookup (Tier 1 + Tier 2)
         2. LLM Interpret (espansione abbreviazioni + estrazione dati)
@@ -43,6 +84,8 @@ class ProductNormalizerV2:
         4. Business Reranking (regole deterministiche)
         5. LLM Select (scelta best match)
         6. LLM Validate (confidence scoring)
+           (5+6 in una chiamata se LLM_FUSED_SELECT_VALIDATE_ENABLED,
+           saltati se il primo candidato è dominante e RERANKER_FAST_PATH_ENABLED)
 
         Returns:
             {
@@ -53,50 +96,80 @@ class ProductNormalizerV2:
                 "category": str,
                 "confidence": float,
                 "confidence_level": "high" | "medium" | "low",
-                "source": "cache_tier1" | "cache_tier2" | "sql_search",
+                "source": "cache_tier1" | "cache_tier2" | "sql_search" | "degraded",
                 "needs_review": bool
             }
+
+        Circuit breaker OpenAI aperto (o interpret interrotto da circuito
+        aperto / deadline esaurita) → modalità degradata:
+        SQL search sul raw name + rerank, primo candidato con confidence bassa
+        e needs_review=True, nessuna chiamata LLM
+
+        Chiamate concorrenti con stessi raw_product_name, store_name, price,
+        skip_cache e interpret_result condividono un'unica esecuzione della
+        pipeline (single-flight): il prezzo cambia la coerenza del cache hit
         """
+        key = (
+            raw_product_name,
+            store_name,
+            price,
+            skip_cache,
+            json.dumps(interpret_result, sort_keys=True, default=str) if interpret_result is not None else None
+        )
+        result = await self._single_flight.do(
+            key,
+            lambda: self._run_pipeline(
+                raw_product_name, household_id, store_name, price, skip_cache, interpret_result
+            )
+        )
+
+        # Copia: ogni chiamante riceve il proprio dict
+        return dict(result)
+
+    async def _run_pipeline(
+        self,
+        raw_product_name: str,
+        household_id: str,
+        store_name: Optional[str],
+        price: Optional[float],
+        skip_cache: bool = False,
+        interpret_result: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Esegue pipeline completa per singolo prodotto (vedi normalize_product)"""
         try:
             print(f"🔎 [START] raw='{raw_product_name}'")
 
             # STEP 1: Cache Lookup
-            cache_hit = self.cache_service.get_cached_product(
-                raw_name=raw_product_name,
-                store_name=store_name,
-                current_price=price
-            )
+            if not skip_cache:
+                cache_hit = await blocking_executor.run(
+                    self.cache_service.get_cached_product,
+                    raw_name=raw_product_name,
+                    store_name=store_name,
+                    current_price=price
+                )
 
-            if cache_hit:
-                print(f"✅ [CACHE] {cache_hit.get('canonical_name')}")
-                return self._format_cache_result(cache_hit)
+                if cache_hit:
+                    print(f"✅ [CACHE] {cache_hit.get('canonical_name')}")
+                    return self._format_cache_result(cache_hit)
 
-            print("💭 [LLM INTERPRET]...")
+            # STEP 2a: Interpretazione rule-based (abbreviazioni note, nessuna chiamata LLM)
+            if interpret_result is None:
+                interpret_result = self._rule_interpret(raw_product_name, store_name)
 
-            # STEP 2: LLM Interpret
-            interpret_result = await self.llm_interpret_service.interpret_raw_name(
-                raw_name=raw_product_name,
-                store_name=store_name,
-                price=price
-            )
+            if interpret_result is None and openai_client_service.breaker.is_open():
+                return await self._run_degraded(raw_product_name, "circuit_open")
+
+            # STEP 2: LLM Interpret (se non già fatto in batch)
+            if interpret_result is None:
+                print("💭 [LLM INTERPRET]...")
+                interpret_result = await self.llm_interpret_service.interpret_raw_name(
+                    raw_name=raw_product_name,
+                    store_name=store_name,
+                    price=price
+                )
 
             if not interpret_result['success']:
-                return {
-                    "success": False,
-                    "error": "LLM Interpret failed",
-                    "canonical_name": raw_product_name,  # Usa raw name come fallback
-                    "normalized_product_id": None,
-                    "brand": None,
-                    "category": None,
-                    "subcategory": None,
-                    "size": None,
-                    "unit_type": None,
-                    "tags": [],
-                    "confidence": 0.0,
-                    "confidence_level": "low",
-                    "source": "error",
-                    "needs_review": True
-                }
+                return await self._run_degraded(raw_product_name, "llm_unavailable")
 
             hypothesis = interpret_result['hypothesis']
             print(f"   → hypothesis: '{hypothesis}'")
@@ -107,7 +180,7 @@ class ProductNormalizerV2:
 
             # STEP 3: SQL Hybrid Search
             print("🔍 [SQL SEARCH]...")
-            candidates = await asyncio.to_thread(
+            candidates = await blocking_executor.run(
                 self.sql_retriever_service.search_products,
                 hypothesis=hypothesis,
                 brand=interpret_result.get('brand'),
@@ -149,33 +222,100 @@ class ProductNormalizerV2:
             for i, c in enumerate(reranked[:3], 1):
                 print(f"      {i}. {c.get('canonical_name')} (adjusted: {c.get('combined_score', 0):.3f})")
 
-            # STEP 5: LLM Select (top 5 a LLM)
-            print("✅ [LLM SELECT]...")
-            select_result = await self.llm_select_service.select_best_match(
-                raw_name=raw_product_name,
-                hypothesis=hypothesis,
-                candidates=reranked[:5]
-            )
+            selected_product, validation = None, None
+            fast_path = False
 
-            if not select_result['success']:
-                # Fallback: primo candidato
-                selected_product = reranked[0]
-                print(f"   → fallback to first candidate: '{selected_product['canonical_name']}'")
-            else:
-                selected_product = select_result['selected_product']
-                print(f"   → selected: '{selected_product['canonical_name']}'")
-
-            # STEP 6: LLM Validate
-            print("📊 [LLM VALIDATE]...")
-            validation = await self.llm_validate_service.validate_mapping(
-                raw_name=raw_product_name,
-                selected_product=selected_product,
-                hypothesis=hypothesis
-            )
+            # Fast path: candidato dominante e coerente con l'ipotesi → niente LLM
+            if settings.RERANKER_FAST_PATH_ENABLED:
+                decision = self.business_reranker_service.evaluate_fast_path(
+                    reranked=reranked,
+                    hypothesis_context=hypothesis_context
+                )
+                print(f"⚡ [FAST PATH] {'accepted' if decision['accepted'] else 'rejected'}: {decision['reason']} (score: {decision['top_score']:.3f}, margin: {decision['margin']:.3f})")
+                if decision['accepted']:
+                    self._fast_path_accepted += 1
+                    fast_path = True
+                    selected_product = reranked[0]
+                    validation = build_validation({
+                        "confidence_score": decision['confidence_score'],
+                        "reasoning": f"Fast path: candidato dominante (score {decision['top_score']:.3f}, margine {decision['margin']:.3f}), brand e formato coincidenti",
+                        "flags": {
+                            "brand_mismatch": False,
+                            "size_uncertain": False,
+                            "ambiguous": False
+                        }
+                    })
+                else:
+                    self._fast_path_rejected += 1
+
+            if selected_product is None and openai_client_service.breaker.is_open():
+                return await self._run_degraded(raw_product_name, "circuit_open", reranked)
+
+            llm_stage_start = time.perf_counter()
+
+            # STEP 5+6: LLM Select + Validate fusi (opzionale, top 5 a LLM)
+            if selected_product is None and settings.LLM_FUSED_SELECT_VALIDATE_ENABLED:
+                print("✅ [LLM SELECT+VALIDATE]...")
+                fused_result = await self.llm_select_validate_service.select_and_validate(
+                    raw_name=raw_product_name,
+                    hypothesis=hypothesis,
+                    candidates=reranked[:5]
+                )
+                if fused_result['success']:
+                    selected_product = fused_result['selected_product']
+                    validation = fused_result['validation']
+                    print(f"   → selected: '{selected_product['canonical_name']}'")
+                else:
+                    print("   → fused stage failed, falling back to select + validate")
+
+            if selected_product is None:
+                # STEP 5: LLM Select (top 5 a LLM)
+                print("✅ [LLM SELECT]...")
+                select_result = await self.llm_select_service.select_best_match(
+                    raw_name=raw_product_name,
+                    hypothesis=hypothesis,
+                    candidates=reranked[:5]
+                )
+
+                if not select_result['success']:
+                    # Fallback: primo candidato
+                    selected_product = reranked[0]
+                    print(f"   → fallback to first candidate: '{selected_product['canonical_name']}'")
+                else:
+                    selected_product = select_result['selected_product']
+                    print(f"   → selected: '{selected_product['canonical_name']}'")
+
+                # STEP 6: LLM Validate
+                print("📊 [LLM VALIDATE]...")
+                validation = await self.llm_validate_service.validate_mapping(
+                    raw_name=raw_product_name,
+                    selected_product=selected_product,
+                    hypothesis=hypothesis
+                )
+
+            if not fast_path:
+                # Durata media stage LLM → stima latenza risparmiata dal fast path
+                self._llm_stage_runs += 1
+                self._llm_stage_seconds += time.perf_counter() - llm_stage_start
 
             print(f"   → confidence: {validation['confidence_score']:.2f} ({validation['confidence_level']})")
             print(f"✅ [DONE] '{selected_product['canonical_name']}' | confidence: {validation['confidence_score']:.2f} | review: {validation['needs_review']}\n")
 
+            # Write-back in product_mappings (Tier 2) se sopra soglia.
+            # Fast path escluso: scelta non validata da LLM, non deve diventare cache
+            if not fast_path:
+                mapping_writeback_service.enqueue(
+                    raw_name=raw_product_name,
+                    store_name=store_name,
+                    normalized_product_id=selected_product.get('product_id'),
+                    confidence_score=validation['confidence_score'],
+                    interpretation_details={
+                        "source": "sql_search",
+                        "hypothesis": hypothesis,
+                        "confidence_level": validation['confidence_level']
+                    }
+                )
+
             return {
                 "success": True,
                 "normalized_product_id": selected_product.get('product_id'),
@@ -220,6 +360,11 @@ class ProductNormalizerV2:
         """
         Normalizza batch di prodotti in parallelo
 
+        Lookup cache di tutte le righe in una sola RPC, poi solo i miss passano
+        alla pipeline LLM. Finestra scorrevole: mantiene sempre batch_size
+        normalizzazioni in corso (un item lento non blocca i successivi),
+        limitate anche dal semaforo globale condiviso tra richieste concorrenti
+
         Args:
             items: Lista items con raw_product_name, store_name, price
             household_id: ID household
@@ -234,38 +379,366 @@ class ProductNormalizerV2:
 
         print(f"🚀 [BATCH START] {len(items)} items, batch_size={batch_size}")
 
-        results = []
+        cache_hits = await self._lookup_cache_batch(items)
+        interpretations = await self._interpret_misses_batch(items, cache_hits)
+        window = asyncio.Semaphore(batch_size)
+        results = await asyncio.gather(*[
+            self._normalize_cached_or_bounded(
+                item, household_id, window, cache_hits, idx, interpretations.get(idx)
+            )
+            for idx, item in enumerate(items)
+        ])
 
-        # Processa in batch di N items
-        for i in range(0, len(items), batch_size):
-            batch = items[i:i + batch_size]
-            print(f"   → Processing batch {i//batch_size + 1} ({len(batch)} items)...")
+        print(f"✅ [BATCH DONE] {len(results)} items processed")
+        return list(results)
 
-            # Parallelizza normalizzazione del batch
-            batch_tasks = [
-                self.normalize_product(
-                    raw_product_name=item['raw_product_name'],
-                    household_id=household_id,
-                    store_name=item.get('store_name'),
-                    price=item.get('price')
-                )
-                for item in batch
+    async def normalize_batch_as_completed(
+        self,
+        items: List[Dict[str, Any]],
+        household_id: str,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Come normalize_batch ma emette ogni risultato appena pronto
+
+        Yields:
+            (indice item in input, risultato normalizzazione) in ordine di completamento
+        """
+        if batch_size is None:
+            batch_size = settings.PARALLEL_NORMALIZATION_BATCH_SIZE
+
+        print(f"🚀 [STREAM START] {len(items)} items, batch_size={batch_size}")
+
+        cache_hits = await self._lookup_cache_batch(items)
+        interpretations = await self._interpret_misses_batch(items, cache_hits)
+        window = asyncio.Semaphore(batch_size)
+
+        async def _indexed(idx: int, item: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+            return idx, await self._normalize_cached_or_bounded(
+                item, household_id, window, cache_hits, idx, interpretations.get(idx)
+            )
+
+        tasks = [
+            asyncio.ensure_future(_indexed(idx, item))
+            for idx, item in enumerate(items)
+        ]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client disconnesso: non lasciare normalizzazioni orfane
+            for task in tasks:
+                task.cancel()
+
+        print(f"✅ [STREAM DONE] {len(items)} items processed")
+
+    async def normalize_stream(
+        self,
+        items: AsyncIterator[Dict[str, Any]],
+        household_id: str,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Normalizza item che arrivano in streaming (es. parser incrementale):
+        ogni item parte appena ricevuto, senza attendere la fine dell'input
+
+        Niente batch cache lookup / batch interpret (l'input non è noto a priori):
+        ogni item segue normalize_product completo
+
+        Yields:
+            (indice di arrivo, risultato normalizzazione) in ordine di completamento
+        """
+        if batch_size is None:
+            batch_size = settings.PARALLEL_NORMALIZATION_BATCH_SIZE
+
+        window = asyncio.Semaphore(batch_size)
+        results: asyncio.Queue = asyncio.Queue()
+        tasks: List[asyncio.Future] = []
+
+        async def _run(idx: int, item: Dict[str, Any]):
+            await results.put((idx, await self._normalize_bounded(item, household_id, window)))
+
+        async def _feed():
+            try:
+                async for item in items:
+                    tasks.append(asyncio.ensure_future(_run(len(tasks), item)))
+                await asyncio.gather(*tasks)
+            finally:
+                results.put_nowait(None)  # Fine input (anche in caso di errore)
+
+        feeder = asyncio.ensure_future(_feed())
+        try:
+            while True:
+                entry = await results.get()
+                if entry is None:
+                    break
+                yield entry
+            await feeder  # Propaga eventuali errori dell'input
+        finally:
+            feeder.cancel()
+            for task in tasks:
+                task.cancel()
+
+        print(f"✅ [STREAM DONE] {len(tasks)} items processed")
+
+    async def _lookup_cache_batch(
+        self,
+        items: List[Dict[str, Any]]
+    ) -> Optional[List[Optional[Dict]]]:
+        """
+        Lookup cache batch per tutte le righe (una sola RPC)
+
+        Returns:
+            Hit allineati a items, None se il batch lookup non è disponibile
+            (ogni item farà il proprio lookup nella pipeline)
+        """
+        if not items:
+            return []
+
+        return await blocking_executor.run(
+            self.cache_service.get_cached_products_batch,
+            [
+                {
+                    'raw_name': item['raw_product_name'],
+                    'store_name': item.get('store_name'),
+                    'price': item.get('price')
+                }
+                for item in items
             ]
+        )
 
-            batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+    async def _interpret_misses_batch(
+        self,
+        items: List[Dict[str, Any]],
+        cache_hits: Optional[List[Optional[Dict]]]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        LLM Interpret di tutti i cache miss dello scontrino in una chiamata (per negozio)
 
-            # Gestisci errori per singolo item
-            for idx, result in enumerate(batch_results):
-                if isinstance(result, Exception):
-                    results.append({
-                        "success": False,
-                        "error": str(result)
-                    })
-                else:
-                    results.append(result)
+        Returns:
+            {indice item: interpret_result}; vuoto se batch interpret disabilitato,
+            cache lookup non disponibile o meno di 2 miss (nessun vantaggio)
+        """
+        if not settings.LLM_INTERPRET_BATCH_ENABLED or cache_hits is None:
+            return {}
+        if openai_client_service.breaker.is_open():
+            return {}  # Modalità degradata per item
+
+        # Miss coperti dalle regole: nessuna chiamata LLM
+        interpretations = {}
+        misses = []
+        for idx in range(len(items)):
+            if cache_hits[idx]:
+                continue
+            rule_result = self._rule_interpret(
+                items[idx]['raw_product_name'], items[idx].get('store_name'), count_miss=False
+            )
+            if rule_result is not None:
+                interpretations[idx] = rule_result
+            else:
+                misses.append(idx)
+        if len(misses) < 2:
+            return interpretations  # Miss rimasti: contati dalla pipeline per item
+
+        self._rule_interpret_misses += len(misses)
+
+        # Normalmente un solo negozio per scontrino
+        by_store: Dict[Optional[str], List[int]] = {}
+        for idx in misses:
+            by_store.setdefault(items[idx].get('store_name'), []).append(idx)
+
+        print(f"💭 [LLM INTERPRET BATCH] {len(misses)} misses")
+        groups = list(by_store.items())
+        group_results = await asyncio.gather(*[
+            self.llm_interpret_service.interpret_batch(
+                [
+                    {'raw_name': items[idx]['raw_product_name'], 'price': items[idx].get('price')}
+                    for idx in indices
+                ],
+                store_name=store_name
+            )
+            for store_name, indices in groups
+        ])
 
-        print(f"✅ [BATCH DONE] {len(results)} items processed")
-        return results
+        for (_, indices), results in zip(groups, group_results):
+            interpretations.update(zip(indices, results))
+        return interpretations
+
+    def _rule_interpret(
+        self,
+        raw_product_name: str,
+        store_name: Optional[str],
+        count_miss: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Interpretazione rule-based se abilitata e sufficiente
+
+        Args:
+            count_miss: False se il chiamante conta il miss (ogni item contato una volta)
+
+        Returns:
+            interpret_result (formato LLM Interpret) se tipo prodotto riconosciuto
+            e coverage >= RULE_INTERPRET_MIN_COVERAGE, altrimenti None (serve LLM)
+        """
+        if not settings.RULE_INTERPRET_ENABLED:
+            return None
+
+        result = rule_interpret_service.interpret_raw_name(raw_product_name, store_name)
+        if result['product_type'] and result['coverage'] >= settings.RULE_INTERPRET_MIN_COVERAGE:
+            self._rule_interpret_hits += 1
+            print(f"   [RULE INTERPRET] ✅ '{result['hypothesis']}' (coverage {result['coverage']:.2f})")
+            return result
+
+        if count_miss:
+            self._rule_interpret_misses += 1
+        return None
+
+    async def _normalize_cached_or_bounded(
+        self,
+        item: Dict[str, Any],
+        household_id: str,
+        window: asyncio.Semaphore,
+        cache_hits: Optional[List[Optional[Dict]]],
+        idx: int,
+        interpret_result: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Ritorna subito il cache hit del batch lookup, altrimenti esegue la pipeline"""
+        if cache_hits is not None and cache_hits[idx]:
+            print(f"✅ [CACHE] {cache_hits[idx].get('canonical_name')}")
+            return self._format_cache_result(cache_hits[idx])
+
+        return await self._normalize_bounded(
+            item, household_id, window,
+            skip_cache=cache_hits is not None,
+            interpret_result=interpret_result
+        )
+
+    async def _normalize_bounded(
+        self,
+        item: Dict[str, Any],
+        household_id: str,
+        window: asyncio.Semaphore,
+        skip_cache: bool = False,
+        interpret_result: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Normalizza item rispettando finestra della richiesta e limite globale"""
+        async with window:
+            async with self._global_semaphore:
+                return await self._normalize_batch_item(
+                    item, household_id, skip_cache, interpret_result
+                )
+
+    async def _normalize_batch_item(
+        self,
+        item: Dict[str, Any],
+        household_id: str,
+        skip_cache: bool = False,
+        interpret_result: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Normalizza item di un batch, gestendo errori per singolo item"""
+        try:
+            return await self.normalize_product(
+                raw_product_name=item['raw_product_name'],
+                household_id=household_id,
+                store_name=item.get('store_name'),
+                price=item.get('price'),
+                skip_cache=skip_cache,
+                interpret_result=interpret_result
+            )
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    async def _run_degraded(
+        self,
+        raw_product_name: str,
+        reason: str,
+        reranked: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Modalità degradata deterministica: SQL search sul raw name + rerank,
+        primo candidato accettato con confidence bassa (needs_review=True)
+
+        Args:
+            reranked: Candidati già ottenuti dalla pipeline (salta la ricerca)
+        """
+        self._degraded += 1
+        print(f"🟠 [DEGRADED] {reason}")
+
+        if reranked is None:
+            candidates = await blocking_executor.run(
+                self.sql_retriever_service.search_products,
+                hypothesis=raw_product_name,
+                top_k=20
+            )
+            reranked = self.business_reranker_service.rerank_candidates(
+                candidates=candidates,
+                hypothesis_context={}
+            ) if candidates else []
+
+        if not reranked:
+            print("   → no candidates, keeping raw name")
+            return {
+                "success": True,
+                "normalized_product_id": None,
+                "canonical_name": raw_product_name,
+                "brand": None,
+                "category": None,
+                "subcategory": None,
+                "size": None,
+                "unit_type": None,
+                "tags": [],
+                "confidence": 0.0,
+                "confidence_level": "low",
+                "source": "degraded",
+                "needs_review": True
+            }
+
+        top = reranked[0]
+        print(f"   → top candidate: '{top['canonical_name']}' (needs review)")
+        return {
+            "success": True,
+            "normalized_product_id": top.get('product_id'),
+            "canonical_name": top['canonical_name'],
+            "brand": top.get('brand'),
+            "category": top.get('category'),
+            "subcategory": top.get('subcategory'),
+            "size": str(top.get('size')) if top.get('size') is not None else None,
+            "unit_type": top.get('unit_type'),
+            "tags": top.get('tags', []),
+            "confidence": settings.NORMALIZER_DEGRADED_CONFIDENCE,
+            "confidence_level": "low",
+            "source": "degraded",
+            "needs_review": True
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiche normalizzatore per health check"""
+        avg_llm_stage = (
+            self._llm_stage_seconds / self._llm_stage_runs if self._llm_stage_runs else 0.0
+        )
+        llm_calls_per_item = 1 if settings.LLM_FUSED_SELECT_VALIDATE_ENABLED else 2
+        return {
+            "single_flight": self._single_flight.get_stats(),
+            "degraded": self._degraded,
+            "rule_interpret": {
+                "enabled": settings.RULE_INTERPRET_ENABLED,
+                "lexicon_version": rule_interpret_service.lexicon_version,
+                "hits": self._rule_interpret_hits,
+                "below_threshold": self._rule_interpret_misses
+            },
+            "fast_path": {
+                "enabled": settings.RERANKER_FAST_PATH_ENABLED,
+                "accepted": self._fast_path_accepted,
+                "rejected": self._fast_path_rejected,
+                "llm_calls_saved": self._fast_path_accepted * llm_calls_per_item,
+                "avg_llm_stage_ms": round(avg_llm_stage * 1000, 1),
+                "estimated_seconds_saved": round(self._fast_path_accepted * avg_llm_stage, 2)
+            }
+        }
 
     def _format_cache_result(self, cache_hit: Dict) -> Dict[str, Any]:
         """Formatta risultato cache in formato standard"""
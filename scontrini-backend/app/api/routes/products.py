@@ -40,7 +40,7 @@ async def categorize_product(request: CategorizeProductRequest):
         Categoria e sottocategoria suggerite
     """
     try:
-        result = categorization_service.categorize_product(
+        result = await categorization_service.categorize_product(
             canonical_name=request.canonical_name,
             brand=request.brand,
             size=request.size,
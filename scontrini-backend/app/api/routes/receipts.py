@@ -4,8 +4,9 @@ Endpoints per gestione scontrini con flusso completo:
 UPLOAD → OCR → PARSING → Normalizzazione → Validazione → Score → Review Utente → Categorizzazione modificati → Salvataggio
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import AsyncIterator, List, Optional, Dict, Tuple
 
 router = APIRouter()
 
@@ -14,10 +15,16 @@ from app.services.ai_parser_service import ai_receipt_parser
 from app.services.supabase_service import supabase_service
 from app.services.store_service import store_service
 from app.services.categorization_service import categorization_service
+from app.services.receipt_job_service import receipt_job_service, ReceiptJobQueueFullError
+from app.services.http_fetch_service import http_fetch_service, ImageDownloadError, ImageTooLargeError
+from app.services.blocking_executor import blocking_executor
+from app.services.mapping_writeback_service import mapping_writeback_service
 from app.agents.product_normalizer import product_normalizer_v2
 from app.utils.product_aggregator import aggregate_duplicate_products
+from app.utils.deadline import deadline_scope
+from app.config import settings
 import asyncio
-import requests
+import json
 
 # ============================================
 # SCHEMAS
@@ -56,7 +63,7 @@ class ReceiptItemData(BaseModel):
     unit_type: Optional[str] = None
     confidence: float
     confidence_level: str  # "high" | "medium" | "low"
-    source: str  # "cache_tier1" | "cache_tier2" | "sql_search" | "hypothesis_fallback"
+    source: str  # "cache_tier1" | "cache_tier2" | "sql_search" | "hypothesis_fallback" | "degraded"
     pending_review: bool
     user_verified: bool = False
 
@@ -71,6 +78,25 @@ class ProcessReceiptResponse(BaseModel):
     items: List[ReceiptItemData]
 
 
+class ProcessReceiptJobResponse(BaseModel):
+    """Job accodato per processing asincrono"""
+    success: bool
+    job_id: str
+    status: str  # "queued" | "running" | "completed" | "failed"
+    message: str
+
+
+class ReceiptJobStatusResponse(BaseModel):
+    """Stato job con risultato (stesso formato di /process) quando completato"""
+    job_id: str
+    status: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[ProcessReceiptResponse] = None
+
+
 class ModifiedProduct(BaseModel):
     """Prodotto modificato dall'utente"""
     receipt_item_id: str
@@ -95,187 +121,397 @@ class ConfirmReceiptResponse(BaseModel):
 
 
 # ============================================
-# ENDPOINTS
+# PIPELINE
 # ============================================
 
-@router.post("/process", response_model=ProcessReceiptResponse)
-async def process_receipt(request: ProcessReceiptRequest):
-    """
-    Step 1-6: UPLOAD → OCR → PARSING → Normalizzazione SQL-First → Validazione → Score
+async def _ocr(request: ProcessReceiptRequest) -> Dict:
+    """Step 1-2: download immagine → OCR"""
+    print("📸 Step 1-2: OCR...")
+    try:
+        img_content = await http_fetch_service.fetch_bytes(request.image_url)
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ImageDownloadError as e:
+        raise Exception(f"Image download failed: {str(e)}")
+
+    ocr_result = await blocking_executor.run(
+        ocr_service.extract_text_from_image,
+        image_content=img_content
+    )
+    if not ocr_result["success"]:
+        raise Exception(f"OCR failed: {ocr_result.get('error')}")
+
+    return ocr_result
+
+
+async def _ocr_and_parse(request: ProcessReceiptRequest) -> Tuple[Dict, Dict]:
+    """Step 1-3: download immagine → OCR → parsing AI"""
+    ocr_result = await _ocr(request)
+
+    # Step 3: PARSING
+    print("📝 Step 3: Parsing...")
+    parsing_result = await ai_receipt_parser.parse_receipt(ocr_result["text"])
+    if not parsing_result["success"]:
+        raise Exception(f"Parsing failed: {parsing_result.get('error')}")
+
+    return ocr_result, parsing_result
+
+
+async def _create_receipt_record(
+    request: ProcessReceiptRequest,
+    ocr_result: Dict,
+    parsing_result: Dict
+) -> str:
+    """Find/create store + crea receipt (status=processing), ritorna receipt_id"""
+    # Find or Create Store
+    store_id = None
+    if parsing_result.get("store_name"):
+        store_data = {
+            "store_name": parsing_result["store_name"],
+            "address": parsing_result.get("address_full"),
+            "city": parsing_result.get("address_city"),
+            "vat_number": parsing_result.get("vat_number")
+        }
+        store_result = await blocking_executor.run(store_service.find_or_create_store, store_data)
+        if store_result["success"]:
+            store_id = store_result["store"]["id"]
+
+    # Crea receipt (status=processing)
+    receipt = await blocking_executor.run(
+        supabase_service.create_receipt,
+        household_id=request.household_id,
+        uploaded_by=request.uploaded_by,
+        image_url=request.image_url,
+        store_id=store_id,
+        store_name=parsing_result.get("store_name"),
+        store_address=parsing_result.get("address_full"),
+        receipt_date=parsing_result.get("receipt_date"),
+        receipt_time=parsing_result.get("receipt_time"),
+        total_amount=parsing_result.get("total_amount"),
+        payment_method=parsing_result.get("payment_method"),
+        discount_amount=parsing_result.get("discount_amount"),
+        raw_ocr_text=ocr_result["text"],
+        ocr_confidence=ocr_result.get("confidence"),
+        processing_status="processing"
+    )
+    return receipt["id"]
 
-    Pipeline normalizzazione: Cache → LLM Interpret → SQL Search → Business Rerank → LLM Select → Validate
-    Ritorna dati per review utente (con categoria/sottocategoria NASCOSTE nel frontend)
+
+def _prepare_batch_items(parsing_result: Dict) -> List[Dict]:
+    """Aggrega duplicati e prepara items per normalize_batch"""
+    parsed_items = parsing_result.get("items", [])
+
+    # Aggrega prodotti duplicati
+    aggregated_items = aggregate_duplicate_products(parsed_items)
+
+    return [
+        {
+            "raw_product_name": item["raw_product_name"],
+            "store_name": parsing_result.get("store_name"),
+            "price": item["total_price"],
+            "original_item": item  # Mantieni riferimento originale
+        }
+        for item in aggregated_items
+    ]
+
+
+async def _parse_and_normalize_streaming(
+    request: ProcessReceiptRequest,
+    ocr_result: Dict
+) -> Tuple[Dict, List[Dict], List[Dict]]:
     """
-    try:
-        # Verifica household
-        household = supabase_service.get_household(request.household_id)
-        if not household:
-            raise HTTPException(status_code=404, detail="Household not found")
-        
-        # Step 1-2: OCR
-        print("📸 Step 1-2: OCR...")
-        img_response = requests.get(request.image_url)
-        img_content = img_response.content
-        
-        ocr_result = ocr_service.extract_text_from_image(image_content=img_content)
-        if not ocr_result["success"]:
-            raise Exception(f"OCR failed: {ocr_result.get('error')}")
-        
-        # Step 3: PARSING
-        print("📝 Step 3: Parsing...")
-        parsing_result = ai_receipt_parser.parse_receipt(ocr_result["text"])
-        if not parsing_result["success"]:
-            raise Exception(f"Parsing failed: {parsing_result.get('error')}")
-        
-        # Find or Create Store
-        store_id = None
-        if parsing_result.get("store_name"):
-            store_data = {
-                "store_name": parsing_result["store_name"],
-                "address": parsing_result.get("address_full"),
-                "city": parsing_result.get("address_city"),
-                "vat_number": parsing_result.get("vat_number")
-            }
-            store_result = store_service.find_or_create_store(store_data)
-            if store_result["success"]:
-                store_id = store_result["store"]["id"]
-        
-        # Crea receipt (status=processing)
-        receipt = supabase_service.create_receipt(
-            household_id=request.household_id,
-            uploaded_by=request.uploaded_by,
-            image_url=request.image_url,
-            store_id=store_id,
-            store_name=parsing_result.get("store_name"),
-            store_address=parsing_result.get("address_full"),
-            receipt_date=parsing_result.get("receipt_date"),
-            receipt_time=parsing_result.get("receipt_time"),
-            total_amount=parsing_result.get("total_amount"),
-            payment_method=parsing_result.get("payment_method"),
-            discount_amount=parsing_result.get("discount_amount"),
-            raw_ocr_text=ocr_result["text"],
-            ocr_confidence=ocr_result.get("confidence"),
-            processing_status="processing"
+    Step 3-6 sovrapposti: ogni prodotto va al normalizzatore appena il parser
+    in streaming lo completa
+
+    Risultati riusati solo a parità di (raw_product_name, store_name, price)
+    con gli item di _prepare_batch_items; gli altri passano da normalize_batch
+    dopo il parsing:
+    - store_name assente nell'header (items emessi prima del negozio):
+      nessun item in streaming, evita una seconda normalizzazione col negozio finale
+    - righe duplicate: la prima riga è normalizzata col proprio prezzo, poi
+      di nuovo col prezzo aggregato (stesso input della modalità batch)
+
+    Returns:
+        (parsing_result, batch_items, norm_results allineati a batch_items)
+    """
+    print("📝 Step 3-6: Parsing in streaming + normalizzazione...")
+    parsing_result: Dict = {"success": False, "error": "No parser result"}
+    streamed: List[Dict] = []
+    streamed_names = set()
+
+    async def _parsed_items() -> AsyncIterator[Dict]:
+        nonlocal parsing_result
+        store_name = None
+        async for event, data in ai_receipt_parser.parse_receipt_stream(ocr_result["text"]):
+            if event == "header":
+                store_name = data.get("store_name")
+                if not store_name:
+                    print("   store_name not in header: items normalized after parsing")
+            elif event == "item":
+                if not store_name or data["raw_product_name"] in streamed_names:
+                    continue
+                streamed_names.add(data["raw_product_name"])
+                batch_item = {
+                    "raw_product_name": data["raw_product_name"],
+                    "store_name": store_name,
+                    "price": data["total_price"]
+                }
+                streamed.append(batch_item)
+                yield batch_item
+            elif event == "result":
+                parsing_result = data
+
+    def _key(item: Dict) -> Tuple[str, Optional[str], Optional[float]]:
+        return item["raw_product_name"], item["store_name"], item["price"]
+
+    results: Dict[Tuple[str, Optional[str], Optional[float]], Dict] = {}
+    async for idx, norm_result in product_normalizer_v2.normalize_stream(
+        items=_parsed_items(),
+        household_id=request.household_id
+    ):
+        results[_key(streamed[idx])] = norm_result
+
+    if not parsing_result["success"]:
+        raise Exception(f"Parsing failed: {parsing_result.get('error')}")
+
+    batch_items = _prepare_batch_items(parsing_result)
+
+    leftovers = [item for item in batch_items if _key(item) not in results]
+    if leftovers:
+        print(f"   {len(leftovers)} items normalized after parsing")
+        leftover_results = await product_normalizer_v2.normalize_batch(
+            items=leftovers,
+            household_id=request.household_id
         )
-        receipt_id = receipt["id"]
-        
-        # Step 4-5-6: Normalizzazione SQL-First + Validazione + Score (batch parallelo)
-        print("🤖 Step 4-5-6: Normalizzazione SQL-First + Validazione + Score...")
-
-        parsed_items = parsing_result.get("items", [])
+        for item, norm_result in zip(leftovers, leftover_results):
+            results[_key(item)] = norm_result
+
+    norm_results = [results[_key(item)] for item in batch_items]
+    return parsing_result, batch_items, norm_results
+
+
+def _to_normalized_item(batch_item: Dict, norm_result: Dict) -> Dict:
+    """Converte risultato normalizzazione in formato per frontend"""
+    original_item = batch_item["original_item"]
+
+    return {
+        "raw_product_name": original_item["raw_product_name"],
+        "quantity": original_item.get("quantity", 1.0),
+        "unit_price": original_item.get("unit_price"),
+        "total_price": original_item["total_price"],
+        # Campi normalizzati da V2
+        "canonical_name": norm_result["canonical_name"],
+        "brand": norm_result.get("brand"),
+        "category": norm_result.get("category"),
+        "subcategory": norm_result.get("subcategory"),
+        "size": norm_result.get("size"),
+        "unit_type": norm_result.get("unit_type"),
+        "confidence": norm_result["confidence"],
+        "confidence_level": norm_result["confidence_level"],
+        "source": norm_result["source"],
+        "pending_review": norm_result["needs_review"],
+        "user_verified": False
+    }
+
+
+def _to_receipt_item_data(item: Dict) -> ReceiptItemData:
+    """Crea ReceiptItemData con campi normalizzati V2"""
+    return ReceiptItemData(
+        receipt_item_id=item.get("receipt_item_id", ""),
+        raw_product_name=item["raw_product_name"],
+        quantity=item["quantity"],
+        unit_price=item["unit_price"],
+        total_price=item["total_price"],
+        # Campi normalizzati da V2
+        canonical_name=item["canonical_name"],
+        brand=item.get("brand"),
+        category=item.get("category"),
+        subcategory=item.get("subcategory"),
+        size=item.get("size"),
+        unit_type=item.get("unit_type"),
+        confidence=item["confidence"],
+        confidence_level=item["confidence_level"],
+        source=item["source"],
+        pending_review=item["pending_review"],
+        user_verified=item["user_verified"]
+    )
 
-        # Aggrega prodotti duplicati
-        aggregated_items = aggregate_duplicate_products(parsed_items)
 
-        # Prepara batch items
-        batch_items = [
-            {
+async def _save_receipt_items(receipt_id: str, normalized_items: List[Dict]) -> List[ReceiptItemData]:
+    """Crea receipt_items in batch, aggiorna status receipt=pending"""
+    if normalized_items:
+        items_to_insert = []
+        for idx, item in enumerate(normalized_items):
+            items_to_insert.append({
+                "receipt_id": receipt_id,
                 "raw_product_name": item["raw_product_name"],
-                "store_name": parsing_result.get("store_name"),
-                "price": item["total_price"],
-                "original_item": item  # Mantieni riferimento originale
-            }
-            for item in aggregated_items
-        ]
+                "quantity": item["quantity"],
+                "unit_price": item["unit_price"],
+                "total_price": item["total_price"],
+                "line_number": idx + 1
+            })
 
-        # Normalizza batch con parallelizzazione (batch_size da config)
-        norm_results = await product_normalizer_v2.normalize_batch(
-            items=batch_items,
-            household_id=request.household_id
+        receipt_items_data = await blocking_executor.run(
+            supabase_service.create_receipt_items,
+            receipt_id=receipt_id,
+            items=items_to_insert
         )
 
-        # Converti risultati in formato per frontend
+        # Aggiungi receipt_item_id ai risultati
+        for idx, item in enumerate(normalized_items):
+            if idx < len(receipt_items_data):
+                item["receipt_item_id"] = receipt_items_data[idx]["id"]
+
+    # Aggiorna receipt status
+    await blocking_executor.run(supabase_service.update_receipt_status, receipt_id, "pending")
+
+    # Scontrino completato: scrive subito i nuovi mapping ad alta confidence (in background)
+    mapping_writeback_service.request_flush()
+
+    print(f"✅ Processing completato: {len(normalized_items)} prodotti normalizzati")
+
+    return [_to_receipt_item_data(item) for item in normalized_items]
+
+
+def _build_process_response(
+    receipt_id: str,
+    parsing_result: Dict,
+    receipt_items: List[ReceiptItemData]
+) -> ProcessReceiptResponse:
+    return ProcessReceiptResponse(
+        success=True,
+        receipt_id=receipt_id,
+        message="Scontrino processato. Verifica i dati prima di confermare.",
+        store_name=parsing_result.get("store_name"),
+        receipt_date=parsing_result.get("receipt_date").isoformat() if parsing_result.get("receipt_date") else None,
+        total_amount=parsing_result.get("total_amount"),
+        items=receipt_items
+    )
+
+
+async def _run_receipt_pipeline(request: ProcessReceiptRequest) -> ProcessReceiptResponse:
+    """
+    Esegue la pipeline completa di processing (household già verificato)
+    Condivisa tra endpoint sincrono e job asincroni.
+    Le chiamate LLM rispettano la deadline RECEIPT_DEADLINE_SECONDS
+    (timeout e retry limitati dal tempo residuo)
+    """
+    with deadline_scope(settings.RECEIPT_DEADLINE_SECONDS):
+        if settings.RECEIPT_STREAMING_PARSER_ENABLED:
+            # Parsing e normalizzazione sovrapposti (scontrini lunghi)
+            ocr_result = await _ocr(request)
+            parsing_result, batch_items, norm_results = await _parse_and_normalize_streaming(
+                request, ocr_result
+            )
+            receipt_id = await _create_receipt_record(request, ocr_result, parsing_result)
+        else:
+            ocr_result, parsing_result = await _ocr_and_parse(request)
+            receipt_id = await _create_receipt_record(request, ocr_result, parsing_result)
+
+            # Step 4-5-6: Normalizzazione SQL-First + Validazione + Score (batch parallelo)
+            print("🤖 Step 4-5-6: Normalizzazione SQL-First + Validazione + Score...")
+            batch_items = _prepare_batch_items(parsing_result)
+
+            # Normalizza batch con parallelizzazione (batch_size da config)
+            norm_results = await product_normalizer_v2.normalize_batch(
+                items=batch_items,
+                household_id=request.household_id
+            )
+
         normalized_items = []
         for idx, norm_result in enumerate(norm_results):
             if not norm_result.get("success"):
                 print(f"⚠️ Normalization failed for item {idx}: {norm_result.get('error')}")
                 continue
+            normalized_items.append(_to_normalized_item(batch_items[idx], norm_result))
+
+        receipt_items = await _save_receipt_items(receipt_id, normalized_items)
+
+        return _build_process_response(receipt_id, parsing_result, receipt_items)
+
+
+def _encode_stream_event(event: str, data: Dict, stream_format: str) -> str:
+    """Serializza evento stream come riga NDJSON o messaggio SSE"""
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    return json.dumps({"event": event, "data": data}, default=str) + "\n"
+
+
+async def _stream_receipt_pipeline(
+    request: ProcessReceiptRequest,
+    stream_format: str
+) -> AsyncIterator[str]:
+    """
+    Pipeline in streaming:
+    - "header": store/data/totale appena finito il parsing
+    - "item": ogni prodotto appena normalizzato (ordine di completamento, con index originale)
+    - "done": risposta completa (stesso ProcessReceiptResponse di /process) dopo il salvataggio
+    - "error": errore bloccante, chiude lo stream
+    """
+    with deadline_scope(settings.RECEIPT_DEADLINE_SECONDS):
+        try:
+            ocr_result, parsing_result = await _ocr_and_parse(request)
+            batch_items = _prepare_batch_items(parsing_result)
+
+            yield _encode_stream_event("header", {
+                "store_name": parsing_result.get("store_name"),
+                "receipt_date": parsing_result.get("receipt_date").isoformat() if parsing_result.get("receipt_date") else None,
+                "total_amount": parsing_result.get("total_amount"),
+                "item_count": len(batch_items)
+            }, stream_format)
+
+            receipt_id = await _create_receipt_record(request, ocr_result, parsing_result)
+
+            print("🤖 Step 4-5-6: Normalizzazione SQL-First (streaming)...")
+            normalized_by_index = {}
+            async for idx, norm_result in product_normalizer_v2.normalize_batch_as_completed(
+                items=batch_items,
+                household_id=request.household_id
+            ):
+                if not norm_result.get("success"):
+                    print(f"⚠️ Normalization failed for item {idx}: {norm_result.get('error')}")
+                    continue
+
+                item = _to_normalized_item(batch_items[idx], norm_result)
+                normalized_by_index[idx] = item
+
+                yield _encode_stream_event("item", {
+                    "index": idx,
+                    "item": _to_receipt_item_data(item).model_dump()
+                }, stream_format)
+
+            # Salva nell'ordine originale dello scontrino (line_number)
+            normalized_items = [normalized_by_index[idx] for idx in sorted(normalized_by_index)]
+            receipt_items = await _save_receipt_items(receipt_id, normalized_items)
+
+            response = _build_process_response(receipt_id, parsing_result, receipt_items)
+            yield _encode_stream_event("done", response.model_dump(), stream_format)
+
+        except Exception as e:
+            print(f"❌ Error in process_receipt_stream: {str(e)}")
+            yield _encode_stream_event("error", {"detail": f"Error: {str(e)}"}, stream_format)
+
+
+# ============================================
+# ENDPOINTS
+# ============================================
+
+@router.post("/process", response_model=ProcessReceiptResponse)
+async def process_receipt(request: ProcessReceiptRequest):
+    """
+    Step 1-6: UPLOAD → OCR → PARSING → Normalizzazione SQL-First → Validazione → Score
+
+    Pipeline normalizzazione: Cache → LLM Interpret → SQL Search → Business Rerank → LLM Select → Validate
+    Ritorna dati per review utente (con categoria/sottocategoria NASCOSTE nel frontend)
+    """
+    try:
+        # Verifica household
+        household = await blocking_executor.run(supabase_service.get_household, request.household_id)
+        if not household:
+            raise HTTPException(status_code=404, detail="Household not found")
+
+        return await _run_receipt_pipeline(request)
 
-            original_item = batch_items[idx]["original_item"]
-
-            normalized_items.append({
-                "raw_product_name": original_item["raw_product_name"],
-                "quantity": original_item.get("quantity", 1.0),
-                "unit_price": original_item.get("unit_price"),
-                "total_price": original_item["total_price"],
-                # Campi normalizzati da V2
-                "canonical_name": norm_result["canonical_name"],
-                "brand": norm_result.get("brand"),
-                "category": norm_result.get("category"),
-                "subcategory": norm_result.get("subcategory"),
-                "size": norm_result.get("size"),
-                "unit_type": norm_result.get("unit_type"),
-                "confidence": norm_result["confidence"],
-                "confidence_level": norm_result["confidence_level"],
-                "source": norm_result["source"],
-                "pending_review": norm_result["needs_review"],
-                "user_verified": False
-            })
-        
-        # Crea receipt_items in batch
-        if normalized_items:
-            items_to_insert = []
-            for idx, item in enumerate(normalized_items):
-                items_to_insert.append({
-                    "receipt_id": receipt_id,
-                    "raw_product_name": item["raw_product_name"],
-                    "quantity": item["quantity"],
-                    "unit_price": item["unit_price"],
-                    "total_price": item["total_price"],
-                    "line_number": idx + 1
-                })
-            
-            receipt_items_data = supabase_service.create_receipt_items(
-                receipt_id=receipt_id,
-                items=items_to_insert
-            )
-            
-            # Aggiungi receipt_item_id ai risultati
-            for idx, item in enumerate(normalized_items):
-                if idx < len(receipt_items_data):
-                    item["receipt_item_id"] = receipt_items_data[idx]["id"]
-        
-        # Aggiorna receipt status
-        supabase_service.client.table("receipts")\
-            .update({"processing_status": "pending"})\
-            .eq("id", receipt_id)\
-            .execute()
-        
-        print(f"✅ Processing completato: {len(normalized_items)} prodotti normalizzati")
-        
-        # Crea ReceiptItemData con campi normalizzati V2
-        receipt_items = []
-        for item in normalized_items:
-            receipt_items.append(ReceiptItemData(
-                receipt_item_id=item.get("receipt_item_id", ""),
-                raw_product_name=item["raw_product_name"],
-                quantity=item["quantity"],
-                unit_price=item["unit_price"],
-                total_price=item["total_price"],
-                # Campi normalizzati da V2
-                canonical_name=item["canonical_name"],
-                brand=item.get("brand"),
-                category=item.get("category"),
-                subcategory=item.get("subcategory"),
-                size=item.get("size"),
-                unit_type=item.get("unit_type"),
-                confidence=item["confidence"],
-                confidence_level=item["confidence_level"],
-                source=item["source"],
-                pending_review=item["pending_review"],
-                user_verified=item["user_verified"]
-            ))
-        
-        return ProcessReceiptResponse(
-            success=True,
-            receipt_id=receipt_id,
-            message="Scontrino processato. Verifica i dati prima di confermare.",
-            store_name=parsing_result.get("store_name"),
-            receipt_date=parsing_result.get("receipt_date").isoformat() if parsing_result.get("receipt_date") else None,
-            total_amount=parsing_result.get("total_amount"),
-            items=receipt_items
-        )
-        
     except HTTPException:
         raise
     except Exception as e:
@@ -283,6 +519,72 @@ async def process_receipt(request: ProcessReceiptRequest):
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
+@router.post("/process/async", response_model=ProcessReceiptJobResponse, status_code=202)
+async def process_receipt_async(request: ProcessReceiptRequest):
+    """
+    Come /process ma asincrono: accoda il job e ritorna subito il job_id.
+    Lo stato e il risultato (stesso ProcessReceiptResponse) si leggono da GET /jobs/{job_id}
+    """
+    household = await blocking_executor.run(supabase_service.get_household, request.household_id)
+    if not household:
+        raise HTTPException(status_code=404, detail="Household not found")
+
+    try:
+        job = await receipt_job_service.submit(
+            handler=lambda: _run_receipt_pipeline(request),
+            metadata={"household_id": request.household_id}
+        )
+    except ReceiptJobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return ProcessReceiptJobResponse(
+        success=True,
+        job_id=job["job_id"],
+        status=job["status"],
+        message="Scontrino in elaborazione. Controlla lo stato del job."
+    )
+
+
+@router.post("/process/stream")
+async def process_receipt_stream(request: ProcessReceiptRequest, format: str = "ndjson"):
+    """
+    Come /process ma in streaming (NDJSON di default, SSE con ?format=sse).
+    Header subito dopo il parsing, poi un evento per prodotto appena normalizzato
+    (i cache hit arrivano per primi), infine l'evento "done" con la risposta completa
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    household = await blocking_executor.run(supabase_service.get_household, request.household_id)
+    if not household:
+        raise HTTPException(status_code=404, detail="Household not found")
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_receipt_pipeline(request, format),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=ReceiptJobStatusResponse)
+async def get_receipt_job(job_id: str):
+    """Stato job di processing (con risultato quando completato)"""
+    job = await receipt_job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return ReceiptJobStatusResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        error=job["error"],
+        result=job["result"]
+    )
+
+
 @router.post("/confirm", response_model=ConfirmReceiptResponse)
 async def confirm_receipt(request: ConfirmReceiptRequest):
     """
@@ -297,54 +599,54 @@ async def confirm_receipt(request: ConfirmReceiptRequest):
     """
     try:
         # Verifica receipt
-        receipt = supabase_service.get_receipt(request.receipt_id)
+        receipt = await blocking_executor.run(supabase_service.get_receipt, request.receipt_id)
         if not receipt:
             raise HTTPException(status_code=404, detail="Receipt not found")
         
         print(f"📋 Step 7-8: Conferma receipt {request.receipt_id}")
         print(f"   Prodotti modificati: {len(request.modified_products)}")
         
-        # Step 7: Categorizzazione prodotti modificati
-        for modified in request.modified_products:
-            print(f"🔄 Re-categorizing modified product: {modified.canonical_name}")
-            
-            # Chiamata LLM per categorizzazione
-            cat_result = categorization_service.categorize_product(
-                canonical_name=modified.canonical_name,
-                brand=modified.brand,
-                size=modified.size,
-                unit_type=modified.unit_type
-            )
-            
+        all_items = await blocking_executor.run(supabase_service.get_receipt_items, request.receipt_id)
+        items_by_id = {item["id"]: item for item in all_items}
+
+        # Mapping di tutti i prodotti dello scontrino in una query (step 7 e 8)
+        mapped_ids = await blocking_executor.run(
+            supabase_service.get_mapped_product_ids,
+            [item["raw_product_name"] for item in all_items]
+        )
+
+        # Step 7: Categorizzazione prodotti modificati (in parallelo, con cache)
+        print(f"🔄 Re-categorizing {len(request.modified_products)} modified products...")
+        cat_results = await categorization_service.categorize_products([
+            {
+                "canonical_name": modified.canonical_name,
+                "brand": modified.brand,
+                "size": modified.size,
+                "unit_type": modified.unit_type
+            }
+            for modified in request.modified_products
+        ])
+
+        for modified, cat_result in zip(request.modified_products, cat_results):
             if not cat_result["success"]:
                 print(f"⚠️ Categorization failed for {modified.canonical_name}")
                 continue
             
             # Ottieni raw_product_name dal receipt_item
-            item_data = supabase_service.client.table("receipt_items")\
-                .select("raw_product_name")\
-                .eq("id", modified.receipt_item_id)\
-                .single()\
-                .execute()
+            item_data = items_by_id.get(modified.receipt_item_id)
             
-            if not item_data.data:
+            if not item_data:
                 continue
             
-            raw_product_name = item_data.data["raw_product_name"]
+            raw_product_name = item_data["raw_product_name"]
             
             # Cerca il mapping per questo raw_name
-            mapping_data = supabase_service.client.table("product_mappings")\
-                .select("normalized_product_id")\
-                .eq("raw_name", raw_product_name)\
-                .limit(1)\
-                .execute()
+            normalized_product_id = mapped_ids.get(raw_product_name)
             
-            if not mapping_data.data:
+            if not normalized_product_id:
                 print(f"⚠️ No mapping found for raw_name: {raw_product_name}")
                 continue
             
-            normalized_product_id = mapping_data.data[0]["normalized_product_id"]
-            
             # Aggiorna normalized_product con nuovi dati + categoria - DISABILITATO
             # Il workflow attuale è read-only per normalized_products
             # supabase_service.client.table("normalized_products")\
@@ -364,26 +666,29 @@ async def confirm_receipt(request: ConfirmReceiptRequest):
         # Step 8: Crea purchase_history per TUTTI i prodotti
         print("💾 Step 8: Creating purchase history...")
         
-        all_items = supabase_service.get_receipt_items(request.receipt_id)
-        
+        # Mapping confermati dall'utente → scarta eventuali miss/hit in cache (I/O Redis fuori dal loop)
+        await blocking_executor.run(
+            product_normalizer_v2.cache_service.invalidate_many,
+            [
+                (item["raw_product_name"], receipt.get("store_name"))
+                for item in all_items
+                if mapped_ids.get(item["raw_product_name"])
+            ]
+        )
+
         for item in all_items:
             # Ottieni normalized_product_id
-            mapping_data = supabase_service.client.table("product_mappings")\
-                .select("normalized_product_id")\
-                .eq("raw_name", item["raw_product_name"])\
-                .limit(1)\
-                .execute()
+            normalized_product_id = mapped_ids.get(item["raw_product_name"])
             
-            if not mapping_data.data:
+            if not normalized_product_id:
                 continue
-            
-            normalized_product_id = mapping_data.data[0]["normalized_product_id"]
-            
+
             # Crea purchase_history
-            supabase_service.create_purchase_history(
+            await blocking_executor.run(
+                supabase_service.create_purchase_history,
                 household_id=receipt["household_id"],
                 receipt_id=request.receipt_id,
-                receipt_item_id=modified.receipt_item_id,
+                receipt_item_id=item["id"],
                 normalized_product_id=normalized_product_id,
                 quantity=item["quantity"],
                 unit_price=item.get("unit_price"),
@@ -392,10 +697,7 @@ async def confirm_receipt(request: ConfirmReceiptRequest):
             )
         
         # Aggiorna receipt status=completed
-        supabase_service.client.table("receipts")\
-            .update({"processing_status": "completed"})\
-            .eq("id", request.receipt_id)\
-            .execute()
+        await blocking_executor.run(supabase_service.update_receipt_status, request.receipt_id, "completed")
         
         print(f"✅ Receipt {request.receipt_id} completato!")
         
@@ -415,11 +717,11 @@ async def confirm_receipt(request: ConfirmReceiptRequest):
 @router.get("/{receipt_id}")
 async def get_receipt(receipt_id: str):
     """Ottieni dettagli scontrino"""
-    receipt = supabase_service.get_receipt(receipt_id)
+    receipt = await blocking_executor.run(supabase_service.get_receipt, receipt_id)
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
     
-    items = supabase_service.get_receipt_items(receipt_id)
+    items = await blocking_executor.run(supabase_service.get_receipt_items, receipt_id)
     receipt["items"] = items
     
     return receipt
@@ -428,13 +730,18 @@ async def get_receipt(receipt_id: str):
 @router.get("/household/{household_id}")
 async def get_household_receipts(household_id: str, limit: int = 50):
     """Ottieni tutti gli scontrini di un household"""
-    receipts = supabase_service.get_receipts_by_household(
+    receipts = await blocking_executor.run(
+        supabase_service.get_receipts_by_household,
         household_id=household_id,
         limit=limit
     )
     
-    for receipt in receipts:
-        items = supabase_service.get_receipt_items(receipt["id"])
+    # Items di tutti gli scontrini in parallelo (limitati dal pool)
+    all_items = await asyncio.gather(*[
+        blocking_executor.run(supabase_service.get_receipt_items, receipt["id"])
+        for receipt in receipts
+    ])
+    for receipt, items in zip(receipts, all_items):
         receipt["items"] = items
     
     return {"receipts": receipts, "total": len(receipts)}
@@ -443,13 +750,10 @@ async def get_household_receipts(household_id: str, limit: int = 50):
 @router.delete("/{receipt_id}")
 async def delete_receipt(receipt_id: str):
     """Elimina scontrino"""
-    receipt = supabase_service.get_receipt(receipt_id)
+    receipt = await blocking_executor.run(supabase_service.get_receipt, receipt_id)
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
     
-    supabase_service.client.table("receipts")\
-        .delete()\
-        .eq("id", receipt_id)\
-        .execute()
+    await blocking_executor.run(supabase_service.delete_receipt, receipt_id)
     
     return {"message": "Receipt deleted successfully"}
\ No newline at end of file
@@ -32,6 +32,31 @@ class Settings(BaseSettings):
     # OpenAI (Task 3)
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o-mini"
+
+    # OpenAI client condiviso - pool HTTP e rate limit (per processo: con più worker dividere la quota)
+    OPENAI_MAX_CONNECTIONS: int = 50
+    OPENAI_TIMEOUT_SECONDS: float = 60.0
+    OPENAI_MAX_RETRIES: int = 2  # Retry su timeout/connessione/429/5xx (backoff esponenziale, entro la deadline)
+    OPENAI_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    OPENAI_RETRY_MAX_DELAY_SECONDS: float = 4.0
+    OPENAI_HEDGE_AFTER_SECONDS: float = 0.0  # Seconda richiesta oltre questa latenza (0 = disabilitato)
+
+    # Circuit breaker OpenAI (aperto → normalizzatore in modalità degradata, senza LLM)
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Chiamate fallite consecutive (retry esauriti)
+    LLM_CIRCUIT_RECOVERY_SECONDS: float = 30.0  # Poi chiamate di prova (half-open)
+    LLM_CIRCUIT_HALF_OPEN_SUCCESSES: int = 2  # Successi in prova per richiudere
+    OPENAI_RATE_LIMIT_RPM: int = 500  # Richieste/minuto (0 = nessun limite)
+    OPENAI_RATE_LIMIT_TPM: int = 200000  # Token/minuto stimati (0 = nessun limite)
+    OPENAI_RATE_LIMIT_DEFAULT_OUTPUT_TOKENS: int = 500  # Stima output se max_tokens non impostato
+
+    # Timeout per tentativo, per stage LLM (limitati dalla deadline residua dello scontrino)
+    OPENAI_TIMEOUT_PARSER_SECONDS: float = 45.0
+    OPENAI_TIMEOUT_INTERPRET_SECONDS: float = 15.0
+    OPENAI_TIMEOUT_INTERPRET_BATCH_SECONDS: float = 60.0
+    OPENAI_TIMEOUT_SELECT_SECONDS: float = 15.0
+    OPENAI_TIMEOUT_VALIDATE_SECONDS: float = 15.0
+    OPENAI_TIMEOUT_CATEGORIZE_SECONDS: float = 15.0
+    OPENAI_STREAM_IDLE_TIMEOUT_SECONDS: float = 15.0  # Parser in streaming: max attesa tra due chunk
     
     # OpenAI Temperature Settings - Configurabili per ogni tipo di chiamata LLM
     OPENAI_TEMPERATURE_PARSER: float = 0.3      # Parsing scontrini (serve precisione)
@@ -52,6 +77,59 @@ class Settings(BaseSettings):
     CACHE_TIER2_PENALTY: float = 0.05
     CACHE_TIER2_MIN_CONFIDENCE: float = 0.85
 
+    # Cache L1 in-process (davanti a product_cache_stats / product_mappings)
+    CACHE_L1_ENABLED: bool = True
+    CACHE_L1_MAX_SIZE: int = 5000  # Entry (raw_name, store_name)
+    CACHE_L1_TTL_SECONDS: int = 600
+
+    # Negative cache (miss su entrambi i tier → salta direttamente a LLM interpret)
+    CACHE_NEGATIVE_ENABLED: bool = True
+    CACHE_NEGATIVE_MAX_SIZE: int = 10000
+    CACHE_NEGATIVE_TTL_SECONDS: int = 120
+
+    # Backend cache condivisa: "memory" (per processo) o "redis" (condivisa tra worker)
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+    CACHE_KEY_PREFIX: str = "scontrini"
+    CACHE_COMPRESS_MIN_BYTES: int = 512  # Valori più grandi compressi con zlib
+
+    # Warm-up cache L1 all'avvio (in background, top-N mapping verificati per negozio)
+    CACHE_WARMUP_ENABLED: bool = False
+    CACHE_WARMUP_TOP_N_PER_STORE: int = 200
+    CACHE_WARMUP_MAX_STORES: int = 50
+    CACHE_WARMUP_TTL_SECONDS: int = 3600  # Più lungo del TTL L1: dati stabili, invalidati su conferma
+
+    # Write-back mapping sql_search ad alta confidence in product_mappings (Tier 2)
+    MAPPING_WRITEBACK_ENABLED: bool = True
+    MAPPING_WRITEBACK_BATCH_SIZE: int = 50
+    MAPPING_WRITEBACK_FLUSH_INTERVAL_SECONDS: float = 5.0
+    MAPPING_WRITEBACK_QUEUE_SIZE: int = 1000
+
+    # LLM Response Cache (SQLite locale, chiave = hash model/temperature/prompt)
+    LLM_CACHE_ENABLED: bool = True  # false per run di valutazione
+    LLM_CACHE_PATH: str = ".cache/llm_responses.sqlite3"
+    LLM_CACHE_MAX_MB: int = 200  # Oltre → eviction delle risposte usate meno di recente
+
+    # LLM Interpret batch (tutti i cache miss di uno scontrino in una chiamata)
+    LLM_INTERPRET_BATCH_ENABLED: bool = True
+    LLM_INTERPRET_BATCH_MAX_TOKENS: int = 6000  # Budget per chiamata (prompt + output stimati)
+    LLM_INTERPRET_BATCH_OUTPUT_TOKENS_PER_ITEM: int = 180
+
+    # Interpretazione rule-based (abbreviazioni note): LLM Interpret solo sotto soglia di coverage
+    RULE_INTERPRET_ENABLED: bool = True
+    RULE_INTERPRET_MIN_COVERAGE: float = 0.85  # Frazione token riconosciuti (tipo prodotto obbligatorio)
+    RULE_INTERPRET_LEXICON_PATH: str = "data/abbreviation_lexicon.json"  # scripts/mine_abbreviation_lexicon.py
+    RULE_INTERPRET_LEXICON_MIN_SUPPORT: int = 3  # Occorrenze minime di un'abbreviazione estratta
+
+    # LLM Select + Validate in una sola chiamata (sql_search: 2 round trip LLM invece di 3)
+    LLM_FUSED_SELECT_VALIDATE_ENABLED: bool = False
+
+    # Categorization (conferma scontrino: prodotti modificati categorizzati in parallelo)
+    CATEGORIZATION_CONCURRENCY: int = 8  # Chiamate LLM di categorizzazione in corso (per worker)
+    CATEGORIZATION_CACHE_MAX_SIZE: int = 5000  # Entry (canonical_name, brand, size, unit_type)
+    CATEGORIZATION_CACHE_TTL_SECONDS: int = 86400
+
     # Validation Service
     VALIDATION_HIGH_CONFIDENCE_THRESHOLD: float = 0.90
     VALIDATION_LOW_CONFIDENCE_THRESHOLD: float = 0.70
@@ -68,6 +146,13 @@ class Settings(BaseSettings):
     RERANKER_TAG_OVERLAP_BOOST: float = 0.05
     RERANKER_SIZE_PROXIMITY_BOOST: float = 0.10
 
+    # Fast path: primo candidato dominante accettato senza LLM Select/Validate
+    # (scelta non validata: mai salvata in product_mappings)
+    RERANKER_FAST_PATH_ENABLED: bool = False
+    RERANKER_FAST_PATH_MIN_SCORE: float = 0.85  # business_score minimo del primo candidato
+    RERANKER_FAST_PATH_MIN_MARGIN: float = 0.15  # Distacco minimo dal secondo
+    RERANKER_FAST_PATH_MAX_CONFIDENCE: float = 0.95  # Tetto confidence assegnata da regole
+
     # Context Service
     CONTEXT_RECENT_PURCHASES_DAYS: int = 90  # Giorni per considerare acquisti recenti
     CONTEXT_MIN_FREQUENCY_THRESHOLD: int = 3  # Min acquisti per considerare frequente
@@ -75,6 +160,26 @@ class Settings(BaseSettings):
 
     # Product Normalizer V2 - Parallelizzazione
     PARALLEL_NORMALIZATION_BATCH_SIZE: int = 10  # Numero prodotti processati simultaneamente
+    NORMALIZATION_GLOBAL_CONCURRENCY: int = 40  # Max normalizzazioni in corso tra tutte le richieste
+    NORMALIZER_DEGRADED_CONFIDENCE: float = 0.3  # Confidence del candidato accettato in modalità degradata
+
+    # Receipt Jobs - Processing asincrono
+    # Più worker uvicorn: richiede CACHE_BACKEND=redis (stato job condiviso per il polling)
+    RECEIPT_JOB_WORKERS: int = 4  # Worker che eseguono la pipeline in background
+    RECEIPT_JOB_QUEUE_SIZE: int = 100  # Max job in attesa (oltre → 503)
+    RECEIPT_JOB_TTL_SECONDS: int = 3600  # Permanenza job terminati per polling
+    RECEIPT_DEADLINE_SECONDS: float = 90.0  # Deadline pipeline per scontrino: oltre, nessuna nuova chiamata LLM (0 = nessuna)
+    RECEIPT_STREAMING_PARSER_ENABLED: bool = False  # Normalizza ogni prodotto appena il parser in streaming lo completa
+
+    # Blocking Executor - Thread pool per chiamate sincrone (Supabase, Vision)
+    BLOCKING_EXECUTOR_WORKERS: int = 32
+
+    # HTTP Fetch - Download immagini scontrini
+    HTTP_FETCH_TIMEOUT_SECONDS: float = 30.0  # Timeout complessivo download
+    HTTP_FETCH_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_FETCH_MAX_CONNECTIONS: int = 50  # Pool condiviso
+    HTTP_FETCH_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP_FETCH_MAX_IMAGE_BYTES: int = 15 * 1024 * 1024  # 15 MB
 
     # Web Search (Optional - Task 5)
     SERPER_API_KEY: str = ""
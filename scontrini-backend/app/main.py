@@ -5,6 +5,15 @@ FastAPI application entry point
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.services.receipt_job_service import receipt_job_service
+from app.services.http_fetch_service import http_fetch_service
+from app.services.openai_client_service import openai_client_service
+from app.services.blocking_executor import blocking_executor
+from app.agents.product_normalizer import product_normalizer_v2
+from app.services.cache_backend import cache_backend
+from app.services.cache_warmup_service import cache_warmup_service
+from app.services.mapping_writeback_service import mapping_writeback_service
+from app.services.llm_response_cache import llm_response_cache
 
 # Inizializza FastAPI app
 app = FastAPI(
@@ -38,9 +47,20 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    # Circuit breaker OpenAI aperto: API funzionante, normalizzazione senza LLM
+    degraded = openai_client_service.breaker.is_open()
     return {
-        "status": "healthy",
-        "environment": settings.ENVIRONMENT
+        "status": "degraded" if degraded else "healthy",
+        "environment": settings.ENVIRONMENT,
+        "receipt_jobs": receipt_job_service.get_stats(),
+        "blocking_executor": blocking_executor.get_stats(),
+        "normalizer": product_normalizer_v2.get_stats(),
+        "cache": await blocking_executor.run(cache_backend.get_stats),
+        "cache_warmup": cache_warmup_service.get_stats(),
+        "mapping_writeback": mapping_writeback_service.get_stats(),
+        "llm_cache": llm_response_cache.get_stats(),
+        "openai_rate_limit": openai_client_service.get_stats(),
+        "llm_circuit_breaker": openai_client_service.breaker.get_stats()
     }
 
 # Startup event
@@ -51,10 +71,26 @@ async def startup_event():
     print(f"📝 Environment: {settings.ENVIRONMENT}")
     print(f"📚 Docs: http://localhost:{settings.API_PORT}/docs")
 
+    # Worker pool per processing asincrono scontrini
+    await receipt_job_service.start()
+
+    # Write-back mapping ad alta confidence
+    await mapping_writeback_service.start()
+
+    # Warm-up cache in background (non blocca l'avvio)
+    cache_warmup_service.start()
+
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Eseguito alla chiusura del server"""
+    await cache_warmup_service.stop()
+    await receipt_job_service.stop()
+    await mapping_writeback_service.stop()
+    await http_fetch_service.close()
+    await openai_client_service.close()
+    blocking_executor.shutdown()
+    llm_response_cache.close()
     print(f"👋 {settings.PROJECT_NAME} API shutdown")
 
 # Include routers API
@@ -2,10 +2,13 @@
 AI Parser Service - Usa OpenAI per parsing intelligente scontrini
 Molto più robusto e accurato delle regex
 """
+import asyncio
 import json
-from typing import Dict, List, Optional
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from app.config import settings
+from app.services.openai_client_service import openai_client_service
+from app.utils import deadline
+from app.utils.json_stream import JSONArrayStreamDecoder
 from datetime import datetime, date, time
 
 
@@ -13,13 +16,14 @@ class AIReceiptParser:
     """Parser intelligente con OpenAI GPT-4o-mini"""
     
     def __init__(self):
-        """Inizializza client OpenAI"""
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        """Inizializza client OpenAI condiviso (rate limited)"""
+        self.client = openai_client_service.get_client("parser")
         self.model = settings.OPENAI_MODEL
         # Temperatura specifica per parsing (da .env: OPENAI_TEMPERATURE_PARSER)
         self.temperature = settings.OPENAI_TEMPERATURE_PARSER
+        self.stream_idle_timeout = settings.OPENAI_STREAM_IDLE_TIMEOUT_SECONDS
     
-    def parse_receipt(self, ocr_text: str) -> Dict:
+    async def parse_receipt(self, ocr_text: str) -> Dict:
         """
         Analizza testo OCR usando OpenAI
         
@@ -35,7 +39,7 @@ class AIReceiptParser:
             user_prompt = self._create_user_prompt(ocr_text)
             
             # Chiama OpenAI con structured output
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -63,6 +67,78 @@ class AIReceiptParser:
                 "raw_text": ocr_text
             }
     
+    async def parse_receipt_stream(self, ocr_text: str) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Come parse_receipt ma in streaming: i prodotti escono appena il loro
+        oggetto JSON è completo, mentre il modello genera ancora il resto
+
+        Args:
+            ocr_text: Testo estratto dall'OCR
+
+        Yields:
+            ("header", campi top-level già noti all'apertura di "items", es. store_name)
+            ("item", item validato come in _validate_item)
+            ("result", stesso Dict di parse_receipt) - sempre ultimo, anche in caso di errore
+        """
+        stream = None
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self._create_system_prompt()},
+                    {"role": "user", "content": self._create_user_prompt(ocr_text)}
+                ],
+                temperature=self.temperature,
+                response_format={"type": "json_object"},
+                stream=True
+            )
+
+            decoder = JSONArrayStreamDecoder("items")
+            chunks = []
+            header_sent = False
+
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=self._idle_timeout())
+                except StopAsyncIteration:
+                    break
+
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                chunks.append(delta)
+
+                items = decoder.feed(delta)
+                if decoder.array_started and not header_sent:
+                    header_sent = True
+                    yield "header", dict(decoder.fields)
+                for item in items:
+                    if self._validate_item(item):
+                        yield "item", item
+
+            parsed_data = json.loads("".join(chunks))
+            result = self._post_process(parsed_data)
+            result["success"] = True
+            result["raw_text"] = ocr_text
+            yield "result", result
+
+        except Exception as e:
+            yield "result", {
+                "success": False,
+                "error": f"AI Parsing error: {str(e) or type(e).__name__}",
+                "raw_text": ocr_text
+            }
+        finally:
+            if stream is not None:
+                await stream.close()
+
+    def _idle_timeout(self) -> float:
+        """Attesa massima tra due chunk (limitata dalla deadline dello scontrino)"""
+        left = deadline.remaining()
+        if left is None:
+            return self.stream_idle_timeout
+        return max(0.0, min(self.stream_idle_timeout, left))
+
     def _create_system_prompt(self) -> str:
         """Crea system prompt per OpenAI"""
         return """Sei un esperto nell'analizzare scontrini di supermercati italiani.
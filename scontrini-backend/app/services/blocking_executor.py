@@ -0,0 +1,98 @@
+"""
+Blocking Executor - Thread pool dedicato per chiamate sincrone
+Supabase (postgrest sync), Google Vision e altri SDK sincroni vengono eseguiti
+fuori dall'event loop, con un limite di concorrenza e metriche di utilizzo
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+from app.config import settings
+
+
+class BlockingExecutor:
+    """Esegue funzioni sincrone su un thread pool limitato, tracciando le metriche"""
+
+    def __init__(self):
+        """Inizializza thread pool da settings"""
+        self.max_workers = settings.BLOCKING_EXECUTOR_WORKERS
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="blocking-io"
+        )
+
+        # Metriche (aggiornate solo dal thread dell'event loop)
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._total_queue_wait = 0.0
+        self._max_queue_wait = 0.0
+        self._total_run_time = 0.0
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Esegue func(*args, **kwargs) sul thread pool senza bloccare l'event loop
+
+        Returns:
+            Valore ritornato da func (le eccezioni vengono propagate)
+        """
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+        call = functools.partial(self._timed_call, submitted_at, func, args, kwargs)
+
+        self._submitted += 1
+        self._in_flight += 1
+        self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+        try:
+            queue_wait, run_time, result = await loop.run_in_executor(self._executor, call)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+        self._completed += 1
+        self._total_queue_wait += queue_wait
+        self._max_queue_wait = max(self._max_queue_wait, queue_wait)
+        self._total_run_time += run_time
+
+        return result
+
+    @staticmethod
+    def _timed_call(
+        submitted_at: float,
+        func: Callable[..., Any],
+        args: Tuple,
+        kwargs: Dict
+    ) -> Tuple[float, float, Any]:
+        """Wrapper eseguito nel thread: misura attesa in coda e durata"""
+        started_at = time.perf_counter()
+        result = func(*args, **kwargs)
+        return started_at - submitted_at, time.perf_counter() - started_at, result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Metriche per health check"""
+        completed = self._completed or 1
+        return {
+            "max_workers": self.max_workers,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "in_flight": self._in_flight,
+            "max_in_flight": self._max_in_flight,
+            "avg_queue_wait_ms": round(self._total_queue_wait / completed * 1000, 2),
+            "max_queue_wait_ms": round(self._max_queue_wait * 1000, 2),
+            "avg_run_ms": round(self._total_run_time / completed * 1000, 2)
+        }
+
+    def shutdown(self):
+        """Chiude il thread pool (da chiamare nello shutdown event FastAPI)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Istanza globale
+blocking_executor = BlockingExecutor()
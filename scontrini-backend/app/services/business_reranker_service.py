@@ -16,6 +16,9 @@ class BusinessRerankerService:
         'pezzi': ['pz', 'unit', 'pezzi']
     }
 
+    # Fattori di conversione all'unità base della famiglia (ml, g)
+    UNIT_TO_BASE = {'l': 1000.0, 'cl': 10.0, 'ml': 1.0, 'kg': 1000.0, 'g': 1.0}
+
     def rerank_candidates(
         self,
         candidates: List[Dict[str, Any]],
@@ -128,6 +131,100 @@ class BusinessRerankerService:
 
         return top_10
 
+    def evaluate_fast_path(
+        self,
+        reranked: List[Dict[str, Any]],
+        hypothesis_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Decide se accettare il primo candidato senza LLM Select/Validate
+
+        Condizioni (tutte):
+        - business_score del primo >= RERANKER_FAST_PATH_MIN_SCORE
+        - margine sul secondo >= RERANKER_FAST_PATH_MIN_MARGIN (0 se unico candidato)
+        - brand, size e unità dell'ipotesi presenti e coincidenti col candidato
+          (size confrontata in unità base, tolleranza 5%)
+
+        Args:
+            reranked: Output di rerank_candidates (ordinato per business_score)
+            hypothesis_context: Dati estratti da LLM Interpret
+
+        Returns:
+            {
+                "accepted": bool,
+                "reason": str,
+                "top_score": float,
+                "margin": float,
+                "confidence_score": float  # Solo se accepted
+            }
+        """
+        top_score = reranked[0].get('business_score', 0.0)
+        runner_up = reranked[1].get('business_score', 0.0) if len(reranked) > 1 else 0.0
+        decision = {
+            "accepted": False,
+            "reason": "",
+            "top_score": top_score,
+            "margin": top_score - runner_up
+        }
+
+        if top_score < settings.RERANKER_FAST_PATH_MIN_SCORE:
+            decision["reason"] = "low_score"
+        elif decision["margin"] < settings.RERANKER_FAST_PATH_MIN_MARGIN:
+            decision["reason"] = "low_margin"
+        elif not self._brands_match(hypothesis_context.get('brand'), reranked[0].get('brand')):
+            decision["reason"] = "brand_disagreement"
+        elif not self._sizes_match(
+            hypothesis_context.get('size'), hypothesis_context.get('unit_type'),
+            reranked[0].get('size'), reranked[0].get('unit_type')
+        ):
+            decision["reason"] = "size_disagreement"
+        else:
+            decision["accepted"] = True
+            decision["reason"] = "dominant_candidate"
+            # Confidence da regole: score del candidato, con tetto sotto la certezza
+            decision["confidence_score"] = round(
+                min(top_score, settings.RERANKER_FAST_PATH_MAX_CONFIDENCE), 3
+            )
+
+        return decision
+
+    def _brands_match(self, brand1: Optional[str], brand2: Optional[str]) -> bool:
+        """Brand presenti entrambi e uguali (case-insensitive)"""
+        if not brand1 or not brand2:
+            return False
+        return brand1.lower().strip() == brand2.lower().strip()
+
+    def _sizes_match(
+        self,
+        size1: Any,
+        unit1: Optional[str],
+        size2: Any,
+        unit2: Optional[str]
+    ) -> bool:
+        """Size + unità presenti entrambe e uguali in unità base (±5%)"""
+        if not unit1 or not unit2:
+            return False
+
+        factor1 = self.UNIT_TO_BASE.get(unit1.lower().strip())
+        factor2 = self.UNIT_TO_BASE.get(unit2.lower().strip())
+        if factor1 is None or factor2 is None:
+            # Unità senza conversione (es. pezzi): deve coincidere
+            if unit1.lower().strip() != unit2.lower().strip():
+                return False
+            factor1 = factor2 = 1.0
+        elif self._get_unit_family(unit1) != self._get_unit_family(unit2):
+            return False
+
+        try:
+            quantity1 = float(size1) * factor1
+            quantity2 = float(size2) * factor2
+        except (TypeError, ValueError):
+            return False
+
+        if quantity1 <= 0:
+            return False
+        return abs(quantity1 - quantity2) / quantity1 < 0.05
+
     def _are_units_compatible(
         self,
         unit1: Optional[str],
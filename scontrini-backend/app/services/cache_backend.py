@@ -0,0 +1,215 @@
+"""
+Cache Backend - Cache condivisa tra worker uvicorn
+Un'unica interfaccia a namespace con due implementazioni:
+- memory: TTLCache in-process (default, nessuna dipendenza)
+- redis: qualsiasi server Redis-protocol, condiviso da tutti i processi
+Serializzazione compatta: JSON senza spazi, compresso con zlib oltre una soglia
+"""
+import json
+import zlib
+from typing import Any, Dict, Hashable, Optional
+from app.config import settings
+from app.utils.ttl_cache import TTLCache
+
+
+# Prefisso primo byte del payload serializzato
+_RAW = b"j"
+_COMPRESSED = b"z"
+
+
+def encode_value(value: Any, compress_min_bytes: int) -> bytes:
+    """Serializza valore JSON-compatibile (zlib se più grande di compress_min_bytes)"""
+    payload = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    if len(payload) >= compress_min_bytes:
+        return _COMPRESSED + zlib.compress(payload)
+    return _RAW + payload
+
+
+def decode_value(data: bytes) -> Any:
+    """Inverso di encode_value()"""
+    if data[:1] == _COMPRESSED:
+        return json.loads(zlib.decompress(data[1:]))
+    return json.loads(data[1:])
+
+
+def encode_key(key: Hashable) -> str:
+    """Chiave stabile e compatta (tuple → array JSON)"""
+    if isinstance(key, tuple):
+        key = list(key)
+    return json.dumps(key, separators=(",", ":"), ensure_ascii=False)
+
+
+class RedisCacheNamespace:
+    """
+    Namespace su Redis con la stessa API di TTLCache (get/set/delete/clear/get_stats)
+
+    Client sincrono: get/set/delete/clear vanno chiamati fuori dall'event loop
+    (blocking_executor.run)
+    """
+
+    def __init__(self, client, prefix: str, ttl_seconds: float, compress_min_bytes: int):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.compress_min_bytes = compress_min_bytes
+
+        # Contatori locali al processo (Redis non traccia hit per namespace)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}:{encode_key(key)}"
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Ritorna valore se presente, None su miss, errore Redis o payload non decodificabile"""
+        try:
+            data = self.client.get(self._key(key))
+        except Exception as e:
+            self.errors += 1
+            print(f"   [CACHE] Redis get error: {str(e)}")
+            return None
+
+        if data is None:
+            self.misses += 1
+            return None
+
+        try:
+            value = decode_value(data)
+        except (ValueError, zlib.error) as e:
+            # Payload corrotto o di un formato precedente: trattato come miss
+            self.errors += 1
+            self.misses += 1
+            print(f"   [CACHE] Redis decode error: {str(e)}")
+            return None
+
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Scrive con scadenza (errori Redis ignorati: la cache è best effort)"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            self.client.set(
+                self._key(key),
+                encode_value(value, self.compress_min_bytes),
+                px=max(int(ttl * 1000), 1)
+            )
+        except Exception as e:
+            self.errors += 1
+            print(f"   [CACHE] Redis set error: {str(e)}")
+
+    def delete(self, key: Hashable) -> bool:
+        try:
+            return bool(self.client.delete(self._key(key)))
+        except Exception as e:
+            self.errors += 1
+            print(f"   [CACHE] Redis delete error: {str(e)}")
+            return False
+
+    def clear(self):
+        """Rimuove tutte le chiavi del namespace (SCAN, non blocca il server)"""
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.prefix}:*", count=500))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            self.errors += 1
+            print(f"   [CACHE] Redis clear error: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "errors": self.errors
+        }
+
+
+class CacheBackend:
+    """Factory di namespace cache: memory (per processo) o redis (condiviso)"""
+
+    def __init__(self):
+        """Inizializza backend da settings (fallback su memory se Redis non disponibile)"""
+        self.key_prefix = settings.CACHE_KEY_PREFIX
+        self.compress_min_bytes = settings.CACHE_COMPRESS_MIN_BYTES
+        self.backend = "memory"
+        self._redis = None
+        self._namespaces: Dict[str, Any] = {}
+
+        if settings.CACHE_BACKEND == "redis":
+            self._redis = self._connect_redis(settings.REDIS_URL)
+            if self._redis is not None:
+                self.backend = "redis"
+
+    @staticmethod
+    def _connect_redis(url: str):
+        """Client Redis sincrono (usato dai thread del blocking executor), None se non raggiungibile"""
+        try:
+            import redis
+        except ImportError:
+            print("⚠️ CACHE_BACKEND=redis ma il pacchetto 'redis' non è installato: uso cache in-memory")
+            return None
+
+        try:
+            client = redis.Redis.from_url(
+                url,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                health_check_interval=30
+            )
+            client.ping()
+            print(f"✅ Cache condivisa Redis connessa")
+            return client
+        except Exception as e:
+            print(f"⚠️ Redis non raggiungibile ({str(e)}): uso cache in-memory")
+            return None
+
+    def namespace(self, name: str, max_size: int, ttl_seconds: float):
+        """
+        Ritorna (creandolo alla prima chiamata) il namespace cache `name`
+
+        Args:
+            name: Nome logico (es. "cache_l1"), condiviso da tutte le istanze che lo richiedono
+            max_size: Limite entry (solo memory; su Redis vale maxmemory-policy del server)
+            ttl_seconds: TTL di default delle entry
+
+        Returns:
+            Oggetto con get/set/delete/clear/get_stats
+        """
+        ns = self._namespaces.get(name)
+        if ns is None:
+            if self._redis is not None:
+                ns = RedisCacheNamespace(
+                    self._redis,
+                    prefix=f"{self.key_prefix}:{name}",
+                    ttl_seconds=ttl_seconds,
+                    compress_min_bytes=self.compress_min_bytes
+                )
+            else:
+                ns = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+            self._namespaces[name] = ns
+        return ns
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Backend attivo, statistiche per namespace e memoria usata (Redis)
+
+        Con Redis esegue I/O sincrono: da async usare blocking_executor.run()
+        """
+        stats: Dict[str, Any] = {
+            "backend": self.backend,
+            "namespaces": {name: ns.get_stats() for name, ns in self._namespaces.items()}
+        }
+        if self._redis is not None:
+            try:
+                stats["used_memory_bytes"] = self._redis.info("memory").get("used_memory")
+            except Exception:
+                stats["used_memory_bytes"] = None
+        return stats
+
+
+# Istanza globale
+cache_backend = CacheBackend()
@@ -2,8 +2,10 @@
 Cache Service - Smart Cache 2-Tier con Confidence Boost
 Interroga product_cache_stats via RPC e calcola confidence score
 """
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from app.services.supabase_service import supabase_service
+from app.services.cache_backend import cache_backend
+from app.utils.lookup_key import build_lookup_key
 
 
 class CacheService:
@@ -34,6 +36,28 @@ class CacheService:
         self.TIER2_PENALTY = settings.CACHE_TIER2_PENALTY
         self.TIER2_MIN_CONFIDENCE = settings.CACHE_TIER2_MIN_CONFIDENCE
 
+        # L1: cache davanti al database, chiave (lookup_key, store_name)
+        # Valore: tier + product_id + usage stats + dati prodotto (price coherence ricalcolata)
+        # Namespace condivisi (cache_backend): stessa cache per tutte le istanze e,
+        # con CACHE_BACKEND=redis, per tutti i worker
+        self.l1_cache = None
+        if settings.CACHE_L1_ENABLED:
+            self.l1_cache = cache_backend.namespace(
+                "cache_l1",
+                max_size=settings.CACHE_L1_MAX_SIZE,
+                ttl_seconds=settings.CACHE_L1_TTL_SECONDS
+            )
+
+        # Negative cache: miss confermati su entrambi i tier (TTL breve)
+        # Invalidata da invalidate() quando un mapping viene scritto o verificato
+        self.negative_cache = None
+        if settings.CACHE_NEGATIVE_ENABLED:
+            self.negative_cache = cache_backend.namespace(
+                "cache_negative",
+                max_size=settings.CACHE_NEGATIVE_MAX_SIZE,
+                ttl_seconds=settings.CACHE_NEGATIVE_TTL_SECONDS
+            )
+
     def get_cached_product(
         self,
         raw_name: str,
@@ -51,74 +75,325 @@ class CacheService:
         Returns:
             Dict con cache hit oppure None se miss
         """
+        # L1: cache in-process
+        l1_hit = self._get_l1(raw_name, store_name, current_price)
+        if l1_hit:
+            return l1_hit
+
+        # Negative cache: miss recente → direttamente al path LLM
+        if self._is_known_miss(raw_name, store_name):
+            print(f"   [CACHE] ❌ MISS (negative cache)")
+            return None
+
         # TIER 1: Query product_cache_stats (verified by user)
-        print(f"   [CACHE] Tier 1 lookup: '{raw_name}' @ {store_name}")
-        cache_result = self._query_cache_tier1(raw_name, store_name, current_price)
+        # Match su raw_name esatto oppure lookup_key (varianti formattazione/OCR)
+        lookup_key = build_lookup_key(raw_name)
+        print(f"   [CACHE] Tier 1 lookup: '{raw_name}' ({lookup_key}) @ {store_name}")
+        cache_result = self._query_cache_tier1(raw_name, lookup_key, store_name, current_price)
 
         if cache_result:
-            # Calculate confidence boost
-            confidence = self._calculate_confidence_boost(cache_result)
-
-            # Check price coherence
-            if not cache_result.get('price_coherent', True):
-                # Price anomalo: downgrade confidence
-                confidence = max(0.70, confidence - 0.20)
-
             # Fetch product data
             product_data = self._fetch_product_data(cache_result['product_id'])
-
-            result = {
-                'product_id': cache_result['product_id'],
-                'confidence': confidence,
-                'price_coherent': cache_result.get('price_coherent', True),
-                'usage_count': cache_result.get('usage_count', 0),
-                'verified_by_households': cache_result.get('verified_by_households', 0),
-                'tier': 'cache_tier1',
-                'from_cache': True
-            }
-
-            # Merge product data
-            if product_data:
-                result.update(product_data)
-
-            print(f"   [CACHE] ✅ Tier 1 HIT: '{result.get('canonical_name')}' (conf: {confidence:.2f}, usage: {cache_result.get('usage_count', 0)})")
-            return result
+            self._set_l1(raw_name, store_name, 'cache_tier1', cache_result, product_data)
+            return self._build_tier1_hit(cache_result, product_data)
 
         # TIER 2: Fallback su auto-verified mappings (non ancora in cache stats)
         print(f"   [CACHE] Tier 1 MISS, trying Tier 2...")
-        tier2_result = self._query_cache_tier2(raw_name, store_name)
+        tier2_result = self._query_cache_tier2(raw_name, lookup_key, store_name)
 
         if tier2_result:
-            # Tier 2 ha penalty
-            confidence = max(0.70, self.CACHE_BASE_CONFIDENCE - self.TIER2_PENALTY)
-
             # Fetch product data
             product_data = self._fetch_product_data(tier2_result['normalized_product_id'])
-
-            result = {
-                'product_id': tier2_result['normalized_product_id'],
-                'confidence': confidence,
-                'price_coherent': True,  # No price history per Tier 2
-                'usage_count': 0,
-                'verified_by_households': 0,
-                'tier': 'cache_tier2',
-                'from_cache': True
-            }
-
-            # Merge product data
-            if product_data:
-                result.update(product_data)
-
-            print(f"   [CACHE] ✅ Tier 2 HIT: '{result.get('canonical_name')}' (conf: {confidence:.2f})")
-            return result
+            self._set_l1(
+                raw_name, store_name, 'cache_tier2',
+                {'product_id': tier2_result['normalized_product_id']}, product_data
+            )
+            return self._build_tier2_hit(tier2_result['normalized_product_id'], product_data)
 
         # Cache miss
         print(f"   [CACHE] ❌ MISS (both tiers)")
+        self._set_miss(raw_name, store_name)
         return None
 
+    def get_cached_products_batch(
+        self,
+        items: List[Dict]
+    ) -> Optional[List[Optional[Dict]]]:
+        """
+        Lookup cache per tutte le righe di uno scontrino in una sola RPC
+        (Tier 1 + Tier 2 + dati prodotto via get_cached_products_batch)
+
+        Args:
+            items: Lista dict con raw_name, store_name, price
+
+        Returns:
+            Lista allineata a items (hit dict come get_cached_product oppure None),
+            None se la RPC fallisce (il chiamante deve ripiegare sul lookup singolo)
+        """
+        if not items:
+            return []
+
+        results: List[Optional[Dict]] = [None] * len(items)
+
+        # L1: solo i miss vanno al database
+        payload = []
+        for idx, item in enumerate(items):
+            l1_hit = self._get_l1(item['raw_name'], item.get('store_name'), item.get('price'))
+            if l1_hit:
+                results[idx] = l1_hit
+                continue
+
+            if self._is_known_miss(item['raw_name'], item.get('store_name')):
+                continue
+
+            payload.append({
+                'idx': idx,
+                'raw_name': item['raw_name'],
+                'lookup_key': build_lookup_key(item['raw_name']),
+                'store_name': item.get('store_name'),
+                'price': item.get('price')
+            })
+
+        if not payload:
+            hits = sum(1 for r in results if r)
+            print(f"   [CACHE] Batch lookup: {hits}/{len(items)} hits (no DB lookup needed)")
+            return results
+
+        try:
+            response = supabase_service.client.rpc(
+                'get_cached_products_batch',
+                {
+                    'p_items': payload,
+                    'p_tier2_min_confidence': self.TIER2_MIN_CONFIDENCE,
+                    'p_price_tolerance': self.PRICE_TOLERANCE
+                }
+            ).execute()
+        except Exception as e:
+            print(f"Error querying batch cache: {str(e)}")
+            return None
+
+        for row in response.data or []:
+            item = items[row['idx']]
+            if row['tier'] == 'cache_tier1':
+                cache_result = {'product_id': row['product_id'], **(row.get('stats') or {})}
+                results[row['idx']] = self._build_tier1_hit(cache_result, row.get('product'))
+            else:
+                cache_result = {'product_id': row['product_id']}
+                results[row['idx']] = self._build_tier2_hit(row['product_id'], row.get('product'))
+
+            self._set_l1(
+                item['raw_name'], item.get('store_name'), row['tier'],
+                cache_result, row.get('product')
+            )
+
+        # Righe interrogate senza hit → negative cache
+        for entry in payload:
+            if results[entry['idx']] is None:
+                self._set_miss(entry['raw_name'], entry['store_name'])
+
+        hits = sum(1 for r in results if r)
+        print(f"   [CACHE] Batch lookup: {hits}/{len(items)} hits")
+        return results
+
+    def get_warmup_stores(self, max_stores: int) -> List[Optional[str]]:
+        """Negozi con più utilizzo in product_cache_stats (None = mapping senza negozio)"""
+        response = supabase_service.client.rpc(
+            'get_cache_warmup_stores',
+            {'p_max_stores': max_stores}
+        ).execute()
+        return response.data or []
+
+    def warm_up_store(
+        self,
+        store_name: Optional[str],
+        limit: int,
+        ttl_seconds: Optional[float] = None
+    ) -> int:
+        """
+        Precarica in L1 i top-N mapping verificati di un negozio
+
+        Returns:
+            Numero di entry caricate
+        """
+        if self.l1_cache is None:
+            return 0
+
+        response = supabase_service.client.rpc(
+            'get_cache_warmup_entries',
+            {'p_store_name': store_name, 'p_limit': limit}
+        ).execute()
+
+        rows = response.data or []
+        for row in rows:
+            self._set_l1(
+                row['raw_name'], row['store_name'], row['tier'],
+                {'product_id': row['product_id'], **(row.get('stats') or {})},
+                row.get('product'),
+                ttl_seconds=ttl_seconds
+            )
+        return len(rows)
+
+    def invalidate(self, raw_name: str, store_name: Optional[str] = None):
+        """
+        Invalida L1 e negative cache per un raw_name
+        (da chiamare quando un mapping viene scritto o verificato)
+
+        Args:
+            raw_name: Nome grezzo del mapping
+            store_name: Negozio del mapping; None invalida la chiave senza negozio
+        """
+        for cache in (self.l1_cache, self.negative_cache):
+            if cache is not None:
+                cache.delete(self._cache_key(raw_name, store_name))
+
+        # Tier 2 con store_name None matcha mapping di qualsiasi negozio
+        if store_name is not None:
+            for cache in (self.l1_cache, self.negative_cache):
+                if cache is not None:
+                    cache.delete(self._cache_key(raw_name, None))
+
+    def invalidate_many(self, mappings: List[Tuple[str, Optional[str]]]):
+        """
+        invalidate() per più mapping (raw_name, store_name) in una sola
+        chiamata: con backend Redis da async usare blocking_executor.run()
+        """
+        for raw_name, store_name in mappings:
+            self.invalidate(raw_name, store_name)
+
+    @staticmethod
+    def _cache_key(raw_name: str, store_name: Optional[str]) -> tuple:
+        """Chiave L1/negative cache: varianti OCR dello stesso raw_name condividono l'entry"""
+        return (build_lookup_key(raw_name) or raw_name, store_name)
+
+    def _is_known_miss(self, raw_name: str, store_name: Optional[str]) -> bool:
+        """True se (raw_name, store_name) è un miss recente su entrambi i tier"""
+        if self.negative_cache is None:
+            return False
+        return self.negative_cache.get(self._cache_key(raw_name, store_name)) is not None
+
+    def _set_miss(self, raw_name: str, store_name: Optional[str]):
+        """Registra miss confermato su entrambi i tier"""
+        if self.negative_cache is not None:
+            self.negative_cache.set(self._cache_key(raw_name, store_name), True)
+
+    def _get_l1(
+        self,
+        raw_name: str,
+        store_name: Optional[str],
+        current_price: Optional[float]
+    ) -> Optional[Dict]:
+        """Lookup L1: ricostruisce l'hit ricalcolando localmente la price coherence"""
+        if self.l1_cache is None:
+            return None
+
+        entry = self.l1_cache.get(self._cache_key(raw_name, store_name))
+        if entry is None:
+            return None
+
+        print(f"   [CACHE] L1 HIT: '{raw_name}' @ {store_name}")
+        if entry['tier'] == 'cache_tier2':
+            return self._build_tier2_hit(entry['stats']['product_id'], entry['product'])
+
+        cache_result = {
+            **entry['stats'],
+            'price_coherent': self._is_price_coherent(current_price, entry['stats'].get('avg_price'))
+        }
+        return self._build_tier1_hit(cache_result, entry['product'])
+
+    def _set_l1(
+        self,
+        raw_name: str,
+        store_name: Optional[str],
+        tier: str,
+        cache_result: Dict,
+        product_data: Optional[Dict],
+        ttl_seconds: Optional[float] = None
+    ):
+        """Salva in L1 stats e dati prodotto (senza price_coherent, dipende dal prezzo)"""
+        if self.l1_cache is None:
+            return
+
+        stats = {k: v for k, v in cache_result.items() if k != 'price_coherent'}
+        self.l1_cache.set(self._cache_key(raw_name, store_name), {
+            'tier': tier,
+            'stats': stats,
+            'product': product_data
+        }, ttl_seconds=ttl_seconds)
+
+    def _is_price_coherent(
+        self,
+        current_price: Optional[float],
+        avg_price: Optional[float]
+    ) -> bool:
+        """Stessa regola di get_cached_product() SQL: prezzo entro ±tolleranza dalla media"""
+        if current_price is None or avg_price is None:
+            return True
+        avg_price = float(avg_price)
+        if avg_price == 0:
+            return True
+        return abs(current_price - avg_price) / avg_price <= self.PRICE_TOLERANCE
+
+    def _build_tier1_hit(
+        self,
+        cache_result: Dict,
+        product_data: Optional[Dict]
+    ) -> Dict:
+        """Costruisce hit Tier 1 con confidence boost e price coherence"""
+        # Calculate confidence boost
+        confidence = self._calculate_confidence_boost(cache_result)
+
+        # Check price coherence
+        if not cache_result.get('price_coherent', True):
+            # Price anomalo: downgrade confidence
+            confidence = max(0.70, confidence - 0.20)
+
+        result = {
+            'product_id': cache_result['product_id'],
+            'confidence': confidence,
+            'price_coherent': cache_result.get('price_coherent', True),
+            'usage_count': cache_result.get('usage_count', 0),
+            'verified_by_households': cache_result.get('verified_by_households', 0),
+            'tier': 'cache_tier1',
+            'from_cache': True
+        }
+
+        # Merge product data
+        if product_data:
+            result.update(product_data)
+
+        print(f"   [CACHE] ✅ Tier 1 HIT: '{result.get('canonical_name')}' (conf: {confidence:.2f}, usage: {cache_result.get('usage_count', 0)})")
+        return result
+
+    def _build_tier2_hit(
+        self,
+        product_id: str,
+        product_data: Optional[Dict]
+    ) -> Dict:
+        """Costruisce hit Tier 2 (confidence con penalty, nessuno storico prezzi)"""
+        # Tier 2 ha penalty
+        confidence = max(0.70, self.CACHE_BASE_CONFIDENCE - self.TIER2_PENALTY)
+
+        result = {
+            'product_id': product_id,
+            'confidence': confidence,
+            'price_coherent': True,  # No price history per Tier 2
+            'usage_count': 0,
+            'verified_by_households': 0,
+            'tier': 'cache_tier2',
+            'from_cache': True
+        }
+
+        # Merge product data
+        if product_data:
+            result.update(product_data)
+
+        print(f"   [CACHE] ✅ Tier 2 HIT: '{result.get('canonical_name')}' (conf: {confidence:.2f})")
+        return result
+
     def _query_cache_tier1(
         self,
         raw_name: str,
+        lookup_key: Optional[str],
         store_name: Optional[str],
         current_price: Optional[float]
     ) -> Optional[Dict]:
@@ -131,6 +406,7 @@ class CacheService:
                 'get_cached_product',
                 {
                     'p_raw_name': raw_name,
+                    'p_lookup_key': lookup_key,
                     'p_store_name': store_name,
                     'p_current_price': current_price
                 }
@@ -148,6 +424,7 @@ class CacheService:
     def _query_cache_tier2(
         self,
         raw_name: str,
+        lookup_key: Optional[str],
         store_name: Optional[str]
     ) -> Optional[Dict]:
         """
@@ -156,8 +433,17 @@ class CacheService:
         """
         try:
             query = supabase_service.client.table("product_mappings")\
-                .select("normalized_product_id, confidence_score")\
-                .eq("raw_name", raw_name)\
+                .select("normalized_product_id, confidence_score")
+
+            if lookup_key:
+                query = query.or_(
+                    f"raw_name.eq.{self._quote_filter_value(raw_name)},"
+                    f"lookup_key.eq.{self._quote_filter_value(lookup_key)}"
+                )
+            else:
+                query = query.eq("raw_name", raw_name)
+
+            query = query\
                 .eq("verified_by_user", False)\
                 .gte("confidence_score", self.TIER2_MIN_CONFIDENCE)\
                 .order("confidence_score", desc=True)\
@@ -177,6 +463,12 @@ class CacheService:
             print(f"Error querying cache tier 2: {str(e)}")
             return None
 
+    @staticmethod
+    def _quote_filter_value(value: str) -> str:
+        """Quota un valore per i filtri or() di PostgREST (virgole, punti, parentesi)"""
+        escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{escaped}"'
+
     def _fetch_product_data(self, product_id: str) -> Optional[Dict]:
         """
         Fetch dati completi del prodotto normalizzato
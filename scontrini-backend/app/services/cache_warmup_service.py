@@ -0,0 +1,101 @@
+"""
+Cache Warm-up Service - Precaricamento cache L1 all'avvio
+Carica in background i top-N mapping verificati per negozio,
+mentre il server accetta già traffico
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from app.config import settings
+from app.services.blocking_executor import blocking_executor
+from app.services.cache_service import cache_service
+
+
+class CacheWarmupService:
+    """Warm-up della cache L1 in un task asyncio di background"""
+
+    STATUS_IDLE = "idle"
+    STATUS_DISABLED = "disabled"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+
+    def __init__(self):
+        """Inizializza configurazioni da settings"""
+        self.enabled = settings.CACHE_WARMUP_ENABLED
+        self.top_n_per_store = settings.CACHE_WARMUP_TOP_N_PER_STORE
+        self.max_stores = settings.CACHE_WARMUP_MAX_STORES
+        self.ttl_seconds = settings.CACHE_WARMUP_TTL_SECONDS
+
+        self._task: Optional[asyncio.Task] = None
+        self._progress: Dict[str, Any] = {
+            "status": self.STATUS_IDLE if self.enabled else self.STATUS_DISABLED,
+            "stores_total": 0,
+            "stores_done": 0,
+            "entries_loaded": 0,
+            "started_at": None,
+            "finished_at": None,
+            "error": None
+        }
+
+    def start(self):
+        """Avvia il warm-up in background (da chiamare nello startup event FastAPI)"""
+        if not self.enabled or self._task is not None:
+            return
+        self._progress["status"] = self.STATUS_RUNNING
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Interrompe un warm-up ancora in corso (shutdown event FastAPI)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        """Carica negozio per negozio, aggiornando il progresso"""
+        progress = self._progress
+        progress["started_at"] = datetime.now(timezone.utc).isoformat()
+        print(f"🔥 [WARMUP] Cache warm-up started (top {self.top_n_per_store} per store)")
+
+        try:
+            stores = await blocking_executor.run(cache_service.get_warmup_stores, self.max_stores)
+            progress["stores_total"] = len(stores)
+
+            for store_name in stores:
+                loaded = await blocking_executor.run(
+                    cache_service.warm_up_store,
+                    store_name,
+                    self.top_n_per_store,
+                    self.ttl_seconds
+                )
+                progress["stores_done"] += 1
+                progress["entries_loaded"] += loaded
+                print(
+                    f"   [WARMUP] {progress['stores_done']}/{progress['stores_total']} "
+                    f"{store_name or '(no store)'}: {loaded} entries"
+                )
+
+            progress["status"] = self.STATUS_COMPLETED
+            print(f"✅ [WARMUP] {progress['entries_loaded']} entries from {progress['stores_done']} stores")
+
+        except asyncio.CancelledError:
+            progress["status"] = self.STATUS_FAILED
+            progress["error"] = "cancelled"
+            raise
+        except Exception as e:
+            # Warm-up best effort: il server continua con cache fredda
+            progress["status"] = self.STATUS_FAILED
+            progress["error"] = str(e)
+            print(f"⚠️ [WARMUP] Cache warm-up failed: {str(e)}")
+        finally:
+            progress["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Progresso warm-up per health check"""
+        return dict(self._progress)
+
+
+# Istanza globale
+cache_warmup_service = CacheWarmupService()
@@ -1,30 +1,105 @@
 """
 Categorization Service
 Servizio per categorizzare prodotti usando OpenAI LLM
+Risultati in cache per (canonical_name, brand, size, unit_type); più prodotti
+categorizzati in parallelo con limite di concorrenza condiviso
 """
 import json
 import asyncio
-from typing import Dict, Optional
-from openai import AsyncOpenAI
+from typing import Dict, List, Optional, Tuple
 from app.config import settings
+from app.services.blocking_executor import blocking_executor
+from app.services.cache_backend import cache_backend
+from app.services.openai_client_service import openai_client_service
+from app.services.llm_response_cache import llm_response_cache
+from app.utils.single_flight import SingleFlight
 
 
 class CategorizationService:
     """Servizio per categorizzazione prodotti con LLM"""
     
     def __init__(self):
-        """Inizializza client OpenAI async"""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        """Inizializza client OpenAI condiviso (rate limited)"""
+        self.client = openai_client_service.get_client("categorize")
         self.model = settings.OPENAI_MODEL
         # Temperatura specifica per categorizzazione (da .env: OPENAI_TEMPERATURE_CATEGORIZER)
         self.temperature = settings.OPENAI_TEMPERATURE_CATEGORIZER
-    
+
+        # Categorie per prodotto (namespace condiviso tra worker se backend Redis)
+        self.cache = cache_backend.namespace(
+            "categorization",
+            max_size=settings.CATEGORIZATION_CACHE_MAX_SIZE,
+            ttl_seconds=settings.CATEGORIZATION_CACHE_TTL_SECONDS
+        )
+        self._single_flight = SingleFlight()
+        self._semaphore = asyncio.Semaphore(settings.CATEGORIZATION_CONCURRENCY)
+
+    async def categorize_products(self, products: List[Dict]) -> List[Dict]:
+        """
+        Categorizza più prodotti in parallelo (cache + limite CATEGORIZATION_CONCURRENCY)
+
+        Args:
+            products: Lista dict con canonical_name, brand, size, unit_type
+
+        Returns:
+            Risultati di categorize_product allineati a products
+        """
+        return await asyncio.gather(*[
+            self.categorize_product(
+                canonical_name=product["canonical_name"],
+                brand=product.get("brand"),
+                size=product.get("size"),
+                unit_type=product.get("unit_type")
+            )
+            for product in products
+        ])
+
     async def categorize_product(
         self,
         canonical_name: str,
         brand: Optional[str] = None,
         size: Optional[str] = None,
         unit_type: Optional[str] = None
+    ) -> Dict:
+        """
+        Categorizza un prodotto (cache, poi LLM; chiamate concorrenti identiche deduplicate)
+
+        Returns:
+            Dict con category, subcategory, confidence (vedi _categorize_llm)
+        """
+        key = self._cache_key(canonical_name, brand, size, unit_type)
+        cached = await blocking_executor.run(self.cache.get, key)
+        if cached is not None:
+            return cached
+
+        async def _categorize():
+            async with self._semaphore:
+                result = await self._categorize_llm(canonical_name, brand, size, unit_type)
+            if result["success"]:
+                await blocking_executor.run(self.cache.set, key, result)
+            return result
+
+        return await self._single_flight.do(key, _categorize)
+
+    @staticmethod
+    def _cache_key(
+        canonical_name: str,
+        brand: Optional[str],
+        size: Optional[str],
+        unit_type: Optional[str]
+    ) -> Tuple[str, str, str, str]:
+        """Chiave insensibile a maiuscole/spazi (size può arrivare come numero)"""
+        return tuple(
+            " ".join(str(value).split()).lower() if value is not None else ""
+            for value in (canonical_name, brand, size, unit_type)
+        )
+
+    async def _categorize_llm(
+        self,
+        canonical_name: str,
+        brand: Optional[str] = None,
+        size: Optional[str] = None,
+        unit_type: Optional[str] = None
     ) -> Dict:
         """
         Categorizza un prodotto usando OpenAI.
@@ -51,18 +126,15 @@ class CategorizationService:
             user_prompt = f"Prodotto da categorizzare:\n{product_desc}"
             
             # Chiamata OpenAI con structured output
-            response = await self.client.chat.completions.create(
+            content, total_tokens = await llm_response_cache.complete_json(
+                self.client,
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
                 temperature=self.temperature,
-                response_format={"type": "json_object"}
+                system_prompt=system_prompt,
+                user_prompt=user_prompt
             )
             
             # Parse risposta
-            content = response.choices[0].message.content
             result = json.loads(content)
             
             return {
@@ -0,0 +1,121 @@
+"""
+HTTP Fetch Service - Download asincrono con client condiviso
+Connection pool unico, limite connessioni per host, timeout e size cap in streaming
+"""
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import httpx
+from app.config import settings
+
+
+class ImageDownloadError(Exception):
+    """Download fallito (rete, timeout, status HTTP non 2xx)"""
+
+
+class ImageTooLargeError(ImageDownloadError):
+    """Contenuto oltre il limite di dimensione configurato"""
+
+
+class HttpFetchService:
+    """Servizio per download HTTP non bloccanti con pool di connessioni condiviso"""
+
+    def __init__(self):
+        """Inizializza configurazioni da settings (client creato al primo uso)"""
+        self.timeout_seconds = settings.HTTP_FETCH_TIMEOUT_SECONDS
+        self.connect_timeout_seconds = settings.HTTP_FETCH_CONNECT_TIMEOUT_SECONDS
+        self.max_connections = settings.HTTP_FETCH_MAX_CONNECTIONS
+        self.max_connections_per_host = settings.HTTP_FETCH_MAX_CONNECTIONS_PER_HOST
+        self.max_image_bytes = settings.HTTP_FETCH_MAX_IMAGE_BYTES
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Client httpx condiviso (keep-alive + pool limitato)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=httpx.Timeout(
+                    self.timeout_seconds,
+                    connect=self.connect_timeout_seconds
+                ),
+                follow_redirects=True
+            )
+        return self._client
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Semaforo per host: httpx limita solo il totale del pool"""
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_semaphores[host]
+
+    async def fetch_bytes(
+        self,
+        url: str,
+        max_bytes: Optional[int] = None
+    ) -> bytes:
+        """
+        Scarica contenuto URL senza bloccare l'event loop
+
+        Args:
+            url: URL da scaricare (es. immagine su Supabase Storage)
+            max_bytes: Dimensione massima (default HTTP_FETCH_MAX_IMAGE_BYTES)
+
+        Returns:
+            Contenuto come bytes
+
+        Raises:
+            ImageTooLargeError: se il contenuto supera max_bytes
+            ImageDownloadError: per errori di rete, timeout o status non 2xx
+        """
+        if max_bytes is None:
+            max_bytes = self.max_image_bytes
+
+        async with self._get_host_semaphore(url):
+            try:
+                # Timeout complessivo: httpx.Timeout vale per singola operazione di I/O
+                return await asyncio.wait_for(
+                    self._stream_download(url, max_bytes),
+                    timeout=self.timeout_seconds
+                )
+            except asyncio.TimeoutError:
+                raise ImageDownloadError(f"Download timeout after {self.timeout_seconds}s: {url}")
+            except httpx.HTTPError as e:
+                raise ImageDownloadError(f"Download error: {str(e)}")
+
+    async def _stream_download(self, url: str, max_bytes: int) -> bytes:
+        """Download in streaming con interruzione appena superato il limite"""
+        async with self._get_client().stream("GET", url) as response:
+            if response.status_code >= 400:
+                raise ImageDownloadError(f"Download failed: HTTP {response.status_code}")
+
+            content_length = response.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                raise ImageTooLargeError(
+                    f"Image too large: {int(content_length)} bytes (max {max_bytes})"
+                )
+
+            chunks = []
+            received = 0
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if received > max_bytes:
+                    raise ImageTooLargeError(f"Image too large: over {max_bytes} bytes")
+                chunks.append(chunk)
+
+            return b"".join(chunks)
+
+    async def close(self):
+        """Chiude il client condiviso (da chiamare nello shutdown event FastAPI)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Istanza globale
+http_fetch_service = HttpFetchService()
@@ -3,20 +3,32 @@ LLM Interpret Service - Espansione e interpretazione nomi prodotti grezzi
 """
 import json
 import asyncio
-from typing import Dict, Optional, Any
-from openai import AsyncOpenAI
+from typing import Dict, List, Optional, Any
 from app.config import settings
+from app.services.openai_client_service import openai_client_service
+from app.services.llm_response_cache import llm_response_cache
+from app.utils.circuit_breaker import CircuitOpenError
+from app.utils.deadline import DeadlineExceeded
+
+
+# Errori che valgono per tutto il blocco: nessun retry riga per riga
+BATCH_ABORT_ERRORS = (CircuitOpenError, DeadlineExceeded)
 
 
 class LLMInterpretService:
     """Servizio per interpretazione nomi prodotti grezzi tramite LLM"""
 
     def __init__(self):
-        """Inizializza client OpenAI async"""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        """Inizializza client OpenAI condiviso (rate limited)"""
+        self.client = openai_client_service.get_client("interpret")
+        self.batch_client = openai_client_service.get_client("interpret_batch")  # Timeout più ampio
         self.model = settings.OPENAI_MODEL
         self.temperature = 0.3  # Bassa per output deterministico
 
+        # Batch interpret: budget token per singola chiamata (input + output stimati)
+        self.batch_max_tokens = settings.LLM_INTERPRET_BATCH_MAX_TOKENS
+        self.batch_output_tokens_per_item = settings.LLM_INTERPRET_BATCH_OUTPUT_TOKENS_PER_ITEM
+
     async def interpret_raw_name(
         self,
         raw_name: str,
@@ -33,7 +45,7 @@ class LLMInterpretService:
 
         Returns:
             {
-                "success": bool,
+                "success": bool,  # False solo con circuito aperto o deadline esaurita
                 "hypothesis": str,  # Ipotesi prodotto completo
                 "brand": str | None,
                 "product_type": str,
@@ -45,19 +57,16 @@ class LLMInterpretService:
 
         try:
             print(f"   [LLM INTERPRET] Calling OpenAI {self.model}...")
-            response = await self.client.chat.completions.create(
+            content, total_tokens = await llm_response_cache.complete_json(
+                self.client,
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": INTERPRET_SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
                 temperature=self.temperature,
-                response_format={"type": "json_object"}
+                system_prompt=INTERPRET_SYSTEM_PROMPT,
+                user_prompt=prompt
             )
 
-            content = response.choices[0].message.content.strip()
             result = json.loads(content)
-            print(f"   [LLM INTERPRET] ✅ Success (tokens: {response.usage.total_tokens})")
+            print(f"   [LLM INTERPRET] ✅ Success (tokens: {total_tokens if total_tokens is not None else 'cache'})")
 
             return {
                 "success": True,
@@ -66,19 +75,175 @@ class LLMInterpretService:
 
         except Exception as e:
             print(f"❌ LLM Interpret error: {str(e)}")
-            # Fallback: ritorna raw_name come ipotesi
-            return {
-                "success": True,
-                "hypothesis": raw_name,
-                "brand": None,
-                "product_type": raw_name,
-                "size": None,
-                "unit_type": None,
-                "category": "Alimentari",
-                "subcategory": "generico",
-                "tags": ["generico", "non-identificato"],
-                "reasoning": f"Fallback: errore interpretazione ({str(e)})"
-            }
+            return self._fallback_result(raw_name, e)
+
+    @staticmethod
+    def _fallback_result(raw_name: str, error: Exception) -> Dict[str, Any]:
+        """
+        Interpretazione fallita: raw_name come ipotesi
+
+        success False (il normalizzatore passa in modalità degradata) solo se
+        l'LLM non è utilizzabile: circuito aperto o deadline esaurita. Altri
+        errori (JSON malformato, 4xx, timeout singolo) proseguono con
+        l'ipotesi raw_name verso Select/Validate
+        """
+        unavailable = isinstance(error, BATCH_ABORT_ERRORS) or openai_client_service.breaker.is_open()
+        return {
+            "success": not unavailable,
+            "error": f"{type(error).__name__}: {error}",
+            "hypothesis": raw_name,
+            "brand": None,
+            "product_type": raw_name,
+            "size": None,
+            "unit_type": None,
+            "category": "Alimentari",
+            "subcategory": "generico",
+            "tags": ["generico", "non-identificato"],
+            "reasoning": f"Fallback: errore interpretazione ({str(error)})"
+        }
+
+    async def interpret_batch(
+        self,
+        items: List[Dict[str, Any]],
+        store_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Interpreta più righe dello stesso scontrino con una sola chiamata per blocco
+
+        Le righe vengono divise in blocchi che rientrano in batch_max_tokens
+        (blocchi eseguiti in parallelo). Le risposte sono riassociate per indice;
+        righe mancanti o blocchi falliti ripiegano su interpret_raw_name(), tranne
+        con circuito aperto o deadline esaurita (righe subito con success False).
+
+        Args:
+            items: Lista dict con raw_name e price (opzionale)
+            store_name: Nome negozio per contesto (comune a tutte le righe)
+
+        Returns:
+            Lista risultati (stesso formato di interpret_raw_name), allineata a items
+        """
+        if not items:
+            return []
+
+        chunks = self._split_batch(items)
+        print(f"   [LLM INTERPRET] Batch: {len(items)} items in {len(chunks)} call(s)")
+
+        chunk_results = await asyncio.gather(*[
+            self._interpret_chunk(items, chunk, store_name)
+            for chunk in chunks
+        ])
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        for chunk_result in chunk_results:
+            for idx, result in chunk_result.items():
+                results[idx] = result
+
+        # Righe senza risposta valida: chiamata singola
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        if missing:
+            print(f"   [LLM INTERPRET] Batch: {len(missing)} items retried singly")
+            singles = await asyncio.gather(*[
+                self.interpret_raw_name(
+                    raw_name=items[idx]['raw_name'],
+                    store_name=store_name,
+                    price=items[idx].get('price')
+                )
+                for idx in missing
+            ])
+            for idx, result in zip(missing, singles):
+                results[idx] = result
+
+        return results
+
+    async def _interpret_chunk(
+        self,
+        items: List[Dict[str, Any]],
+        chunk: List[int],
+        store_name: Optional[str]
+    ) -> Dict[int, Dict[str, Any]]:
+        """Una chiamata LLM per un blocco di indici, ritorna {indice: risultato}"""
+        prompt = self._build_batch_prompt(items, chunk, store_name)
+
+        try:
+            content, total_tokens = await llm_response_cache.complete_json(
+                self.batch_client,
+                model=self.model,
+                temperature=self.temperature,
+                system_prompt=INTERPRET_BATCH_SYSTEM_PROMPT,
+                user_prompt=prompt
+            )
+
+            result = json.loads(content)
+            print(f"   [LLM INTERPRET] ✅ Batch of {len(chunk)} (tokens: {total_tokens if total_tokens is not None else 'cache'})")
+
+        except BATCH_ABORT_ERRORS as e:
+            print(f"❌ LLM Interpret batch aborted: {str(e)}")
+            return {idx: self._fallback_result(items[idx]['raw_name'], e) for idx in chunk}
+
+        except Exception as e:
+            print(f"❌ LLM Interpret batch error: {str(e)}")
+            return {}
+
+        # Indici nel prompt locali al blocco (0..n-1) → indici originali
+        answers = {}
+        for entry in result.get("items", []):
+            if not isinstance(entry, dict):
+                continue
+            local_idx = entry.pop("index", None)
+            if isinstance(local_idx, int) and 0 <= local_idx < len(chunk) and entry.get("hypothesis"):
+                answers[chunk[local_idx]] = {"success": True, **entry}
+
+        return answers
+
+    def _split_batch(self, items: List[Dict[str, Any]]) -> List[List[int]]:
+        """Divide gli indici in blocchi entro il budget token"""
+        base_tokens = self._estimate_tokens(INTERPRET_BATCH_SYSTEM_PROMPT)
+
+        chunks: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = base_tokens
+
+        for idx, item in enumerate(items):
+            line = self._build_batch_line(len(current), item)
+            item_tokens = self._estimate_tokens(line) + self.batch_output_tokens_per_item
+
+            if current and current_tokens + item_tokens > self.batch_max_tokens:
+                chunks.append(current)
+                current = []
+                current_tokens = base_tokens
+
+            current.append(idx)
+            current_tokens += item_tokens
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Stima token (~4 caratteri per token, sufficiente per il budget)"""
+        return len(text) // 4 + 1
+
+    def _build_batch_line(self, local_idx: int, item: Dict[str, Any]) -> str:
+        line = f'[{local_idx}] RAW: "{item["raw_name"]}"'
+        if item.get('price'):
+            line += f' | PRICE: €{item["price"]:.2f}'
+        return line
+
+    def _build_batch_prompt(
+        self,
+        items: List[Dict[str, Any]],
+        chunk: List[int],
+        store_name: Optional[str]
+    ) -> str:
+        """Prompt batch: contesto negozio + una riga per item con indice locale"""
+        lines = []
+        if store_name:
+            lines.append(f'STORE: "{store_name}"')
+        lines.append("RIGHE:")
+        for local_idx, idx in enumerate(chunk):
+            lines.append(self._build_batch_line(local_idx, items[idx]))
+        return "\n".join(lines)
 
     def _build_prompt(
         self,
@@ -163,5 +328,20 @@ Esempio: ["frullato", "frutta", "yogurt", "bambini", "merenda", "pesca"]
 """
 
 
+# System prompt per interpretazione batch (stesse regole, più righe per chiamata)
+INTERPRET_BATCH_SYSTEM_PROMPT = INTERPRET_SYSTEM_PROMPT + """
+# MODALITÀ BATCH
+Riceverai più righe RAW dello STESSO scontrino, ciascuna preceduta da un indice [n].
+- Interpreta ogni riga in modo indipendente seguendo tutte le regole sopra (lo STORE vale per tutte le righe).
+- Restituisci un oggetto JSON con un elemento per OGNI riga, nello stesso ordine:
+{
+  "items": [
+    {"index": 0, "hypothesis": "...", "brand": ..., "product_type": ..., "size": ..., "unit_type": ..., "category": ..., "subcategory": ..., "tags": [...], "reasoning": "..."}
+  ]
+}
+- "index" deve essere l'indice [n] della riga corrispondente.
+"""
+
+
 # Instanza globale
 llm_interpret_service = LLMInterpretService()
@@ -0,0 +1,236 @@
+"""
+LLM Response Cache - Cache persistente delle risposte OpenAI
+Chiave = hash di (model, temperature, system prompt, user prompt):
+prompt identici non richiamano più l'API. Backend SQLite locale
+con eviction per dimensione (LRU su ultimo accesso).
+"""
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+from app.config import settings
+from app.services.blocking_executor import blocking_executor
+
+
+# Bypass per-contesto (es. run di valutazione): vale per il task corrente e i task figli
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+class LLMResponseCache:
+    """Cache content-addressed delle risposte chat completion su SQLite"""
+
+    def __init__(self):
+        """Inizializza configurazioni da settings (il database viene aperto al primo uso)"""
+        self.enabled = settings.LLM_CACHE_ENABLED
+        self.path = settings.LLM_CACHE_PATH
+        self.max_bytes = settings.LLM_CACHE_MAX_MB * 1024 * 1024
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._size_bytes = 0
+
+        # Metriche
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @staticmethod
+    def fingerprint(model: str, temperature: float, system_prompt: str, user_prompt: str) -> str:
+        """Hash SHA-256 dei parametri che determinano la risposta"""
+        payload = json.dumps(
+            [model, temperature, system_prompt, user_prompt],
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def bypass(self):
+        """Disabilita lettura e scrittura cache nel blocco (anche LLM_CACHE_ENABLED=false)"""
+        token = _bypass.set(True)
+        try:
+            yield
+        finally:
+            _bypass.reset(token)
+
+    def is_active(self) -> bool:
+        return self.enabled and not _bypass.get()
+
+    async def complete_json(
+        self,
+        client,
+        model: str,
+        temperature: float,
+        system_prompt: str,
+        user_prompt: str
+    ) -> Tuple[str, Optional[int]]:
+        """
+        Chat completion JSON con cache
+
+        Args:
+            client: Client OpenAI (openai_client_service.get_client(stage))
+            model, temperature, system_prompt, user_prompt: parametri della richiesta
+
+        Returns:
+            Tuple (content JSON, total_tokens) - total_tokens None se servita da cache
+        """
+        key = None
+        if self.is_active():
+            key = self.fingerprint(model, temperature, system_prompt, user_prompt)
+            cached = await blocking_executor.run(self._get, key)
+            if cached is not None:
+                return cached, None
+
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            response_format={"type": "json_object"}
+        )
+        content = response.choices[0].message.content.strip()
+        total_tokens = response.usage.total_tokens if response.usage else None
+
+        # Solo JSON valido: una risposta malformata non deve restare in cache
+        if key is not None and self._is_json(content):
+            await blocking_executor.run(self._set, key, content)
+
+        return content, total_tokens
+
+    @staticmethod
+    def _is_json(content: str) -> bool:
+        try:
+            json.loads(content)
+            return True
+        except ValueError:
+            return False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Apre (una volta) il database e calcola la dimensione corrente"""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                " key TEXT PRIMARY KEY,"
+                " content TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access"
+                " ON llm_responses(last_access)"
+            )
+            self._size_bytes = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM llm_responses"
+            ).fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _get(self, key: str) -> Optional[str]:
+        """Lookup (thread del blocking executor), aggiorna last_access"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT content FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                conn.execute(
+                    "UPDATE llm_responses SET last_access = ? WHERE key = ?",
+                    (time.time(), key)
+                )
+                self.hits += 1
+                return row[0]
+            except sqlite3.Error as e:
+                self.errors += 1
+                print(f"   [LLM CACHE] Read error: {str(e)}")
+                return None
+
+    def _set(self, key: str, content: str):
+        """Scrive risposta ed esegue eviction se oltre max_bytes"""
+        size = len(content.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                previous = conn.execute(
+                    "SELECT size FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, content, size, created_at, last_access)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, content, size, now, now)
+                )
+                self._size_bytes += size - (previous[0] if previous else 0)
+                self.writes += 1
+
+                if self._size_bytes > self.max_bytes:
+                    self._evict(conn)
+            except sqlite3.Error as e:
+                self.errors += 1
+                print(f"   [LLM CACHE] Write error: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Rimuove le entry meno usate di recente fino al 90% di max_bytes"""
+        target = int(self.max_bytes * 0.9)
+        rows = conn.execute(
+            "SELECT key, size FROM llm_responses ORDER BY last_access ASC"
+        )
+
+        to_delete = []
+        freed = 0
+        for key, size in rows:
+            if self._size_bytes - freed <= target:
+                break
+            to_delete.append((key,))
+            freed += size
+
+        conn.executemany("DELETE FROM llm_responses WHERE key = ?", to_delete)
+        self._size_bytes -= freed
+        self.evictions += len(to_delete)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Metriche per health check"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "size_bytes": self._size_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def close(self):
+        """Chiude il database (shutdown event FastAPI)"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Istanza globale
+llm_response_cache = LLMResponseCache()
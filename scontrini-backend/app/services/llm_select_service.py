@@ -4,16 +4,17 @@ LLM Select Service - Selezione best match tra candidati vector search
 import json
 import asyncio
 from typing import Dict, List, Optional, Any
-from openai import AsyncOpenAI
 from app.config import settings
+from app.services.openai_client_service import openai_client_service
+from app.services.llm_response_cache import llm_response_cache
 
 
 class LLMSelectService:
     """Servizio per selezione prodotto migliore tra candidati tramite LLM"""
 
     def __init__(self):
-        """Inizializza client OpenAI async"""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        """Inizializza client OpenAI condiviso (rate limited)"""
+        self.client = openai_client_service.get_client("select")
         self.model = settings.OPENAI_MODEL
         self.temperature = 0.2  # Bassa per scelta deterministica
 
@@ -51,17 +52,14 @@ class LLMSelectService:
 
         try:
             print(f"   [LLM SELECT] Calling OpenAI {self.model} with {len(candidates)} candidates...")
-            response = await self.client.chat.completions.create(
+            content, total_tokens = await llm_response_cache.complete_json(
+                self.client,
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": SELECT_SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
                 temperature=self.temperature,
-                response_format={"type": "json_object"}
+                system_prompt=SELECT_SYSTEM_PROMPT,
+                user_prompt=prompt
             )
 
-            content = response.choices[0].message.content.strip()
             result = json.loads(content)
 
             # Trova prodotto selezionato nella lista candidati
@@ -72,7 +70,7 @@ class LLMSelectService:
                 # Fallback al primo candidato
                 selected_product = candidates[0]
 
-            print(f"   [LLM SELECT] ✅ Selected index {selected_idx}: '{selected_product['canonical_name']}' (tokens: {response.usage.total_tokens})")
+            print(f"   [LLM SELECT] ✅ Selected index {selected_idx}: '{selected_product['canonical_name']}' (tokens: {total_tokens if total_tokens is not None else 'cache'})")
 
             return {
                 "success": True,
@@ -0,0 +1,169 @@
+"""
+LLM Select+Validate Service - Selezione best match e confidence scoring in una chiamata
+Alternativa opzionale a LLM Select → LLM Validate (LLM_FUSED_SELECT_VALIDATE_ENABLED):
+stesso contesto (raw, interpretazione, candidati) inviato una sola volta
+"""
+import json
+from typing import Dict, List, Any
+from app.config import settings
+from app.services.openai_client_service import openai_client_service
+from app.services.llm_response_cache import llm_response_cache
+from app.services.llm_validate_service import build_validation
+
+
+class LLMSelectValidateService:
+    """Servizio per selezione prodotto e validazione mapping con una sola chiamata LLM"""
+
+    def __init__(self):
+        """Inizializza client OpenAI condiviso (rate limited)"""
+        self.client = openai_client_service.get_client("select_validate")
+        self.model = settings.OPENAI_MODEL
+        self.temperature = 0.1  # Come LLM Validate: scoring consistente
+
+    async def select_and_validate(
+        self,
+        raw_name: str,
+        hypothesis: str,
+        candidates: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Sceglie il prodotto più verosimile tra i candidati e ne valuta la confidence
+
+        Args:
+            raw_name: Nome grezzo originale da scontrino
+            hypothesis: Ipotesi interpretata da LLM Interpret
+            candidates: Lista prodotti candidati dopo reranking (max 5)
+
+        Returns:
+            {
+                "success": bool,
+                "selected_product_id": str,
+                "selected_product": Dict,
+                "validation": Dict  # Stesso formato di LLMValidateService.validate_mapping
+            }
+            success=False (risposta non valida o errore) → il chiamante usa
+            il percorso LLM Select → LLM Validate
+        """
+        if not candidates:
+            return {"success": False, "error": "No candidates found"}
+
+        prompt = self._build_prompt(raw_name, hypothesis, candidates)
+
+        try:
+            print(f"   [LLM SELECT+VALIDATE] Calling OpenAI {self.model} with {len(candidates)} candidates...")
+            content, total_tokens = await llm_response_cache.complete_json(
+                self.client,
+                model=self.model,
+                temperature=self.temperature,
+                system_prompt=SELECT_VALIDATE_SYSTEM_PROMPT,
+                user_prompt=prompt
+            )
+
+            result = json.loads(content)
+
+            selected_idx = result.get("selected_index")
+            if not isinstance(selected_idx, int) or not 0 <= selected_idx < len(candidates):
+                raise ValueError(f"Invalid selected_index: {selected_idx}")
+            if "confidence_score" not in result:
+                raise ValueError("Missing confidence_score")
+
+            selected_product = candidates[selected_idx]
+            validation = build_validation(result)
+
+            print(f"   [LLM SELECT+VALIDATE] ✅ Selected index {selected_idx}: '{selected_product['canonical_name']}', confidence: {validation['confidence_score']:.2f} ({validation['confidence_level']}) (tokens: {total_tokens if total_tokens is not None else 'cache'})")
+
+            return {
+                "success": True,
+                "selected_product_id": selected_product['product_id'],
+                "selected_product": selected_product,
+                "validation": validation
+            }
+
+        except Exception as e:
+            print(f"❌ LLM Select+Validate error: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    def _build_prompt(
+        self,
+        raw_name: str,
+        hypothesis: str,
+        candidates: List[Dict[str, Any]]
+    ) -> str:
+        """Costruisce prompt per LLM"""
+        prompt = f'RAW SCONTRINO: "{raw_name}"\n'
+        prompt += f'INTERPRETAZIONE: "{hypothesis}"\n\n'
+        prompt += "CANDIDATI:\n"
+
+        for idx, candidate in enumerate(candidates):
+            prompt += f"{idx}. {candidate['canonical_name']}"
+            if candidate.get('brand'):
+                prompt += f" ({candidate['brand']})"
+            if candidate.get('category'):
+                prompt += f" [{candidate['category']}]"
+            if candidate.get('size'):
+                prompt += f" - {candidate['size']}"
+            if candidate.get('unit_type'):
+                prompt += f" {candidate['unit_type']}"
+            score = candidate.get('business_score') or candidate.get('combined_score', 0.0)
+            prompt += f" [score: {score:.3f}]\n"
+
+        return prompt
+
+
+# System prompt per selezione + validazione
+SELECT_VALIDATE_SYSTEM_PROMPT = """Sei un esperto di prodotti da supermercato. Il tuo compito ha due parti:
+1. Scegliere il prodotto più verosimile tra i candidati forniti
+2. Rispondere alla domanda: **"Quanto è probabile che questa riga RAW di scontrino corrisponda al prodotto scelto?"**
+
+**CRITERI DI SELEZIONE (in ordine di priorità):**
+
+1. **Brand Match**: Se il raw name/interpretazione menziona un brand, privilegia prodotti con quel brand
+   - Esempio: "S.ANNA" → candidati "Sant'Anna" hanno priorità
+2. **Product Type Match**: Il tipo di prodotto deve corrispondere
+   - Esempio: "TONNO" deve matchare prodotti categoria tonno/pesce, non pasta
+3. **Size/Format Match**: Se dimensione/formato specificato, deve corrispondere
+   - Esempio: "1.5L" deve matchare bottiglie 1.5L, non 500ml
+4. **Similarity Score**: A parità di match, preferisci score più alto
+5. Se tutti i candidati sono ugualmente improbabili, scegli comunque il meno peggio (e assegna confidence bassa)
+
+**CRITERI DI VALUTAZIONE DEL PRODOTTO SCELTO:**
+
+1. **Brand Correspondence** (peso 35%): match esatto alta, store brand vs marchio media, brand diverso bassa
+2. **Product Type Match** (peso 40%): tipo diverso → confidence molto bassa
+3. **Size/Format Match** (peso 15%): size diversa penalizza, size non specificata è neutra
+4. **Plausibility** (peso 10%): abbreviazioni risolte correttamente, mapping sensato nel contesto
+
+**CONFIDENCE SCALE:**
+- **0.9-1.0**: Match quasi certo, corrispondenza evidente
+- **0.8-0.9**: Match molto probabile, piccole incertezze
+- **0.6-0.8**: Match probabile, richiede review per conferma
+- **0.4-0.6**: Match incerto, potrebbe essere corretto o no
+- **0.0-0.4**: Match improbabile, probabilmente errato
+
+**FLAGS:**
+- `brand_mismatch`: true se brand non corrisponde
+- `size_uncertain`: true se formato/dimensione ambiguo
+- `ambiguous`: true se interpretazione generale è ambigua
+
+**OUTPUT JSON:**
+{
+  "selected_index": 0,  // Indice (0-based) del prodotto scelto
+  "confidence_score": 0.85,
+  "reasoning": "Brand Sant'Anna corrisponde a S.ANNA, tipo prodotto corretto (acqua frizzante), formato 1.5L matches.",
+  "flags": {
+    "brand_mismatch": false,
+    "size_uncertain": false,
+    "ambiguous": false
+  }
+}
+
+**IMPORTANTE:**
+- Valuta la confidence in modo indipendente dalla scelta: aver scelto il meno peggio NON rende il match probabile
+- Sii onesto: se il match è dubbio, assegna score basso
+- **SEVERO**: Se l'interpretazione contiene errori evidenti o è incoerente, assegna confidence molto bassa (0.1-0.3)
+- **SEVERO**: Se l'interpretazione non corrisponde al tipo di prodotto, assegna confidence bassa (0.2-0.4)
+"""
+
+
+# Instanza globale
+llm_select_validate_service = LLMSelectValidateService()
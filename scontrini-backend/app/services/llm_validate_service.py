@@ -4,16 +4,17 @@ LLM Validate Service - Confidence scoring per mapping raw → prodotto normalizz
 import json
 import asyncio
 from typing import Dict, Any
-from openai import AsyncOpenAI
 from app.config import settings
+from app.services.openai_client_service import openai_client_service
+from app.services.llm_response_cache import llm_response_cache
 
 
 class LLMValidateService:
     """Servizio per validazione mapping e assegnazione confidence score tramite LLM"""
 
     def __init__(self):
-        """Inizializza client OpenAI async"""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        """Inizializza client OpenAI condiviso (rate limited)"""
+        self.client = openai_client_service.get_client("validate")
         self.model = settings.OPENAI_MODEL
         self.temperature = 0.1  # Molto bassa per scoring consistente
 
@@ -50,45 +51,21 @@ class LLMValidateService:
 
         try:
             print(f"   [LLM VALIDATE] Calling OpenAI {self.model}...")
-            response = await self.client.chat.completions.create(
+            content, total_tokens = await llm_response_cache.complete_json(
+                self.client,
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": VALIDATE_SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
                 temperature=self.temperature,
-                response_format={"type": "json_object"}
+                system_prompt=VALIDATE_SYSTEM_PROMPT,
+                user_prompt=prompt
             )
 
-            content = response.choices[0].message.content.strip()
             result = json.loads(content)
 
-            confidence_score = float(result.get("confidence_score", 0.5))
+            validation = build_validation(result)
 
-            # Determina confidence level e needs_review
-            if confidence_score >= 0.8:
-                confidence_level = "high"
-                needs_review = False
-            elif confidence_score >= 0.5:
-                confidence_level = "medium"
-                needs_review = True
-            else:
-                confidence_level = "low"
-                needs_review = True
+            print(f"   [LLM VALIDATE] ✅ Confidence: {validation['confidence_score']:.2f} ({validation['confidence_level']}), review: {validation['needs_review']} (tokens: {total_tokens if total_tokens is not None else 'cache'})")
 
-            print(f"   [LLM VALIDATE] ✅ Confidence: {confidence_score:.2f} ({confidence_level}), review: {needs_review} (tokens: {response.usage.total_tokens})")
-
-            return {
-                "confidence_score": confidence_score,
-                "confidence_level": confidence_level,
-                "needs_review": needs_review,
-                "reasoning": result.get("reasoning", ""),
-                "flags": result.get("flags", {
-                    "brand_mismatch": False,
-                    "size_uncertain": False,
-                    "ambiguous": False
-                })
-            }
+            return validation
 
         except Exception as e:
             print(f"❌ LLM Validate error: {str(e)}")
@@ -130,6 +107,39 @@ class LLMValidateService:
         return prompt
 
 
+def build_validation(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Costruisce il risultato di validazione da una risposta LLM
+    (confidence_score, reasoning, flags) applicando le soglie di review
+
+    Usata anche dallo stage fuso select+validate: stesse soglie
+    """
+    confidence_score = float(result.get("confidence_score", 0.5))
+
+    # Determina confidence level e needs_review
+    if confidence_score >= 0.8:
+        confidence_level = "high"
+        needs_review = False
+    elif confidence_score >= 0.5:
+        confidence_level = "medium"
+        needs_review = True
+    else:
+        confidence_level = "low"
+        needs_review = True
+
+    return {
+        "confidence_score": confidence_score,
+        "confidence_level": confidence_level,
+        "needs_review": needs_review,
+        "reasoning": result.get("reasoning", ""),
+        "flags": result.get("flags", {
+            "brand_mismatch": False,
+            "size_uncertain": False,
+            "ambiguous": False
+        })
+    }
+
+
 # System prompt per validazione
 VALIDATE_SYSTEM_PROMPT = """Sei un esperto validatore di prodotti da supermercato. Il tuo compito è rispondere alla domanda:
 
@@ -0,0 +1,148 @@
+"""
+Mapping Write-back Service - Scrittura asincrona dei mapping ad alta confidence
+I risultati sql_search validati sopra CACHE_TIER2_MIN_CONFIDENCE vengono accodati
+e scritti a blocchi in product_mappings (verified_by_user=false):
+gli scontrini successivi li trovano subito in cache Tier 2
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.services.blocking_executor import blocking_executor
+from app.services.cache_service import cache_service
+from app.services.supabase_service import supabase_service
+from app.utils.lookup_key import build_lookup_key
+
+
+class MappingWriteBackService:
+    """Coda in-process con flush periodico o a fine scontrino"""
+
+    def __init__(self):
+        """Inizializza configurazioni da settings"""
+        self.enabled = settings.MAPPING_WRITEBACK_ENABLED
+        self.min_confidence = settings.CACHE_TIER2_MIN_CONFIDENCE
+        self.batch_size = settings.MAPPING_WRITEBACK_BATCH_SIZE
+        self.flush_interval = settings.MAPPING_WRITEBACK_FLUSH_INTERVAL_SECONDS
+        self.max_queue_size = settings.MAPPING_WRITEBACK_QUEUE_SIZE
+
+        # Pendenti per (raw_name, store_name): vince la confidence più alta
+        self._pending: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metriche
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed_batches = 0
+
+    async def start(self):
+        """Avvia il flusher (da chiamare nello startup event FastAPI)"""
+        if not self.enabled or self._task is not None:
+            return
+        self._flush_requested = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Ferma il flusher e scrive i mapping ancora in coda (shutdown event FastAPI)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+
+    def enqueue(
+        self,
+        raw_name: str,
+        store_name: Optional[str],
+        normalized_product_id: Optional[str],
+        confidence_score: float,
+        interpretation_details: Optional[Dict] = None
+    ) -> bool:
+        """
+        Accoda un mapping se supera la soglia Tier 2 (non bloccante)
+
+        Returns:
+            True se accodato
+        """
+        if not self.enabled or self._task is None:
+            return False
+        if not normalized_product_id or confidence_score < self.min_confidence:
+            return False
+
+        key = (raw_name, store_name)
+        current = self._pending.get(key)
+        if current is None and len(self._pending) >= self.max_queue_size:
+            # Coda piena: il mapping verrà riprodotto al prossimo scontrino
+            self._dropped += 1
+            return False
+
+        if current is None or confidence_score >= current["confidence_score"]:
+            self._pending[key] = {
+                "raw_name": raw_name,
+                "store_name": store_name,
+                "lookup_key": build_lookup_key(raw_name),
+                "normalized_product_id": normalized_product_id,
+                "confidence_score": confidence_score,
+                "interpretation_details": interpretation_details or {}
+            }
+
+        self._enqueued += 1
+        if len(self._pending) >= self.batch_size:
+            self.request_flush()
+        return True
+
+    def request_flush(self):
+        """Chiede un flush immediato (es. a fine scontrino) senza attenderlo"""
+        if self._flush_requested is not None and self._pending:
+            self._flush_requested.set()
+
+    async def _flush_loop(self):
+        """Flush ogni flush_interval secondi o su richiesta"""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Scrive tutti i mapping pendenti a blocchi di batch_size"""
+        while self._pending:
+            keys = list(self._pending)[:self.batch_size]
+            rows = [self._pending.pop(key) for key in keys]
+            await self._write_batch(rows)
+
+    async def _write_batch(self, rows: List[Dict[str, Any]]):
+        """Upsert batch + invalidazione cache locali (negative cache inclusa)"""
+        try:
+            written = await blocking_executor.run(supabase_service.upsert_auto_mappings, rows)
+        except Exception as e:
+            # Best effort: i mapping persi verranno riprodotti dalla pipeline
+            self._failed_batches += 1
+            print(f"⚠️ [WRITEBACK] Batch of {len(rows)} mappings failed: {str(e)}")
+            return
+
+        self._written += written
+        await blocking_executor.run(
+            cache_service.invalidate_many,
+            [(row["raw_name"], row["store_name"]) for row in rows]
+        )
+
+        print(f"💾 [WRITEBACK] {written}/{len(rows)} mappings written")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Metriche per health check"""
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "enqueued": self._enqueued,
+            "written": self._written,
+            "dropped": self._dropped,
+            "failed_batches": self._failed_batches
+        }
+
+
+# Istanza globale
+mapping_writeback_service = MappingWriteBackService()
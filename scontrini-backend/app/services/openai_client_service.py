@@ -0,0 +1,365 @@
+"""
+OpenAI Client Service - Client AsyncOpenAI condiviso con rate limiting globale
+Un solo pool di connessioni HTTP per tutti i servizi LLM e due token bucket
+(richieste/minuto e token/minuto stimati): i burst vengono messi in coda
+invece di terminare in 429.
+Ogni chiamata ha timeout per stage, retry con backoff esponenziale sugli errori
+transitori, richiesta hedged opzionale oltre una soglia di latenza e rispetta
+la deadline dello scontrino (app/utils/deadline.py).
+Circuit breaker condiviso: dopo errori transitori consecutivi le chiamate
+falliscono subito e il normalizzatore passa in modalità degradata
+"""
+import asyncio
+import random
+from typing import Any, Dict, List, Optional
+import httpx
+import openai
+from openai import AsyncOpenAI
+from app.config import settings
+from app.utils import deadline
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.deadline import DeadlineExceeded
+from app.utils.token_bucket import TokenBucket
+
+
+# Errori transitori: nuovo tentativo (timeout e connessione, 429, 5xx)
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError
+)
+
+# Stage con chiamate brevi ed economiche: candidate all'hedging
+HEDGED_STAGES = {"interpret", "select", "validate", "select_validate", "categorize"}
+
+
+class RateLimitedCompletions:
+    """Wrapper di client.chat.completions: create() attende i bucket prima della chiamata"""
+
+    def __init__(self, service: "OpenAIClientService", stage: str):
+        self._service = service
+        self._stage = stage
+
+    async def create(self, **kwargs):
+        return await self._service.create_chat_completion(self._stage, **kwargs)
+
+
+class RateLimitedChat:
+    def __init__(self, service: "OpenAIClientService", stage: str):
+        self.completions = RateLimitedCompletions(service, stage)
+
+
+class RateLimitedOpenAI:
+    """Stessa interfaccia usata dai servizi (client.chat.completions.create)"""
+
+    def __init__(self, service: "OpenAIClientService", stage: str):
+        self.chat = RateLimitedChat(service, stage)
+
+
+class OpenAIClientService:
+    """Factory del client OpenAI condiviso + limiter richieste/token"""
+
+    def __init__(self):
+        """Inizializza configurazioni da settings (client creato al primo uso)"""
+        self.max_connections = settings.OPENAI_MAX_CONNECTIONS
+        self.timeout_seconds = settings.OPENAI_TIMEOUT_SECONDS
+        self.max_retries = settings.OPENAI_MAX_RETRIES
+        self.retry_base_delay = settings.OPENAI_RETRY_BASE_DELAY_SECONDS
+        self.retry_max_delay = settings.OPENAI_RETRY_MAX_DELAY_SECONDS
+        self.hedge_after = settings.OPENAI_HEDGE_AFTER_SECONDS
+        self.default_output_tokens = settings.OPENAI_RATE_LIMIT_DEFAULT_OUTPUT_TOKENS
+
+        # Timeout per singolo tentativo, per stage (limitato dalla deadline residua)
+        self.stage_timeouts = {
+            "parser": settings.OPENAI_TIMEOUT_PARSER_SECONDS,
+            "interpret": settings.OPENAI_TIMEOUT_INTERPRET_SECONDS,
+            "interpret_batch": settings.OPENAI_TIMEOUT_INTERPRET_BATCH_SECONDS,
+            "select": settings.OPENAI_TIMEOUT_SELECT_SECONDS,
+            "validate": settings.OPENAI_TIMEOUT_VALIDATE_SECONDS,
+            "select_validate": settings.OPENAI_TIMEOUT_SELECT_SECONDS,
+            "categorize": settings.OPENAI_TIMEOUT_CATEGORIZE_SECONDS
+        }
+
+        # Limiti per processo: con più worker dividere la quota dell'account
+        self._requests = TokenBucket(settings.OPENAI_RATE_LIMIT_RPM)
+        self._tokens = TokenBucket(settings.OPENAI_RATE_LIMIT_TPM)
+
+        self._client: Optional[AsyncOpenAI] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+        # Errori transitori consecutivi (retry esauriti) → chiamate rifiutate subito
+        self.breaker = CircuitBreaker(
+            "openai",
+            failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            recovery_seconds=settings.LLM_CIRCUIT_RECOVERY_SECONDS,
+            success_threshold=settings.LLM_CIRCUIT_HALF_OPEN_SUCCESSES
+        )
+
+        # Metriche
+        self._calls = 0
+        self._retries = 0
+        self._timeouts = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._hedge_skipped = 0
+        self._deadline_exceeded = 0
+
+    def get_client(self, stage: str) -> RateLimitedOpenAI:
+        """
+        Client da usare nei servizi al posto di AsyncOpenAI(...)
+
+        Args:
+            stage: Nome stage (chiave di stage_timeouts), determina timeout e hedging
+        """
+        return RateLimitedOpenAI(self, stage)
+
+    def _get_openai(self) -> AsyncOpenAI:
+        """AsyncOpenAI condiviso con pool httpx dimensionato"""
+        if self._client is None or self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=httpx.Timeout(self.timeout_seconds, connect=5.0)
+            )
+            self._client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=self._http_client,
+                max_retries=0  # Retry gestiti da create_chat_completion (deadline-aware)
+            )
+        return self._client
+
+    async def create_chat_completion(self, stage: str, **kwargs):
+        """
+        chat.completions.create con timeout per stage, retry e deadline
+
+        L'attesa sui bucket precede timeout e hedging del tentativo: una coda
+        locale lunga non diventa un timeout del provider (né retry né breaker)
+
+        Raises:
+            CircuitOpenError: circuit breaker aperto (nessuna chiamata eseguita)
+            DeadlineExceeded: deadline dello scontrino esaurita prima della chiamata
+            asyncio.TimeoutError / errori openai: tentativi esauriti o errore non transitorio
+        """
+        self._calls += 1
+        stage_timeout = self.stage_timeouts.get(stage, self.timeout_seconds)
+        estimated_tokens = self._estimate_tokens(
+            kwargs.get("messages", []),
+            kwargs.get("max_tokens")
+        )
+        attempt = 0
+
+        while True:
+            probe = self.breaker.check()
+
+            try:
+                await self._acquire(stage, estimated_tokens)
+
+                timeout = stage_timeout
+                left = deadline.remaining()
+                if left is not None:
+                    if left <= 0:
+                        self._refund(estimated_tokens)
+                        self._deadline_exceeded += 1
+                        raise DeadlineExceeded(f"Receipt deadline exceeded before {stage} call")
+                    timeout = min(timeout, left)
+                clipped = timeout < stage_timeout
+
+                response = await self._attempt(stage, kwargs, timeout, estimated_tokens)
+                self.breaker.record_success()
+                return response
+            except RETRYABLE_ERRORS as e:
+                # Timeout dovuto alla deadline dello scontrino: non è un guasto del provider
+                provider_failure = not (clipped and isinstance(e, asyncio.TimeoutError))
+                if isinstance(e, asyncio.TimeoutError):
+                    self._timeouts += 1
+                if attempt >= self.max_retries:
+                    if provider_failure:
+                        self.breaker.record_failure()
+                    elif probe:
+                        self.breaker.release_probe()
+                    raise
+
+                # Backoff esponenziale con jitter, solo se resta tempo prima della deadline
+                delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.0)
+                left = deadline.remaining()
+                if left is not None and left <= delay:
+                    if provider_failure:
+                        self.breaker.record_failure()
+                    elif probe:
+                        self.breaker.release_probe()
+                    raise
+
+                # La sonda si ripresenta a check() al prossimo tentativo
+                if probe:
+                    self.breaker.release_probe()
+                attempt += 1
+                self._retries += 1
+                print(f"   [OPENAI] {stage} retry {attempt}/{self.max_retries} in {delay:.2f}s ({type(e).__name__})")
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Errore non transitorio, deadline o annullamento: nessun esito per il breaker
+                if probe:
+                    self.breaker.release_probe()
+                raise
+
+    async def _acquire(self, stage: str, estimated_tokens: int):
+        """
+        Attende una richiesta e i token stimati, entro la deadline residua
+
+        Raises:
+            DeadlineExceeded: deadline esaurita in coda (unità già prelevate restituite)
+        """
+        acquired = []
+
+        async def wait_buckets() -> float:
+            waited = await self._requests.acquire(1)
+            acquired.append((self._requests, 1))
+            waited += await self._tokens.acquire(estimated_tokens)
+            acquired.append((self._tokens, estimated_tokens))
+            return waited
+
+        left = deadline.remaining()
+        try:
+            if left is None:
+                waited = await wait_buckets()
+            else:
+                waited = await asyncio.wait_for(wait_buckets(), max(0.0, left))
+        except asyncio.TimeoutError:
+            for bucket, amount in acquired:
+                bucket.adjust(amount)
+            self._deadline_exceeded += 1
+            raise DeadlineExceeded(f"Receipt deadline exceeded waiting for {stage} rate limit")
+
+        if waited > 0:
+            print(f"   [OPENAI] Rate limited: waited {waited:.2f}s")
+
+    def _try_acquire(self, estimated_tokens: int) -> bool:
+        """Preleva richiesta e token solo se disponibili subito (richiesta hedged)"""
+        if not self._requests.try_acquire(1):
+            return False
+        if not self._tokens.try_acquire(estimated_tokens):
+            self._requests.adjust(1)
+            return False
+        return True
+
+    def _refund(self, estimated_tokens: int):
+        """Restituisce le unità prelevate per una richiesta mai inviata"""
+        self._requests.adjust(1)
+        self._tokens.adjust(estimated_tokens)
+
+    async def _attempt(
+        self,
+        stage: str,
+        kwargs: Dict[str, Any],
+        timeout: float,
+        estimated_tokens: int
+    ):
+        """
+        Un tentativo entro timeout (bucket già prelevati); se abilitato, oltre
+        hedge_after secondi parte una seconda richiesta identica e vince la prima
+        risposta valida. La richiesta hedged non attende i bucket: se non c'è
+        quota subito viene saltata
+        """
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + timeout
+        hedge_at = None
+        if self.hedge_after > 0 and stage in HEDGED_STAGES and self.hedge_after < timeout:
+            hedge_at = loop.time() + self.hedge_after
+
+        primary = asyncio.ensure_future(self._call(kwargs, estimated_tokens))
+        pending = {primary}
+        last_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                wait_until = min(expires_at, hedge_at) if hedge_at is not None else expires_at
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0.0, wait_until - loop.time()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+
+                if done:
+                    continue
+
+                if hedge_at is not None and loop.time() < expires_at:
+                    # Coda lunga: richiesta di riserva (una sola per tentativo)
+                    hedge_at = None
+                    if self._try_acquire(estimated_tokens):
+                        self._hedged += 1
+                        print(f"   [OPENAI] {stage} hedged after {self.hedge_after:.1f}s")
+                        pending.add(asyncio.ensure_future(self._call(kwargs, estimated_tokens)))
+                    else:
+                        self._hedge_skipped += 1
+                    continue
+
+                raise asyncio.TimeoutError(f"{stage} timeout after {timeout:.1f}s")
+
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _call(self, kwargs: Dict[str, Any], estimated_tokens: int):
+        """
+        Singola richiesta (bucket già prelevati dal chiamante)
+
+        I token stimati (prompt ~4 caratteri/token + output atteso) vengono
+        corretti con usage.total_tokens
+        """
+        try:
+            response = await self._get_openai().chat.completions.create(**kwargs)
+        except Exception:
+            # Token non consumati (errore prima/durante la generazione): stima restituita
+            self._tokens.adjust(estimated_tokens)
+            raise
+
+        # Streaming (stream=True): usage non disponibile, resta la stima
+        usage = getattr(response, "usage", None)
+        if usage:
+            self._tokens.adjust(estimated_tokens - usage.total_tokens)
+        return response
+
+    def _estimate_tokens(
+        self,
+        messages: List[Dict[str, Any]],
+        max_tokens: Optional[int]
+    ) -> int:
+        prompt_chars = sum(len(str(message.get("content") or "")) for message in messages)
+        return prompt_chars // 4 + (max_tokens or self.default_output_tokens)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Metriche per health check"""
+        return {
+            "requests": self._requests.get_stats(),
+            "tokens": self._tokens.get_stats(),
+            "calls": self._calls,
+            "retries": self._retries,
+            "timeouts": self._timeouts,
+            "hedged": self._hedged,
+            "hedge_wins": self._hedge_wins,
+            "hedge_skipped": self._hedge_skipped,
+            "deadline_exceeded": self._deadline_exceeded
+        }
+
+    async def close(self):
+        """Chiude il pool HTTP condiviso (da chiamare nello shutdown event FastAPI)"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            self._client = None
+
+
+# Istanza globale
+openai_client_service = OpenAIClientService()
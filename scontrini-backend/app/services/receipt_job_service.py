@@ -0,0 +1,211 @@
+"""
+Receipt Job Service - Coda job asincroni per processing scontrini
+La richiesta HTTP accoda il lavoro e ritorna subito un job_id,
+un pool limitato di worker esegue la pipeline in background.
+Con CACHE_BACKEND=redis lo stato dei job è pubblicato nella cache condivisa:
+il polling funziona da qualsiasi worker uvicorn (l'esecuzione resta nel
+processo che ha accodato il job). Con la cache in-memory usare un solo worker
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.config import settings
+from app.services.blocking_executor import blocking_executor
+from app.services.cache_backend import cache_backend
+
+
+class ReceiptJobQueueFullError(Exception):
+    """Coda job piena: il chiamante deve riprovare più tardi"""
+
+
+class ReceiptJobService:
+    """Coda in-process di job di processing con worker pool limitato"""
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+
+    def __init__(self):
+        """Inizializza configurazioni da settings"""
+        self.num_workers = settings.RECEIPT_JOB_WORKERS
+        self.max_queue_size = settings.RECEIPT_JOB_QUEUE_SIZE
+        self.job_ttl_seconds = settings.RECEIPT_JOB_TTL_SECONDS
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+        # Stato job visibile agli altri processi (solo backend condiviso)
+        self._shared = None
+        if cache_backend.backend == "redis":
+            self._shared = cache_backend.namespace(
+                "receipt_jobs",
+                max_size=self.max_queue_size,
+                ttl_seconds=self.job_ttl_seconds
+            )
+
+    async def start(self):
+        """Avvia i worker (da chiamare nello startup event FastAPI)"""
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(worker_id))
+            for worker_id in range(self.num_workers)
+        ]
+        print(f"🧵 [JOBS] {self.num_workers} workers started (queue size: {self.max_queue_size})")
+
+    async def stop(self):
+        """Ferma i worker (da chiamare nello shutdown event FastAPI)"""
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def submit(
+        self,
+        handler: Callable[[], Awaitable[Any]],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Accoda un job
+
+        Args:
+            handler: Coroutine function senza argomenti che esegue il lavoro
+            metadata: Dati extra salvati sul job (es. household_id)
+
+        Returns:
+            Dict job appena creato (status=queued)
+
+        Raises:
+            RuntimeError: se i worker non sono stati avviati
+            ReceiptJobQueueFullError: se la coda è piena
+        """
+        if self._queue is None:
+            raise RuntimeError("Receipt job workers not started")
+
+        self._purge_expired()
+
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "status": self.STATUS_QUEUED,
+            "created_at": self._now(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "metadata": metadata or {},
+            "_expires_at": None
+        }
+
+        try:
+            self._queue.put_nowait((job_id, handler))
+        except asyncio.QueueFull:
+            raise ReceiptJobQueueFullError(
+                f"Receipt job queue full ({self.max_queue_size} jobs pending)"
+            )
+
+        self._jobs[job_id] = job
+        print(f"📥 [JOBS] Queued {job_id} (pending: {self._queue.qsize()})")
+        await self._publish(job)
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Ottieni job per ID, locale o di un altro worker (None se inesistente o scaduto)"""
+        self._purge_expired()
+        job = self._jobs.get(job_id)
+        if job is None and self._shared is not None:
+            job = await blocking_executor.run(self._shared.get, job_id)
+        return job
+
+    def get_stats(self) -> Dict[str, int]:
+        """Statistiche coda per health check"""
+        by_status = {
+            self.STATUS_QUEUED: 0,
+            self.STATUS_RUNNING: 0,
+            self.STATUS_COMPLETED: 0,
+            self.STATUS_FAILED: 0
+        }
+        for job in self._jobs.values():
+            by_status[job["status"]] += 1
+
+        return {
+            "workers": len(self._workers),
+            "pending": self._queue.qsize() if self._queue else 0,
+            **by_status
+        }
+
+    async def _worker(self, worker_id: int):
+        """Loop worker: preleva job dalla coda e li esegue uno alla volta"""
+        while True:
+            job_id, handler = await self._queue.get()
+            job = self._jobs.get(job_id)
+
+            try:
+                if job is None:
+                    continue
+
+                job["status"] = self.STATUS_RUNNING
+                job["started_at"] = self._now()
+                print(f"⚙️ [JOBS] Worker {worker_id} running {job_id}")
+                await self._publish(job)
+
+                try:
+                    job["result"] = await handler()
+                    job["status"] = self.STATUS_COMPLETED
+                except asyncio.CancelledError:
+                    job["status"] = self.STATUS_FAILED
+                    job["error"] = "Job cancelled (server shutdown)"
+                    raise
+                except Exception as e:
+                    # HTTPException espone il messaggio in .detail
+                    job["error"] = str(getattr(e, "detail", None) or e)
+                    job["status"] = self.STATUS_FAILED
+                    print(f"❌ [JOBS] {job_id} failed: {job['error']}")
+
+                job["finished_at"] = self._now()
+                job["_expires_at"] = time.monotonic() + self.job_ttl_seconds
+                print(f"✅ [JOBS] {job_id} {job['status']}")
+                await self._publish(job)
+
+            finally:
+                self._queue.task_done()
+
+    async def _publish(self, job: Dict[str, Any]):
+        """Scrive lo stato del job nella cache condivisa (best effort, TTL job_ttl_seconds)"""
+        if self._shared is None:
+            return
+
+        result = job["result"]
+        snapshot = {
+            **{key: value for key, value in job.items() if not key.startswith("_")},
+            "result": result.model_dump(mode="json") if hasattr(result, "model_dump") else result
+        }
+        try:
+            await blocking_executor.run(self._shared.set, job["job_id"], snapshot)
+        except Exception as e:
+            print(f"⚠️ [JOBS] Publish {job['job_id']} failed: {str(e)}")
+
+    def _purge_expired(self):
+        """Rimuove job terminati più vecchi del TTL"""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["_expires_at"] is not None and job["_expires_at"] <= now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _now(self) -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+
+# Istanza globale
+receipt_job_service = ReceiptJobService()
@@ -0,0 +1,416 @@
+"""
+Rule Interpret Service - Interpretazione deterministica nomi prodotti grezzi
+Espande abbreviazioni note da scontrino (LATTE PS, MOZZ, FRIZZ, GR, CONF, BIO...),
+riconosce brand e formato (app/utils/size_parser.py) e produce lo stesso
+formato di LLMInterpretService con un coverage score: la chiamata LLM serve
+solo quando il coverage è sotto soglia.
+I dizionari predefiniti si estendono con il lessico estratto dai mapping
+verificati (scripts/mine_abbreviation_lexicon.py), globale e per negozio
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from app.utils.abbreviation_alignment import fold
+from app.utils.size_parser import parse_size_and_unit
+
+
+# Abbreviazioni e parole note (token o n-gram maiuscoli) → espansione
+ABBREVIATIONS: Dict[str, str] = {
+    # Latticini
+    "LATTE": "latte",
+    "LAT": "latte",
+    "PS": "parzialmente scremato",
+    "P S": "parzialmente scremato",
+    "PARZ SCREM": "parzialmente scremato",
+    "SCR": "scremato",
+    "SCREM": "scremato",
+    "INT": "intero",
+    "UHT": "uht",
+    "AQ": "alta qualità",
+    "MOZZ": "mozzarella",
+    "MOZZARELLA": "mozzarella",
+    "YOG": "yogurt",
+    "YOGURT": "yogurt",
+    "FORM": "formaggio",
+    "FORMAGGIO": "formaggio",
+    "PARM": "parmigiano",
+    "REGG": "reggiano",
+    "GRAT": "grattugiato",
+    "BURRO": "burro",
+    "UOVA": "uova",
+    "RICOTTA": "ricotta",
+    # Salumi
+    "PROSC": "prosciutto",
+    "PROSCIUTTO": "prosciutto",
+    "CRU": "crudo",
+    "CRUDO": "crudo",
+    "COT": "cotto",
+    "COTTO": "cotto",
+    "SALAME": "salame",
+    # Bevande
+    "ACQ": "acqua",
+    "AC": "acqua",
+    "ACQUA": "acqua",
+    "MIN": "minerale",
+    "FRIZZ": "frizzante",
+    "FRIZ": "frizzante",
+    "FR": "frizzante",
+    "NAT": "naturale",
+    "BIRRA": "birra",
+    "VINO": "vino",
+    "SUCCO": "succo",
+    "CAFF": "caffè",
+    "CAFFE": "caffè",
+    # Dispensa
+    "PASTA": "pasta",
+    "SPAGH": "spaghetti",
+    "SPAGHETTI": "spaghetti",
+    "PENNE": "penne",
+    "RISO": "riso",
+    "FAR": "farina",
+    "FARINA": "farina",
+    "ZUCC": "zucchero",
+    "ZUCCHERO": "zucchero",
+    "POM": "pomodoro",
+    "POMOD": "pomodoro",
+    "PASS": "passata",
+    "PASSATA": "passata",
+    "TONNO": "tonno",
+    "OLIO": "olio",
+    "EVO": "extravergine di oliva",
+    "EXTRAV": "extravergine",
+    "BISC": "biscotti",
+    "BISCOTTI": "biscotti",
+    "FETT BISC": "fette biscottate",
+    "CIOCC": "cioccolato",
+    "CIOC": "cioccolato",
+    "PANE": "pane",
+    # Casa e igiene
+    "DET": "detersivo",
+    "DETERSIVO": "detersivo",
+    "AMMORB": "ammorbidente",
+    "PAV": "pavimenti",
+    "SAP": "sapone",
+    "SAPONE": "sapone",
+    # Caratteristiche
+    "BIO": "biologico",
+    "S GLUT": "senza glutine",
+    "SENZA GLUTINE": "senza glutine",
+    "S LATT": "senza lattosio",
+    "LIGHT": "light",
+    "SURG": "surgelato",
+    "FRESCO": "fresco",
+}
+
+# Token di confezione/cassa: riconosciuti ma esclusi dall'ipotesi
+NOISE_TOKENS = {"CONF", "CF", "PZ", "PEZZI", "BOTT", "SC", "X"}
+
+# Alias brand (maiuscolo, punteggiatura → spazio) → nome brand
+BRANDS: Dict[str, str] = {
+    "BARILLA": "Barilla",
+    "DE CECCO": "De Cecco",
+    "MULINO BIANCO": "Mulino Bianco",
+    "SANT ANNA": "Sant'Anna",
+    "S ANNA": "Sant'Anna",
+    "SANNA": "Sant'Anna",
+    "SAN BENEDETTO": "San Benedetto",
+    "S BENEDETTO": "San Benedetto",
+    "LEVISSIMA": "Levissima",
+    "SAN PELLEGRINO": "San Pellegrino",
+    "GRANAROLO": "Granarolo",
+    "PARMALAT": "Parmalat",
+    "GALBANI": "Galbani",
+    "MUTTI": "Mutti",
+    "CIRIO": "Cirio",
+    "RIO MARE": "Rio Mare",
+    "LAVAZZA": "Lavazza",
+    "DIVELLA": "Divella",
+    "VOIELLO": "Voiello",
+    "YOMO": "Yomo",
+    "MULLER": "Müller",
+    "FERRERO": "Ferrero",
+    "COCA COLA": "Coca-Cola",
+    "PERONI": "Peroni",
+    "DASH": "Dash",
+}
+
+# Tipo prodotto → (categoria, sottocategoria), come nel prompt di LLM Interpret
+PRODUCT_TYPES: Dict[str, Tuple[str, str]] = {
+    "latte": ("Freschi", "latte"),
+    "mozzarella": ("Freschi", "formaggi"),
+    "formaggio": ("Freschi", "formaggi"),
+    "parmigiano": ("Freschi", "formaggi"),
+    "ricotta": ("Freschi", "formaggi"),
+    "yogurt": ("Freschi", "yogurt"),
+    "burro": ("Freschi", "burro"),
+    "uova": ("Freschi", "uova"),
+    "prosciutto": ("Freschi", "salumi"),
+    "salame": ("Freschi", "salumi"),
+    "acqua": ("Bevande", "acqua"),
+    "birra": ("Bevande", "birra"),
+    "vino": ("Bevande", "vino"),
+    "succo": ("Bevande", "succhi"),
+    "caffè": ("Alimentari", "caffè"),
+    "pasta": ("Alimentari", "pasta"),
+    "spaghetti": ("Alimentari", "pasta"),
+    "penne": ("Alimentari", "pasta"),
+    "riso": ("Alimentari", "riso"),
+    "farina": ("Alimentari", "farina"),
+    "zucchero": ("Alimentari", "zucchero"),
+    "passata": ("Alimentari", "conserve"),
+    "pomodoro": ("Alimentari", "conserve"),
+    "tonno": ("Alimentari", "conserve"),
+    "olio": ("Alimentari", "olio"),
+    "biscotti": ("Alimentari", "biscotti"),
+    "fette biscottate": ("Alimentari", "colazione"),
+    "cioccolato": ("Alimentari", "dolciumi"),
+    "pane": ("Alimentari", "pane"),
+    "detersivo": ("Pulizia Casa", "detersivi"),
+    "ammorbidente": ("Pulizia Casa", "detersivi"),
+    "sapone": ("Igiene Personale", "sapone"),
+}
+
+# Unità da scontrino → unità per size_parser
+UNIT_ALIASES = {"G": "g", "GR": "g", "KG": "kg", "L": "L", "LT": "L", "ML": "ml", "CL": "cl"}
+
+MAX_NGRAM = 3
+
+# Lessico estratto: formato artefatto e quota minima del significato prevalente
+LEXICON_FORMAT = 1
+LEXICON_MIN_SHARE = 0.6
+
+_SIZE_PATTERN = re.compile(r"^(?:(\d+)X)?(\d+(?:[.,]\d+)?)([A-Z]{1,2})?(?:X(\d+))?$")
+_PACK_PATTERN = re.compile(r"^X\d+$")
+_NUMBER_PATTERN = re.compile(r"^\d+(?:[.,]\d+)?$")
+
+
+class RuleInterpretService:
+    """Interpretazione rule-based (nessuna chiamata esterna)"""
+
+    def __init__(
+        self,
+        abbreviations: Optional[Dict[str, str]] = None,
+        brands: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            abbreviations: Abbreviazioni aggiuntive (sovrascrivono quelle predefinite)
+            brands: Alias brand aggiuntivi
+        """
+        self._base_abbreviations = {**ABBREVIATIONS, **(abbreviations or {})}
+        self._base_brands = {**BRANDS, **(brands or {})}
+
+        self.abbreviations = dict(self._base_abbreviations)
+        self.brands = dict(self._base_brands)
+        self.store_abbreviations: Dict[str, Dict[str, str]] = {}
+        self.store_brands: Dict[str, Dict[str, str]] = {}
+        self.lexicon_version: Optional[int] = None
+
+    def load_lexicon(self, path: str, min_support: int) -> bool:
+        """
+        Carica il lessico estratto dai mapping verificati
+
+        Precedenza: lessico del negozio > dizionari predefiniti > lessico globale.
+        Per ogni abbreviazione si tiene il significato prevalente se ha almeno
+        min_support occorrenze e LEXICON_MIN_SHARE del totale
+
+        Returns:
+            True se caricato, False se assente o di formato non supportato
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                lexicon = json.load(f)
+        except FileNotFoundError:
+            print(f"   [RULE INTERPRET] No mined lexicon at {path}: built-in dictionaries only")
+            return False
+        except (OSError, ValueError) as e:
+            print(f"⚠️ [RULE INTERPRET] Lexicon load error: {str(e)}")
+            return False
+
+        if lexicon.get("format") != LEXICON_FORMAT:
+            print(f"⚠️ [RULE INTERPRET] Lexicon format {lexicon.get('format')} not supported")
+            return False
+
+        abbreviations = lexicon.get("abbreviations", {})
+        brands = lexicon.get("brands", {})
+
+        self.abbreviations = {
+            **_select_supported(abbreviations.get("global", {}), min_support),
+            **self._base_abbreviations
+        }
+        self.brands = {
+            **_select_supported(brands.get("global", {}), min_support),
+            **self._base_brands
+        }
+        self.store_abbreviations = {
+            store: _select_supported(counts, min_support)
+            for store, counts in abbreviations.get("stores", {}).items()
+        }
+        self.store_brands = {
+            store: _select_supported(counts, min_support)
+            for store, counts in brands.get("stores", {}).items()
+        }
+        self.lexicon_version = lexicon.get("version")
+
+        print(
+            f"   [RULE INTERPRET] Lexicon v{self.lexicon_version}: "
+            f"{len(self.abbreviations)} abbreviations, {len(self.brands)} brands, "
+            f"{len(self.store_abbreviations)} stores"
+        )
+        return True
+
+    def interpret_raw_name(
+        self,
+        raw_name: str,
+        store_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Interpreta nome grezzo con dizionari e regole
+
+        Args:
+            raw_name: Nome grezzo da scontrino (es. "LATTE PS GRANAROLO 1LT")
+            store_name: Nome negozio (lessico specifico della catena, se estratto)
+
+        Returns:
+            Stesso formato di LLMInterpretService.interpret_raw_name più
+            "coverage": frazione di token riconosciuti (0-1)
+        """
+        tokens = tokenize(raw_name)
+        store = store_key(store_name)
+        store_abbreviations = self.store_abbreviations.get(store, {})
+        store_brands = self.store_brands.get(store, {})
+
+        brand = None
+        size = None
+        unit_type = None
+        words: List[str] = []
+        unknown: List[str] = []
+        covered = 0
+
+        i = 0
+        while i < len(tokens):
+            # Brand e abbreviazioni multi-token: match più lungo
+            matched = False
+            for n in range(min(MAX_NGRAM, len(tokens) - i), 0, -1):
+                gram = " ".join(tokens[i:i + n])
+                gram_brand = store_brands.get(gram) or self.brands.get(gram)
+                expansion = store_abbreviations.get(gram) or self.abbreviations.get(gram)
+                if brand is None and gram_brand:
+                    brand = gram_brand
+                elif expansion:
+                    words.append(expansion)
+                else:
+                    continue
+                covered += n
+                i += n
+                matched = True
+                break
+            if matched:
+                continue
+
+            token = tokens[i]
+            parsed = _parse_size_token(token)
+            if parsed is None and token in UNIT_ALIASES and i + 1 < len(tokens):
+                parsed = _parse_size_token(tokens[i + 1] + token)  # "GR 500"
+                if parsed is not None:
+                    covered += 1
+                    i += 1
+            if parsed is None and _NUMBER_PATTERN.match(token) \
+                    and i + 1 < len(tokens) and tokens[i + 1] in UNIT_ALIASES:
+                parsed = _parse_size_token(token + tokens[i + 1])  # "500 G"
+                if parsed is not None:
+                    covered += 1
+                    i += 1
+
+            if parsed is not None:
+                if size is None:
+                    size, unit_type = parsed
+                covered += 1
+            elif token in NOISE_TOKENS or _PACK_PATTERN.match(token):
+                covered += 1
+            else:
+                unknown.append(token.lower())
+            i += 1
+
+        product_type, category, subcategory = _find_product_type(words)
+
+        hypothesis_parts = ([brand] if brand else []) + words + unknown
+        if size:
+            hypothesis_parts.append(f"{size}{unit_type or ''}")
+        hypothesis = " ".join(hypothesis_parts) or raw_name
+        hypothesis = hypothesis[:1].upper() + hypothesis[1:]  # raw_name vuoto: nessun indice
+
+        tags = []
+        for word in words:
+            tag = word.replace(" ", "-")
+            if tag not in tags:
+                tags.append(tag)
+        if brand:
+            tags.append(brand.lower())
+
+        coverage = covered / len(tokens) if tokens else 0.0
+        return {
+            "success": True,
+            "hypothesis": hypothesis,
+            "brand": brand,
+            "product_type": product_type,
+            "size": size,
+            "unit_type": unit_type,
+            "category": category,
+            "subcategory": subcategory,
+            "tags": tags,
+            "coverage": round(coverage, 3),
+            "reasoning": (
+                f"Rule-based: {covered}/{len(tokens)} token riconosciuti"
+                + (f", non riconosciuti: {' '.join(unknown)}" if unknown else "")
+            )
+        }
+
+
+def tokenize(raw_name: str) -> List[str]:
+    """Maiuscolo senza accenti, punteggiatura come separatore (decimali preservati)"""
+    return fold(raw_name)
+
+
+def store_key(store_name: Optional[str]) -> Optional[str]:
+    """Chiave negozio del lessico (stessa normalizzazione dei token)"""
+    return " ".join(fold(store_name)) or None
+
+
+def _select_supported(counts: Dict[str, Dict[str, int]], min_support: int) -> Dict[str, str]:
+    """{token: {significato: occorrenze}} → {token: significato prevalente}"""
+    selected = {}
+    for token, meanings in counts.items():
+        meaning, support = max(meanings.items(), key=lambda entry: entry[1])
+        if support >= min_support and support >= LEXICON_MIN_SHARE * sum(meanings.values()):
+            selected[token] = meaning
+    return selected
+
+
+def _parse_size_token(token: str) -> Optional[Tuple[str, Optional[str]]]:
+    """"1,5LT", "500GR", "6X1.5L", "1.5X6" → (quantità, unità) via size_parser"""
+    match = _SIZE_PATTERN.match(token)
+    if not match:
+        return None
+    _, number, unit, _ = match.groups()
+    number = number.replace(",", ".")
+    if unit is None:
+        # Numero con moltiplicatore (es. "1.5X6"): formato senza unità
+        return (number, None) if "X" in token else None
+    if unit not in UNIT_ALIASES:
+        return None
+    quantity, normalized_unit = parse_size_and_unit(f"{number}{UNIT_ALIASES[unit]}")
+    return quantity, normalized_unit
+
+
+def _find_product_type(words: List[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Primo tipo prodotto riconosciuto tra le parole espanse"""
+    for word in words:
+        if word in PRODUCT_TYPES:
+            category, subcategory = PRODUCT_TYPES[word]
+            return word, category, subcategory
+    return None, None, None
+
+
+# Istanza globale
+rule_interpret_service = RuleInterpretService()
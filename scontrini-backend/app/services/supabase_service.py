@@ -84,6 +84,14 @@ class SupabaseService:
         
         return response.data[0] if response.data else None
     
+    def delete_receipt(self, receipt_id: str) -> None:
+        """Elimina scontrino"""
+        
+        self.client.table("receipts")\
+            .delete()\
+            .eq("id", receipt_id)\
+            .execute()
+    
     def get_receipts_by_household(
         self,
         household_id: str,
@@ -143,6 +151,61 @@ class SupabaseService:
         
         return response.data
     
+    def get_receipt_item(self, receipt_item_id: str) -> Optional[Dict]:
+        """Ottieni singolo item per ID"""
+        
+        response = self.client.table("receipt_items")\
+            .select("*")\
+            .eq("id", receipt_item_id)\
+            .execute()
+        
+        return response.data[0] if response.data else None
+    
+    # ===================================
+    # PRODUCT MAPPINGS
+    # ===================================
+    
+    def get_mapped_product_ids(self, raw_names: List[str]) -> Dict[str, str]:
+        """
+        Ottieni normalized_product_id mappati per più raw_name in una sola query
+        
+        Returns:
+            Dict raw_name → normalized_product_id (solo raw_name con mapping)
+        """
+        
+        names = list(dict.fromkeys(raw_names))
+        if not names:
+            return {}
+        
+        response = self.client.table("product_mappings")\
+            .select("raw_name, normalized_product_id")\
+            .in_("raw_name", names)\
+            .execute()
+        
+        mapped = {}
+        for row in response.data or []:
+            mapped.setdefault(row["raw_name"], row["normalized_product_id"])
+        return mapped
+    
+    def upsert_auto_mappings(self, rows: List[Dict]) -> int:
+        """
+        Upsert batch di mapping auto-verificati (verified_by_user=false) via RPC
+        
+        Args:
+            rows: Lista di dict con: raw_name, store_name, lookup_key,
+                  normalized_product_id, confidence_score, interpretation_details
+        
+        Returns:
+            Numero di mapping inseriti/aggiornati
+        """
+        
+        response = self.client.rpc(
+            "upsert_auto_mappings",
+            {"p_rows": rows}
+        ).execute()
+        
+        return response.data or 0
+    
     # ===================================
     # HOUSEHOLDS
     # ===================================
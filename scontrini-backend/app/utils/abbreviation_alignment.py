@@ -0,0 +1,105 @@
+"""
+Abbreviation Alignment Utility
+Allinea i token di un nome grezzo da scontrino con le parole del nome canonico
+verificato (es. "MOZZ" → "MOZZARELLA", "SANNA" → "SANT ANNA", "PS" → "PARZIALMENTE
+SCREMATO"): base per il mining del lessico abbreviazioni/brand
+"""
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+
+# Parole che le abbreviazioni possono omettere (es. "EVO" → "EXTRA VERGINE DI OLIVA")
+STOPWORDS = {"DI", "DEL", "DELLA", "DA", "E", "AL", "ALLA", "CON", "IN", "PER"}
+
+MAX_WORDS = 4  # Stopword incluse
+
+
+def fold(text: Optional[str]) -> List[str]:
+    """Maiuscolo ASCII senza accenti, punteggiatura come separatore"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = text.encode("ascii", "ignore").decode("ascii").upper()
+    text = re.sub(r"(?<!\d)[.,]|[.,](?!\d)", " ", text)
+    text = re.sub(r"[^A-Z0-9.,]+", " ", text)
+    return text.split()
+
+
+def is_subsequence(short: str, long: str) -> bool:
+    """short ottenibile da long togliendo caratteri (troncamento, vocali omesse)"""
+    chars = iter(long)
+    return all(char in chars for char in short)
+
+
+def abbreviates(raw: str, words: List[str]) -> Optional[int]:
+    """
+    Quante parole consecutive di words (dalla prima) sono abbreviate da raw
+
+    Ogni parola contribuisce una parte non vuota che inizia con la sua
+    iniziale ed è sottosequenza della parola; le stopword possono essere
+    saltate (mai la prima parola). Preferisce il minor numero di parole.
+
+    Returns:
+        Numero di parole consumate, None se raw non è compatibile
+    """
+    for count in range(1, min(MAX_WORDS, len(words)) + 1):
+        if _split_matches(raw, words[:count]):
+            return count
+    return None
+
+
+def _split_matches(raw: str, words: List[str], first: bool = True) -> bool:
+    if not words:
+        return not raw
+    word = words[0]
+    if raw and raw[0] == word[0]:
+        # Parte più lunga possibile per prima (troncamenti comuni)
+        for end in range(len(raw), 0, -1):
+            if is_subsequence(raw[:end], word) and _split_matches(raw[end:], words[1:], False):
+                return True
+    # Stopword intermedia omessa
+    return not first and word in STOPWORDS and _split_matches(raw, words[1:], False)
+
+
+def align(
+    raw_tokens: List[str],
+    words: List[str],
+    used: Optional[List[bool]] = None
+) -> List[Tuple[int, int, int]]:
+    """
+    Allinea token grezzi a parole canoniche (ordine libero, ogni parola usata una volta)
+
+    Args:
+        raw_tokens: Token del nome grezzo (fold)
+        words: Parole del nome canonico (fold)
+        used: Parole già assegnate (aggiornato in place)
+
+    Returns:
+        Lista (indice token, indice prima parola, numero parole)
+    """
+    if used is None:
+        used = [False] * len(words)
+
+    alignments = []
+    for token_idx, token in enumerate(raw_tokens):
+        best = None
+        for start in range(len(words)):
+            if used[start]:
+                continue
+            free = 0
+            while start + free < len(words) and not used[start + free] and free < MAX_WORDS:
+                free += 1
+            count = abbreviates(token, words[start:start + free])
+            if count is None:
+                continue
+            # Match esatto vince, poi meno parole, poi posizione
+            key = (token != words[start], count, start)
+            if best is None or key < best[0]:
+                best = (key, start, count)
+        if best is None:
+            continue
+        _, start, count = best
+        for idx in range(start, start + count):
+            used[idx] = True
+        alignments.append((token_idx, start, count))
+
+    return alignments
@@ -0,0 +1,115 @@
+"""
+Circuit Breaker Utility
+Dopo failure_threshold errori consecutivi il circuito si apre: le chiamate
+falliscono subito per recovery_seconds, poi passano in prova (half-open):
+una sola chiamata sonda alla volta, le altre sono rifiutate finché
+success_threshold successi lo richiudono (un errore lo riapre)
+"""
+import time
+from typing import Any, Dict, Optional
+
+
+class CircuitOpenError(Exception):
+    """Circuito aperto: chiamata non eseguita"""
+
+
+class CircuitBreaker:
+    """Stato closed → open → half_open → closed (solo in-process)"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_seconds: float,
+        success_threshold: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.success_threshold = success_threshold
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._half_open_successes = 0
+        self._probe_in_flight = False
+        self._opened_at: Optional[float] = None
+
+        # Metriche
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Stato corrente (open → half_open allo scadere di recovery_seconds)"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_seconds:
+            self._state = self.HALF_OPEN
+            self._half_open_successes = 0
+            self._probe_in_flight = False
+            print(f"   [CIRCUIT {self.name}] half-open: probing")
+        return self._state
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def check(self) -> bool:
+        """
+        Da chiamare prima dell'operazione protetta
+
+        Returns:
+            True se la chiamata è la sonda half-open: va chiusa con
+            record_success(), record_failure() o release_probe()
+
+        Raises:
+            CircuitOpenError: se il circuito è aperto o la sonda è già in corso
+        """
+        state = self.state
+        if state == self.OPEN or (state == self.HALF_OPEN and self._probe_in_flight):
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit '{self.name}' open")
+        if state == self.HALF_OPEN:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self):
+        """Sonda terminata senza esito sul provider (errore non transitorio, annullamento)"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            self._half_open_successes += 1
+            if self._half_open_successes >= self.success_threshold:
+                self._state = self.CLOSED
+                print(f"   [CIRCUIT {self.name}] closed")
+
+    def record_failure(self):
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+        state = self.state
+        if state == self.HALF_OPEN or (
+            state == self.CLOSED and self._consecutive_failures >= self.failure_threshold
+        ):
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+            print(f"⚠️ [CIRCUIT {self.name}] open for {self.recovery_seconds:.0f}s after {self._consecutive_failures} consecutive failures")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Metriche per health check"""
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_seconds": (
+                round(max(0.0, self.recovery_seconds - (time.monotonic() - self._opened_at)), 1)
+                if state == self.OPEN else None
+            )
+        }
@@ -0,0 +1,47 @@
+"""
+Deadline Utility
+Scadenza assoluta propagata via contextvar: impostata una volta per scontrino,
+vale per il task corrente e per i task figli (gather, ensure_future)
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Tempo a disposizione per l'operazione esaurito"""
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    Imposta la scadenza a now + seconds nel blocco
+
+    Una scadenza esterna più stretta resta valida; seconds None o <= 0 non imposta nulla
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+
+    deadline_at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline_at = min(deadline_at, current)
+
+    token = _deadline.set(deadline_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Secondi rimasti alla scadenza corrente (None se nessuna scadenza)"""
+    deadline_at = _deadline.get()
+    if deadline_at is None:
+        return None
+    return deadline_at - time.monotonic()
@@ -0,0 +1,124 @@
+"""
+JSON Stream Utility
+Decodifica incrementale di un oggetto JSON ricevuto a pezzi (streaming LLM):
+emette ogni elemento di un array top-level (es. "items") appena è completo
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+
+class JSONArrayStreamDecoder:
+    """
+    Scanner a stati su {"campo": valore, ..., "<array_key>": [{...}, {...}], ...}
+
+    - feed(chunk) ritorna gli oggetti dell'array completati nel chunk
+    - fields contiene i valori scalari top-level già completi (es. store_name)
+    - array_started diventa True all'apertura dell'array
+    Il documento completo va comunque validato con json.loads alla fine
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.fields: Dict[str, Any] = {}
+        self.array_started = False
+
+        self._text = ""
+        self._pos = 0  # Caratteri già scansionati
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+        self._array_depth: Optional[int] = None  # Profondità dentro l'array cercato
+        self._element_start: Optional[int] = None
+
+        # Coppia chiave/valore top-level in corso
+        self._last_string_start: Optional[int] = None
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Aggiunge testo e ritorna gli elementi dell'array completati"""
+        self._text += chunk
+        text = self._text
+
+        completed = []
+        for i in range(self._pos, len(text)):
+            char = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(text, i)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._last_string_start = i
+            elif char in "{[":
+                if (
+                    char == "[" and self._depth == 1
+                    and self._current_key == self.array_key and self._array_depth is None
+                ):
+                    self._array_depth = self._depth + 1
+                    self.array_started = True
+                elif char == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._element_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if (
+                    char == "}" and self._element_start is not None
+                    and self._depth == self._array_depth
+                ):
+                    element = self._decode(text[self._element_start:i + 1])
+                    if isinstance(element, dict):
+                        completed.append(element)
+                    self._element_start = None
+                elif char == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                    self._array_depth = None
+                    self._current_key = None
+                if self._depth == 0:
+                    self._close_scalar(text, i)
+            elif self._depth == 1:
+                if char == ":":
+                    self._current_key = self._last_string
+                    self._value_start = i + 1
+                elif char == ",":
+                    self._close_scalar(text, i)
+
+        self._pos = len(text)
+        return completed
+
+    def _close_string(self, text: str, end: int):
+        """Stringa chiusa: a profondità 1 è una chiave o un valore top-level"""
+        if self._depth != 1 or self._last_string_start is None:
+            return
+        self._last_string = self._decode(text[self._last_string_start:end + 1])
+
+    def _close_scalar(self, text: str, end: int):
+        """Fine valore top-level (virgola o chiusura oggetto): salva se scalare"""
+        if self._current_key is None or self._value_start is None:
+            return
+        raw = text[self._value_start:end].strip()
+        if raw and raw[0] not in "{[":
+            value = self._decode(raw)
+            if value is not _INVALID:
+                self.fields[self._current_key] = value
+        self._current_key = None
+        self._value_start = None
+
+    @staticmethod
+    def _decode(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return _INVALID
+
+
+_INVALID = object()
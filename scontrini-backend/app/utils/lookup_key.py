@@ -0,0 +1,109 @@
+"""
+Lookup Key Utility
+Chiave di lookup cache tollerante a variazioni di formattazione e OCR:
+"COCA COLA 1,5L", "COCA-COLA 1.5 L" e "C0CA COLA 1.5L" → "COCACOLA1.5L"
+
+Tra due parole numeriche adiacenti resta un separatore ("ACQUA 1 5L" → "ACQUA1_5L"),
+altrimenti collasserebbero su formati diversi ("ACQUA 15L" → "ACQUA15L").
+Se cambiano le regole, ricalcolare le chiavi esistenti:
+python -m scripts.backfill_lookup_keys --all
+"""
+import re
+import unicodedata
+from typing import Optional
+
+
+# Cifre lette al posto di lettere dentro parole (es. C0CA → COCA)
+_DIGIT_TO_LETTER = {"0": "O", "1": "I", "5": "S", "8": "B"}
+
+# Lettere lette al posto di cifre dentro numeri (es. 1O0G → 100G)
+_LETTER_TO_DIGIT = {"O": "0", "I": "1", "L": "1", "S": "5", "B": "8"}
+
+# Separatore decimale: virgola o punto tra cifre, con eventuali spazi OCR
+_DECIMAL_SEPARATOR = re.compile(r"(?<=\d)\s*[.,]\s*(?=\d)")
+
+# Zeri finali dei decimali (1.50 → 1.5, 1.0 → 1)
+_TRAILING_DECIMAL_ZEROS = re.compile(r"(\d)\.(\d*?)0+(?!\d)")
+
+# Punti non decimali (abbreviazioni tipo "P.S.", "YOG.")
+_NON_DECIMAL_DOT = re.compile(r"(?<!\d)\.|\.(?!\d)")
+
+# "O" letta al posto di zero dopo una cifra (5OO G → 500G), fino a fine numero o unità
+_LETTER_O_AS_ZERO = re.compile(r"(?<=\d)O+(?=\d|G|KG|L|ML|CL|$)")
+
+# Tutto ciò che non è lettera, cifra o punto decimale
+_NON_KEY_CHARS = re.compile(r"[^A-Z0-9.]+")
+
+# Separatore tra parola che finisce e parola che inizia con una cifra
+_NUMERIC_SEPARATOR = "_"
+
+
+def _strip_accents(text: str) -> str:
+    """Rimuove accenti (PERÒ → PERO)"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _fold_ocr_confusions(token: str) -> str:
+    """
+    Corregge le confusioni OCR più comuni in base ai caratteri vicini:
+    cifra tra due lettere → lettera, lettera tra due cifre → cifra
+    """
+    chars = list(token)
+    for i in range(1, len(chars) - 1):
+        prev_char, char, next_char = token[i - 1], token[i], token[i + 1]
+        if char in _DIGIT_TO_LETTER and prev_char.isalpha() and next_char.isalpha():
+            chars[i] = _DIGIT_TO_LETTER[char]
+        elif char in _LETTER_TO_DIGIT and prev_char.isdigit() and next_char.isdigit():
+            chars[i] = _LETTER_TO_DIGIT[char]
+
+    # Zero iniziale seguito da sole lettere (0LIO → OLIO)
+    if len(token) > 2 and token[0] == "0" and token[1:].isalpha():
+        chars[0] = "O"
+
+    folded = "".join(chars)
+    return _LETTER_O_AS_ZERO.sub(lambda m: "0" * len(m.group(0)), folded)
+
+
+def _normalize_decimals(text: str) -> str:
+    """Unifica separatore decimale e rimuove zeri finali"""
+    text = _DECIMAL_SEPARATOR.sub(".", text)
+    text = _TRAILING_DECIMAL_ZEROS.sub(
+        lambda m: f"{m.group(1)}.{m.group(2)}" if m.group(2) else m.group(1),
+        text
+    )
+    return text
+
+
+def build_lookup_key(raw_name: Optional[str]) -> Optional[str]:
+    """
+    Calcola la chiave di lookup cache di un raw_name.
+
+    Passi: maiuscolo senza accenti, separatore decimale unificato,
+    confusioni OCR corrette per parola, punteggiatura e spazi rimossi
+    (tranne tra due cifre di parole diverse, unite da "_").
+
+    Args:
+        raw_name: Nome grezzo dallo scontrino
+
+    Returns:
+        Chiave normalizzata (None se raw_name vuoto o senza caratteri utili)
+    """
+    if not raw_name or not isinstance(raw_name, str):
+        return None
+
+    text = _strip_accents(raw_name).upper()
+    text = _normalize_decimals(text)
+    text = _NON_DECIMAL_DOT.sub(" ", text)
+
+    # Parole separate da spazi/punteggiatura (il punto decimale resta nella parola)
+    tokens = [t for t in _NON_KEY_CHARS.split(text) if t]
+    tokens = [_fold_ocr_confusions(t) for t in tokens]
+
+    key = ""
+    for token in tokens:
+        if key and key[-1].isdigit() and token[0].isdigit():
+            key += _NUMERIC_SEPARATOR
+        key += token
+
+    return key or None
@@ -0,0 +1,56 @@
+"""
+Single Flight Utility
+Deduplica chiamate async concorrenti con la stessa chiave:
+il primo chiamante esegue il lavoro, gli altri attendono lo stesso risultato
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Gruppo di chiamate in corso indicizzate per chiave (solo in-process)"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0  # Chiamate totali a do()
+        self.executions = 0  # Esecuzioni reali di func
+        self.deduplicated = 0  # Chiamate servite da un'esecuzione già in corso
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Esegue func() una sola volta per chiave tra chiamanti concorrenti
+
+        Args:
+            key: Chiave di deduplica
+            func: Coroutine function senza argomenti
+
+        Returns:
+            Risultato condiviso (stesso oggetto per tutti i chiamanti)
+        """
+        self.calls += 1
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.deduplicated += 1
+
+        # shield: la cancellazione di un chiamante non cancella il lavoro condiviso
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        """Rimuove la chiave a lavoro terminato (solo se è ancora lo stesso task)"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Contatori chiamate risparmiate"""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._inflight)
+        }
@@ -0,0 +1,113 @@
+"""
+Token Bucket Utility
+Limite di velocità async: chi supera il limite attende il proprio turno (FIFO)
+invece di fallire
+"""
+import asyncio
+import time
+from typing import Any, Dict
+
+
+class TokenBucket:
+    """Bucket ricaricato in continuo a rate_per_minute unità, capienza = un minuto di quota"""
+
+    def __init__(self, rate_per_minute: float):
+        """
+        Args:
+            rate_per_minute: Unità (richieste, token...) concesse al minuto; <= 0 disabilita il limite
+        """
+        self.enabled = rate_per_minute > 0
+        self.capacity = float(rate_per_minute)
+        self.rate_per_second = rate_per_minute / 60.0
+
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()  # Un solo chiamante alla volta: attese in ordine di arrivo
+
+        # Metriche
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.waiting = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Preleva amount unità, attendendo la ricarica se necessario
+
+        Args:
+            amount: Unità richieste (limitate alla capienza: una richiesta enorme non resta bloccata)
+
+        Returns:
+            Secondi di attesa
+        """
+        if not self.enabled:
+            return 0.0
+
+        amount = min(float(amount), self.capacity)
+        self.waiting += 1
+        try:
+            async with self._lock:
+                self._refill()
+                waited = 0.0
+                if self._level < amount:
+                    waited = (amount - self._level) / self.rate_per_second
+                    self.waits += 1
+                    self.wait_seconds += waited
+                    await asyncio.sleep(waited)
+                    self._refill()
+                self._level -= amount
+                self.acquired += 1
+                return waited
+        finally:
+            self.waiting -= 1
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        """
+        Preleva amount unità solo se disponibili subito e senza chiamanti in coda
+
+        Returns:
+            True se prelevate (nessuna attesa), False altrimenti
+        """
+        if not self.enabled:
+            return True
+
+        amount = min(float(amount), self.capacity)
+        if self.waiting or self._lock.locked():
+            return False
+        self._refill()
+        if self._level < amount:
+            return False
+        self._level -= amount
+        self.acquired += 1
+        return True
+
+    def adjust(self, amount: float):
+        """
+        Corregge il livello dopo il consumo reale (es. token effettivi vs stimati)
+
+        amount > 0 restituisce unità stimate in eccesso; amount < 0 addebita
+        il consumo non stimato (il livello può andare in negativo: i prossimi attendono)
+        """
+        if not self.enabled:
+            return
+        self._refill()
+        self._level = min(self.capacity, self._level + amount)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Metriche per health check"""
+        if self.enabled:
+            self._refill()
+        return {
+            "enabled": self.enabled,
+            "rate_per_minute": self.capacity,
+            "available": round(self._level, 1) if self.enabled else None,
+            "acquired": self.acquired,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 2),
+            "waiting": self.waiting
+        }
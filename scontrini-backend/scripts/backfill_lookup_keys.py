@@ -0,0 +1,73 @@
+"""
+Backfill lookup_key su product_mappings
+Calcola la chiave con app/utils/lookup_key.py per i mapping che non ce l'hanno
+(migration perf_004). Idempotente: rieseguibile dopo import esterni di mapping.
+
+Uso (da scontrini-backend/):
+    python -m scripts.backfill_lookup_keys [--batch-size 500] [--all]
+"""
+import argparse
+from app.services.supabase_service import supabase_service
+from app.utils.lookup_key import build_lookup_key
+
+
+def backfill(batch_size: int, recompute_all: bool) -> int:
+    """
+    Aggiorna lookup_key a blocchi
+
+    Args:
+        batch_size: Righe per pagina/RPC
+        recompute_all: Ricalcola anche le chiavi già presenti (dopo modifiche a lookup_key.py)
+
+    Returns:
+        Numero di mapping aggiornati
+    """
+    updated = 0
+    last_id = None
+
+    while True:
+        query = supabase_service.client.table("product_mappings")\
+            .select("id, raw_name, lookup_key")\
+            .order("id")\
+            .limit(batch_size)
+
+        if last_id:
+            query = query.gt("id", last_id)
+        if not recompute_all:
+            query = query.is_("lookup_key", "null")
+
+        rows = query.execute().data or []
+        if not rows:
+            break
+
+        last_id = rows[-1]["id"]
+        changes = [
+            {"id": row["id"], "lookup_key": build_lookup_key(row["raw_name"])}
+            for row in rows
+            if build_lookup_key(row["raw_name"]) != row.get("lookup_key")
+        ]
+
+        if changes:
+            response = supabase_service.client.rpc(
+                "set_mapping_lookup_keys",
+                {"p_rows": changes}
+            ).execute()
+            updated += response.data or 0
+
+        print(f"   [BACKFILL] {updated} mappings updated (last id {last_id})")
+
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill product_mappings.lookup_key")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--all", action="store_true", help="Ricalcola tutte le chiavi")
+    args = parser.parse_args()
+
+    total = backfill(args.batch_size, args.all)
+    print(f"✅ Backfill completato: {total} mappings aggiornati")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Mining lessico abbreviazioni/brand da product_mappings verificati
+Allinea i token di raw_name con canonical_name/brand del prodotto verificato
+(app/utils/abbreviation_alignment.py) e conta le coppie per negozio e globali.
+L'artefatto JSON versionato viene caricato all'avvio dal normalizzatore
+(RuleInterpretService.load_lexicon, soglia RULE_INTERPRET_LEXICON_MIN_SUPPORT).
+
+Incrementale: elabora solo i mapping verificati/creati dopo il watermark
+dell'artefatto e somma i conteggi. Un mapping riverificato dopo il watermark
+viene contato di nuovo: --full ricostruisce da zero.
+
+Uso (da scontrini-backend/):
+    python -m scripts.mine_abbreviation_lexicon [--output PATH] [--full] [--batch-size 500]
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.config import settings
+from app.services.rule_interpret_service import LEXICON_FORMAT, NOISE_TOKENS, UNIT_ALIASES, store_key
+from app.services.supabase_service import supabase_service
+from app.utils.abbreviation_alignment import align, fold
+
+
+def extract_pairs(
+    raw_name: str,
+    canonical_name: str,
+    brand: Optional[str]
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    Coppie (abbreviazione → espansione) e (alias → brand) di un mapping
+
+    Returns:
+        (abbreviazioni, alias brand)
+    """
+    raw_tokens = fold(raw_name)
+    eligible = [
+        idx for idx, token in enumerate(raw_tokens)
+        if not any(char.isdigit() for char in token)
+        and token not in UNIT_ALIASES and token not in NOISE_TOKENS
+    ]
+
+    brand_words = fold(brand)
+    words = fold(canonical_name)
+
+    # Parole del brand tolte dal nome canonico (di solito prefisso)
+    for start in range(len(words) - len(brand_words) + 1):
+        if brand_words and words[start:start + len(brand_words)] == brand_words:
+            words = words[:start] + words[start + len(brand_words):]
+            break
+
+    brands = []
+    brand_aligned = set()
+    if brand_words:
+        for token_pos, _, _ in align([raw_tokens[idx] for idx in eligible], brand_words):
+            brand_aligned.add(eligible[token_pos])
+        alias_idx = sorted(brand_aligned)
+        # Alias solo se i token sono contigui nel raw_name
+        if alias_idx and alias_idx[-1] - alias_idx[0] == len(alias_idx) - 1:
+            brands.append((" ".join(raw_tokens[idx] for idx in alias_idx), brand.strip()))
+
+    remaining = [idx for idx in eligible if idx not in brand_aligned]
+    abbreviations = []
+    for token_pos, start, count in align([raw_tokens[idx] for idx in remaining], words):
+        token = raw_tokens[remaining[token_pos]]
+        if len(token) < 2:
+            continue
+        abbreviations.append((token, " ".join(words[start:start + count]).lower()))
+
+    return abbreviations, brands
+
+
+def fetch_verified_mappings(since: Optional[str], batch_size: int) -> Iterator[Dict]:
+    """Mapping verified_by_user con prodotto canonico, a pagine (keyset su id)"""
+    last_id = None
+    while True:
+        query = supabase_service.client.table("product_mappings")\
+            .select("id, raw_name, store_name, created_at, reviewed_at, normalized_products(canonical_name, brand)")\
+            .eq("verified_by_user", True)\
+            .order("id")\
+            .limit(batch_size)
+
+        if last_id:
+            query = query.gt("id", last_id)
+        if since:
+            query = query.or_(f"reviewed_at.gt.{since},created_at.gt.{since}")
+
+        rows = query.execute().data or []
+        if not rows:
+            return
+
+        last_id = rows[-1]["id"]
+        yield from rows
+
+
+def empty_lexicon() -> Dict:
+    return {
+        "format": LEXICON_FORMAT,
+        "version": 0,
+        "generated_at": None,
+        "watermark": None,
+        "mappings": 0,
+        "abbreviations": {"global": {}, "stores": {}},
+        "brands": {"global": {}, "stores": {}}
+    }
+
+
+def load_artifact(path: str) -> Dict:
+    """Artefatto esistente (base incrementale), vuoto se assente o di formato diverso"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            lexicon = json.load(f)
+    except FileNotFoundError:
+        return empty_lexicon()
+
+    if lexicon.get("format") != LEXICON_FORMAT:
+        print(f"⚠️ Lexicon format {lexicon.get('format')} != {LEXICON_FORMAT}: full rebuild")
+        return {**empty_lexicon(), "version": lexicon.get("version", 0)}
+    return lexicon
+
+
+def add_count(section: Dict, store: Optional[str], key: str, value: str):
+    """Incrementa conteggio globale e del negozio"""
+    scopes = [section["global"]]
+    if store:
+        scopes.append(section["stores"].setdefault(store, {}))
+    for scope in scopes:
+        counts = scope.setdefault(key, {})
+        counts[value] = counts.get(value, 0) + 1
+
+
+def mine(lexicon: Dict, batch_size: int) -> int:
+    """
+    Aggiorna i conteggi del lessico con i mapping dopo il watermark
+
+    Returns:
+        Numero di mapping elaborati
+    """
+    processed = 0
+    watermark = lexicon["watermark"]
+
+    for row in fetch_verified_mappings(lexicon["watermark"], batch_size):
+        product = row.get("normalized_products") or {}
+        if not product.get("canonical_name"):
+            continue
+
+        abbreviations, brands = extract_pairs(
+            row["raw_name"], product["canonical_name"], product.get("brand")
+        )
+        store = store_key(row.get("store_name"))
+        for token, expansion in abbreviations:
+            add_count(lexicon["abbreviations"], store, token, expansion)
+        for alias, brand in brands:
+            add_count(lexicon["brands"], store, alias, brand)
+
+        processed += 1
+        seen_at = max(filter(None, [row.get("reviewed_at"), row.get("created_at")]), default=None)
+        if seen_at and (watermark is None or seen_at > watermark):
+            watermark = seen_at
+
+        if processed % 1000 == 0:
+            print(f"   [LEXICON] {processed} mappings processed")
+
+    lexicon["watermark"] = watermark
+    lexicon["mappings"] += processed
+    return processed
+
+
+def save_artifact(lexicon: Dict, path: str):
+    """Scrittura atomica, JSON compatto"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(lexicon, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mining lessico abbreviazioni da product_mappings verificati")
+    parser.add_argument("--output", default=settings.RULE_INTERPRET_LEXICON_PATH)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--full", action="store_true", help="Ricostruisce ignorando l'artefatto esistente")
+    args = parser.parse_args()
+
+    lexicon = load_artifact(args.output)
+    if args.full:
+        lexicon = {**empty_lexicon(), "version": lexicon["version"]}
+
+    processed = mine(lexicon, args.batch_size)
+    if not processed:
+        print(f"✅ Lexicon v{lexicon['version']} già aggiornato (watermark {lexicon['watermark']})")
+        return
+
+    lexicon["version"] += 1
+    lexicon["generated_at"] = datetime.now(timezone.utc).isoformat()
+    save_artifact(lexicon, args.output)
+    print(
+        f"✅ Lexicon v{lexicon['version']}: +{processed} mappings "
+        f"({lexicon['mappings']} totali, {len(lexicon['abbreviations']['global'])} abbreviazioni, "
+        f"{len(lexicon['brands']['global'])} alias brand) → {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+Pytest Fixtures per Unit Tests
+Credenziali fittizie: i client Supabase/OpenAI/Vision vengono creati all'import dei
+servizi, ma nessun unit test esegue chiamate esterne
+"""
+import os
+from unittest import mock
+import pytest
+
+os.environ.setdefault("SUPABASE_URL", "https://unit-test.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "unit.test.key")  # Formato JWT richiesto dal client
+os.environ.setdefault("OPENAI_API_KEY", "sk-unit-test")
+
+
+@pytest.fixture(scope="session")
+def receipts_routes():
+    """
+    Modulo app.api.routes.receipts: il client Google Vision viene creato
+    all'import e richiede Application Default Credentials (qui anonime)
+    """
+    from google.auth.credentials import AnonymousCredentials
+
+    with mock.patch("google.auth.default", return_value=(AnonymousCredentials(), "unit-test")):
+        from app.api.routes import receipts
+    return receipts
@@ -0,0 +1,40 @@
+"""
+Unit Tests - Abbreviation Alignment
+Allineamento token grezzi ↔ parole del nome canonico (nessun servizio esterno)
+"""
+import pytest
+from app.utils.abbreviation_alignment import abbreviates, align, fold
+
+
+def test_fold_strips_accents_and_punctuation():
+    assert fold("Caffè Sant'Anna 1,5L") == ["CAFFE", "SANT", "ANNA", "1,5L"]
+
+
+@pytest.mark.parametrize("raw,words,expected", [
+    ("MOZZ", ["MOZZARELLA"], 1),            # Troncamento
+    ("FRMG", ["FORMAGGIO"], 1),             # Vocali omesse
+    ("SANNA", ["SANT", "ANNA"], 2),         # Parole fuse
+    ("PS", ["PARZIALMENTE", "SCREMATO"], 2),  # Iniziali
+    ("EVO", ["EXTRA", "VERGINE", "DI", "OLIVA"], 4),  # Stopword omessa
+    ("LATTE", ["LATTE", "INTERO"], 1),      # Meno parole possibile
+    ("XY", ["LATTE"], None),
+    ("ATTE", ["LATTE"], None),              # Deve partire dall'iniziale
+])
+def test_abbreviates(raw, words, expected):
+    assert abbreviates(raw, words) == expected
+
+
+def test_align_free_order_and_single_use():
+    raw = fold("AC.MINGAS.S.ANNA")
+    words = fold("Sant'Anna Acqua Minerale Gassata")
+    alignments = {raw[token]: words[start:start + count] for token, start, count in align(raw, words)}
+    assert alignments == {
+        "AC": ["ACQUA"],
+        "MINGAS": ["MINERALE", "GASSATA"],
+        "S": ["SANT"],
+        "ANNA": ["ANNA"],
+    }
+
+
+def test_align_prefers_exact_match():
+    assert align(["LATTE"], ["LATTINA", "LATTE"]) == [(0, 1, 1)]
@@ -0,0 +1,67 @@
+"""
+Unit Tests - Blocking Executor
+Esecuzione su thread pool, propagazione errori e metriche (nessun servizio esterno)
+"""
+import asyncio
+import threading
+import time
+import pytest
+from app.services import blocking_executor as module
+from app.services.blocking_executor import BlockingExecutor
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setattr(module.settings, "BLOCKING_EXECUTOR_WORKERS", 2)
+    executor = BlockingExecutor()
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_passes_args_and_kwargs(executor):
+    def work(a, b, scale=1):
+        return (a + b) * scale, threading.current_thread().name
+
+    result, thread_name = await executor.run(work, 1, 2, scale=10)
+
+    assert result == 30
+    assert thread_name.startswith("blocking-io")
+
+
+@pytest.mark.asyncio
+async def test_exception_propagated_and_counted(executor):
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await executor.run(fail)
+
+    stats = executor.get_stats()
+    assert stats["submitted"] == 1
+    assert stats["failed"] == 1
+    assert stats["completed"] == 0
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_counters(executor):
+    await asyncio.gather(*[executor.run(time.sleep, 0.02) for _ in range(4)])
+
+    stats = executor.get_stats()
+    assert stats["max_workers"] == 2
+    assert stats["submitted"] == 4
+    assert stats["completed"] == 4
+    assert stats["failed"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["max_in_flight"] == 4
+    # 4 chiamate su 2 thread: le ultime due attendono in coda
+    assert stats["max_queue_wait_ms"] >= 15
+    assert stats["avg_run_ms"] >= 15
+
+
+def test_empty_stats(executor):
+    stats = executor.get_stats()
+    assert stats["submitted"] == 0
+    assert stats["avg_queue_wait_ms"] == 0.0
+    assert stats["avg_run_ms"] == 0.0
@@ -0,0 +1,61 @@
+"""
+Unit Tests - Fast path del reranker
+Accettazione del candidato dominante senza LLM Select/Validate (solo regole)
+"""
+import pytest
+from app.services import business_reranker_service as module
+from app.services.business_reranker_service import BusinessRerankerService
+
+HYPOTHESIS = {"brand": "Granarolo", "size": "1", "unit_type": "L"}
+
+
+@pytest.fixture
+def reranker(monkeypatch):
+    monkeypatch.setattr(module.settings, "RERANKER_FAST_PATH_MIN_SCORE", 0.85)
+    monkeypatch.setattr(module.settings, "RERANKER_FAST_PATH_MIN_MARGIN", 0.15)
+    monkeypatch.setattr(module.settings, "RERANKER_FAST_PATH_MAX_CONFIDENCE", 0.95)
+    return BusinessRerankerService()
+
+
+def candidate(score, brand="Granarolo", size=1000, unit_type="ml"):
+    return {"business_score": score, "brand": brand, "size": size, "unit_type": unit_type}
+
+
+@pytest.mark.parametrize("reranked,hypothesis,reason", [
+    ([candidate(0.98), candidate(0.70)], HYPOTHESIS, "dominant_candidate"),
+    ([candidate(0.90)], HYPOTHESIS, "dominant_candidate"),  # Unico candidato
+    ([candidate(0.80)], HYPOTHESIS, "low_score"),
+    ([candidate(0.95), candidate(0.85)], HYPOTHESIS, "low_margin"),
+    ([candidate(0.95, brand="Parmalat")], HYPOTHESIS, "brand_disagreement"),
+    ([candidate(0.95)], {**HYPOTHESIS, "brand": None}, "brand_disagreement"),
+    ([candidate(0.95, size=500)], HYPOTHESIS, "size_disagreement"),
+])
+def test_evaluate_fast_path(reranker, reranked, hypothesis, reason):
+    decision = reranker.evaluate_fast_path(reranked, hypothesis)
+
+    assert decision["reason"] == reason
+    assert decision["accepted"] is (reason == "dominant_candidate")
+
+
+def test_confidence_capped(reranker):
+    decision = reranker.evaluate_fast_path([candidate(0.99)], HYPOTHESIS)
+    assert decision["confidence_score"] == 0.95
+    assert decision["margin"] == pytest.approx(0.99)
+
+
+@pytest.mark.parametrize("size1,unit1,size2,unit2,expected", [
+    ("1", "L", 1000, "ml", True),
+    ("1.5", "l", "150", "cl", True),
+    ("500", "g", "0.5", "KG", True),
+    ("1", "L", "1.04", "L", True),       # Entro 5%
+    ("1", "L", "1.06", "L", False),
+    ("1", "L", "1000", "g", False),      # Famiglie diverse
+    ("6", "pz", "6", "pz", True),        # Unità senza conversione: devono coincidere
+    ("6", "pz", "6", "conf", False),
+    (None, "L", "1", "L", False),
+    ("1", None, "1", "L", False),
+    ("0", "L", "0", "L", False),
+    ("abc", "L", "1", "L", False),
+])
+def test_sizes_match(reranker, size1, unit1, size2, unit2, expected):
+    assert reranker._sizes_match(size1, unit1, size2, unit2) is expected
@@ -0,0 +1,68 @@
+"""
+Unit Tests - Cache Backend
+Serializzazione e namespace Redis (fakeredis, nessun server esterno)
+"""
+import fakeredis
+import pytest
+from app.services.cache_backend import RedisCacheNamespace, decode_value, encode_key, encode_value
+
+
+@pytest.fixture
+def namespace():
+    return RedisCacheNamespace(
+        fakeredis.FakeRedis(), prefix="test:l1", ttl_seconds=60, compress_min_bytes=64
+    )
+
+
+@pytest.mark.parametrize("value", [
+    {"product_id": "p1", "tags": ["bibita"], "avg_price": 1.49},
+    {"canonical_name": "x" * 500},  # Compresso
+    None,
+])
+def test_encode_roundtrip(value):
+    assert decode_value(encode_value(value, compress_min_bytes=64)) == value
+
+
+def test_large_values_are_compressed():
+    assert encode_value("x" * 500, compress_min_bytes=64)[:1] == b"z"
+    assert encode_value("x", compress_min_bytes=64)[:1] == b"j"
+
+
+def test_tuple_keys_are_stable():
+    assert encode_key(("COCACOLA1.5L", None)) == '["COCACOLA1.5L",null]'
+
+
+def test_get_set_delete(namespace):
+    assert namespace.get(("LATTE", "Conad")) is None
+    namespace.set(("LATTE", "Conad"), {"product_id": "p1"})
+    assert namespace.get(("LATTE", "Conad")) == {"product_id": "p1"}
+
+    assert namespace.delete(("LATTE", "Conad"))
+    assert namespace.get(("LATTE", "Conad")) is None
+    assert namespace.get_stats()["hits"] == 1
+    assert namespace.get_stats()["misses"] == 2
+
+
+def test_ttl_applied(namespace):
+    namespace.set("key", 1, ttl_seconds=5)
+    assert 0 < namespace.client.pttl(namespace._key("key")) <= 5000
+
+
+def test_clear_only_own_prefix(namespace):
+    other = RedisCacheNamespace(namespace.client, "test:other", 60, 64)
+    namespace.set("a", 1)
+    namespace.set("b", 2)
+    other.set("a", 3)
+
+    namespace.clear()
+    assert namespace.get("a") is None
+    assert other.get("a") == 3
+
+
+@pytest.mark.parametrize("payload", [b"j{not json", b"zgarbage", b"\xff\xfe"])
+def test_corrupted_payload_is_miss(namespace, payload):
+    namespace.client.set(namespace._key("key"), payload)
+
+    assert namespace.get("key") is None
+    assert namespace.get_stats()["misses"] == 1
+    assert namespace.get_stats()["errors"] == 1
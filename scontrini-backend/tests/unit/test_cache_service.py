@@ -0,0 +1,173 @@
+"""
+Unit Tests - Cache Service
+Batch lookup, L1 e negative cache (client Supabase sostituito da un fake in memoria)
+"""
+from types import SimpleNamespace
+import pytest
+from app.services import cache_service as module
+from app.services.cache_service import CacheService
+from app.utils.ttl_cache import TTLCache
+
+PRODUCT = {"canonical_name": "Coca Cola 1.5L", "brand": "Coca Cola", "category": "Bevande"}
+
+
+class FakeQuery:
+    """Query builder PostgREST: ogni filtro ritorna se stesso"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        if isinstance(self.data, Exception):
+            raise self.data
+        return SimpleNamespace(data=self.data)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.rpc_data = {}
+        self.table_data = {"normalized_products": PRODUCT}
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return FakeQuery(self.rpc_data.get(name))
+
+    def table(self, name):
+        self.calls.append((name, None))
+        return FakeQuery(self.table_data.get(name))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeSupabase()
+    monkeypatch.setattr(module.supabase_service, "client", db)
+    return db
+
+
+@pytest.fixture
+def cache():
+    cache = CacheService()
+    cache.l1_cache = TTLCache(max_size=100, ttl_seconds=60)
+    cache.negative_cache = TTLCache(max_size=100, ttl_seconds=60)
+    return cache
+
+
+def tier1_row(idx, avg_price=1.50):
+    return {
+        "idx": idx,
+        "tier": "cache_tier1",
+        "product_id": "p1",
+        "stats": {"usage_count": 12, "verified_by_households": 1, "avg_price": avg_price, "price_coherent": True},
+        "product": PRODUCT
+    }
+
+
+def test_batch_lookup_maps_rows_by_index(cache, db):
+    db.rpc_data["get_cached_products_batch"] = [
+        tier1_row(2),
+        {"idx": 0, "tier": "cache_tier2", "product_id": "p2", "stats": None, "product": PRODUCT},
+    ]
+    items = [
+        {"raw_name": "ACQUA 1.5L", "store_name": "Conad"},
+        {"raw_name": "XYZ", "store_name": "Conad", "price": 1.0},
+        {"raw_name": "C0CA COLA 1,5L", "store_name": "Conad", "price": 1.49},
+    ]
+
+    results = cache.get_cached_products_batch(items)
+
+    assert results[0]["tier"] == "cache_tier2" and results[0]["product_id"] == "p2"
+    assert results[1] is None
+    assert results[2]["tier"] == "cache_tier1" and results[2]["canonical_name"] == "Coca Cola 1.5L"
+
+    (name, params), = db.calls
+    assert name == "get_cached_products_batch"
+    assert [entry["lookup_key"] for entry in params["p_items"]] == ["ACQUA1.5L", "XYZ", "COCACOLA1.5L"]
+
+
+def test_batch_lookup_failure_returns_none(cache, db):
+    db.rpc_data["get_cached_products_batch"] = RuntimeError("connection reset")
+    assert cache.get_cached_products_batch([{"raw_name": "ACQUA"}]) is None
+
+
+def test_batch_lookup_empty(cache, db):
+    assert cache.get_cached_products_batch([]) == []
+    assert db.calls == []
+
+
+def test_l1_hit_recomputes_price_coherence(cache, db):
+    db.rpc_data["get_cached_product"] = {
+        "product_id": "p1", "usage_count": 12, "verified_by_households": 1,
+        "avg_price": 1.50, "price_coherent": True
+    }
+    first = cache.get_cached_product("COCA COLA 1.5L", "Conad", current_price=1.49)
+    assert first["price_coherent"] is True
+    db_calls = len(db.calls)
+
+    # Variante OCR, prezzo anomalo: servita da L1, coerenza ricalcolata sul nuovo prezzo
+    second = cache.get_cached_product("C0CA COLA 1,5L", "Conad", current_price=3.00)
+    assert len(db.calls) == db_calls
+    assert second["price_coherent"] is False
+    assert second["confidence"] < first["confidence"]
+    assert second["canonical_name"] == "Coca Cola 1.5L"
+
+
+def test_l1_filled_by_batch_lookup(cache, db):
+    db.rpc_data["get_cached_products_batch"] = [tier1_row(0)]
+    cache.get_cached_products_batch([{"raw_name": "COCA COLA 1.5L", "store_name": "Conad"}])
+    db.calls.clear()
+
+    hit = cache.get_cached_product("COCA COLA 1.5L", "Conad", current_price=1.55)
+    assert hit["tier"] == "cache_tier1" and hit["price_coherent"] is True
+    assert db.calls == []
+
+
+def test_l1_entry_keyed_by_store(cache, db):
+    db.rpc_data["get_cached_products_batch"] = [tier1_row(0)]
+    cache.get_cached_products_batch([{"raw_name": "COCA COLA 1.5L", "store_name": "Conad"}])
+
+    assert cache._get_l1("COCA COLA 1.5L", "Esselunga", None) is None
+
+
+def test_double_miss_cached_until_invalidated(cache, db):
+    assert cache.get_cached_product("PANE 1 50G", "Conad") is None
+    db_calls = len(db.calls)
+
+    assert cache.get_cached_product("PANE 1 50G", "Conad") is None
+    assert len(db.calls) == db_calls  # Negative cache: nessuna query
+
+    cache.invalidate("PANE 1 50G", "Conad")
+    assert cache.get_cached_product("PANE 1 50G", "Conad") is None
+    assert len(db.calls) > db_calls
+
+
+def test_batch_lookup_skips_known_misses(cache, db):
+    db.rpc_data["get_cached_products_batch"] = []
+    items = [{"raw_name": "XYZ", "store_name": "Conad"}]
+
+    assert cache.get_cached_products_batch(items) == [None]
+    assert cache.get_cached_products_batch(items) == [None]
+    assert len(db.calls) == 1
+
+
+def test_invalidate_store_clears_storeless_key(cache, db):
+    cache._set_miss("XYZ", None)
+    cache.invalidate_many([("XYZ", "Conad")])
+    assert not cache._is_known_miss("XYZ", None)
+
+
+@pytest.mark.parametrize("price,avg_price,expected", [
+    (1.95, 1.50, True),       # +30%: al limite, come ABS(...) / avg <= tolleranza in SQL
+    (1.96, 1.50, False),
+    (1.05, 1.50, True),       # -30%
+    (1.00, 1.50, False),
+    (None, 1.50, True),       # Prezzo non letto
+    (1.00, None, True),       # Nessun acquisto con prezzo (price_count = 0)
+    (1.00, 0, True),          # NULLIF(avg_price, 0)
+    (1.60, "1.5000000000000000", True),  # NUMERIC generato serializzato come stringa
+])
+def test_price_coherence_matches_sql_rule(cache, price, avg_price, expected):
+    assert cache._is_price_coherent(price, avg_price) is expected
@@ -0,0 +1,77 @@
+"""
+Unit Tests - Cache Warm-up
+Precaricamento L1 dei top mapping per negozio (Supabase sostituito da fake in memoria)
+"""
+import pytest
+from app.services import cache_service as cache_module
+from app.services import cache_warmup_service as module
+from app.services.cache_service import CacheService
+from app.services.cache_warmup_service import CacheWarmupService
+from app.utils.ttl_cache import TTLCache
+from tests.unit.test_cache_service import PRODUCT, FakeSupabase
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    db = FakeSupabase()
+    db.rpc_data["get_cache_warmup_stores"] = ["Conad", None]
+    db.rpc_data["get_cache_warmup_entries"] = [{
+        "raw_name": "COCA COLA 1.5L",
+        "store_name": "Conad",
+        "tier": "cache_tier1",
+        "product_id": "p1",
+        "stats": {"usage_count": 40, "verified_by_households": 5, "avg_price": 1.5},
+        "product": PRODUCT
+    }]
+    monkeypatch.setattr(cache_module.supabase_service, "client", db)
+
+    cache = CacheService()
+    cache.l1_cache = TTLCache(max_size=100, ttl_seconds=60)
+    cache.negative_cache = None
+    cache.db = db
+    return cache
+
+
+def test_warm_up_store_fills_l1(cache):
+    assert cache.warm_up_store("Conad", limit=200, ttl_seconds=3600) == 1
+    cache.db.calls.clear()
+
+    hit = cache.get_cached_product("COCA COLA 1.5L", "Conad", current_price=1.49)
+    assert hit["product_id"] == "p1" and hit["tier"] == "cache_tier1"
+    assert cache.db.calls == []
+
+
+def test_warm_up_disabled_without_l1(cache):
+    cache.l1_cache = None
+    assert cache.warm_up_store("Conad", limit=200) == 0
+    assert cache.db.calls == []
+
+
+@pytest.mark.asyncio
+async def test_service_progress(cache, monkeypatch):
+    monkeypatch.setattr(module, "cache_service", cache)
+    service = CacheWarmupService()
+    service.enabled = True
+
+    service.start()
+    await service._task
+
+    stats = service.get_stats()
+    assert stats["status"] == CacheWarmupService.STATUS_COMPLETED
+    assert (stats["stores_total"], stats["stores_done"], stats["entries_loaded"]) == (2, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_service_failure_is_best_effort(cache, monkeypatch):
+    cache.db.rpc_data["get_cache_warmup_stores"] = RuntimeError("timeout")
+    monkeypatch.setattr(module, "cache_service", cache)
+    service = CacheWarmupService()
+    service.enabled = True
+
+    service.start()
+    await service._task
+
+    stats = service.get_stats()
+    assert stats["status"] == CacheWarmupService.STATUS_FAILED
+    assert stats["error"] == "timeout"
+    assert stats["finished_at"] is not None
@@ -0,0 +1,81 @@
+"""
+Unit Tests - Categorization Service
+Cache, deduplica e limite di concorrenza della categorizzazione (LLM sostituito da stub)
+"""
+import asyncio
+import pytest
+from app.services.categorization_service import CategorizationService
+from app.utils.ttl_cache import TTLCache
+
+COCA = {"canonical_name": "Coca Cola 1.5L", "brand": "Coca Cola", "size": "1.5", "unit_type": "L"}
+
+
+@pytest.fixture
+def service():
+    service = CategorizationService()
+    service.cache = TTLCache(max_size=100, ttl_seconds=60)
+    service.calls = []
+    service.active = 0
+    service.peak = 0
+
+    async def categorize_llm(canonical_name, brand, size, unit_type):
+        service.calls.append(canonical_name)
+        service.active += 1
+        service.peak = max(service.peak, service.active)
+        await asyncio.sleep(0.01)
+        service.active -= 1
+        if canonical_name.startswith("FAIL"):
+            return {"success": False, "error": "Categorization error: boom"}
+        return {"success": True, "category": "Bevande", "subcategory": canonical_name, "confidence": 0.9}
+
+    service._categorize_llm = categorize_llm
+    return service
+
+
+@pytest.mark.asyncio
+async def test_results_aligned_to_input(service):
+    products = [COCA, {"canonical_name": "Pasta Barilla 500g"}]
+
+    results = await service.categorize_products(products)
+
+    assert [r["subcategory"] for r in results] == ["Coca Cola 1.5L", "Pasta Barilla 500g"]
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_llm(service):
+    await service.categorize_products([COCA])
+    # Stessa chiave a meno di maiuscole/spazi, size numerica
+    results = await service.categorize_products([
+        {**COCA, "canonical_name": "coca  cola 1.5l", "size": 1.5}
+    ])
+
+    assert results[0]["category"] == "Bevande"
+    assert service.calls == ["Coca Cola 1.5L"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_call(service):
+    results = await service.categorize_products([COCA] * 5)
+
+    assert len(service.calls) == 1
+    assert all(result["category"] == "Bevande" for result in results)
+
+
+@pytest.mark.asyncio
+async def test_failures_not_cached(service):
+    failed = {"canonical_name": "FAIL 1"}
+
+    assert (await service.categorize_products([failed]))[0]["success"] is False
+    await service.categorize_products([failed])
+
+    assert service.calls == ["FAIL 1", "FAIL 1"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit(service):
+    service._semaphore = asyncio.Semaphore(3)
+
+    await service.categorize_products([{"canonical_name": f"Prodotto {i}"} for i in range(10)])
+
+    assert len(service.calls) == 10
+    assert service.peak == 3
@@ -0,0 +1,73 @@
+"""
+Unit Tests - Circuit Breaker
+Transizioni closed → open → half_open → closed e sonda singola (nessun servizio esterno)
+"""
+import pytest
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=2, recovery_seconds=30, success_threshold=2)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    breaker.record_failure()
+    breaker.record_success()  # Azzera il conteggio
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.get_stats()["rejected"] == 1
+    assert breaker.get_stats()["retry_in_seconds"] == 30
+
+
+def test_half_open_allows_single_probe(breaker, clock):
+    breaker.record_failure()
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    assert breaker.check() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.check()  # Sonda già in corso
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.HALF_OPEN  # success_threshold=2
+    assert breaker.check() is True
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.check() is False
+
+
+def test_half_open_failure_reopens(breaker, clock):
+    breaker.record_failure()
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.check() is True
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+
+
+def test_released_probe_can_be_retried(breaker, clock):
+    breaker.record_failure()
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.check() is True
+
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.check() is True
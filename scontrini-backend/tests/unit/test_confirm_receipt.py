@@ -0,0 +1,126 @@
+"""
+Unit Tests - Conferma scontrino
+POST /confirm: mapping in una query, purchase_history per receipt_item e
+categorizzazione dei modificati (Supabase e LLM sostituiti da stub)
+"""
+import pytest
+from app.services.supabase_service import supabase_service
+from tests.unit.test_cache_service import FakeSupabase
+
+RECEIPT = {"id": "r1", "household_id": "h1", "store_name": "Esselunga", "receipt_date": "2026-10-01"}
+ITEMS = [
+    {"id": "i1", "raw_product_name": "COCA COLA 1.5L", "quantity": 1, "unit_price": 1.5, "total_price": 1.5},
+    {"id": "i2", "raw_product_name": "COCA COLA 1.5L", "quantity": 2, "unit_price": 1.5, "total_price": 3.0},
+    {"id": "i3", "raw_product_name": "XYZ SCONOSCIUTO", "quantity": 1, "unit_price": None, "total_price": 2.0},
+    {"id": "i4", "raw_product_name": "PASTA BARILLA 500G", "quantity": 1, "unit_price": 0.9, "total_price": 0.9},
+]
+MAPPED = {"COCA COLA 1.5L": "p-coca", "PASTA BARILLA 500G": "p-pasta"}
+
+
+@pytest.fixture
+def stubs(monkeypatch, receipts_routes):
+    stubs = {"purchases": [], "mapping_lookups": [], "categorized": [], "invalidated": [], "status": []}
+    service = receipts_routes.supabase_service
+
+    monkeypatch.setattr(service, "get_receipt", lambda receipt_id: dict(RECEIPT))
+    monkeypatch.setattr(service, "get_receipt_items", lambda receipt_id: [dict(item) for item in ITEMS])
+
+    def get_mapped_product_ids(raw_names):
+        stubs["mapping_lookups"].append(list(raw_names))
+        return {name: MAPPED[name] for name in raw_names if name in MAPPED}
+
+    monkeypatch.setattr(service, "get_mapped_product_ids", get_mapped_product_ids)
+    monkeypatch.setattr(service, "create_purchase_history", lambda **kwargs: stubs["purchases"].append(kwargs))
+    monkeypatch.setattr(
+        service, "update_receipt_status",
+        lambda receipt_id, status: stubs["status"].append((receipt_id, status))
+    )
+
+    async def categorize_products(products):
+        stubs["categorized"].append(products)
+        return [{"success": True, "category": "Bevande", "subcategory": "bibite"} for _ in products]
+
+    monkeypatch.setattr(receipts_routes.categorization_service, "categorize_products", categorize_products)
+    monkeypatch.setattr(
+        receipts_routes.product_normalizer_v2.cache_service, "invalidate_many",
+        lambda mappings: stubs["invalidated"].extend(mappings)
+    )
+    return stubs
+
+
+def confirm_request(receipts_routes, modified=()):
+    return receipts_routes.ConfirmReceiptRequest(receipt_id="r1", modified_products=list(modified))
+
+
+@pytest.mark.asyncio
+async def test_purchase_history_per_receipt_item(receipts_routes, stubs):
+    response = await receipts_routes.confirm_receipt(confirm_request(receipts_routes))
+
+    assert response.success is True
+    # Una sola query mapping per tutte le righe
+    assert len(stubs["mapping_lookups"]) == 1
+    # Righe duplicate: ciascuna col proprio receipt_item_id; riga senza mapping saltata
+    assert [(p["receipt_item_id"], p["normalized_product_id"], p["total_price"]) for p in stubs["purchases"]] == [
+        ("i1", "p-coca", 1.5),
+        ("i2", "p-coca", 3.0),
+        ("i4", "p-pasta", 0.9),
+    ]
+    assert all(p["household_id"] == "h1" and p["purchase_date"] == "2026-10-01" for p in stubs["purchases"])
+    assert stubs["status"] == [("r1", "completed")]
+
+
+@pytest.mark.asyncio
+async def test_invalidates_confirmed_mappings(receipts_routes, stubs):
+    await receipts_routes.confirm_receipt(confirm_request(receipts_routes))
+
+    assert stubs["invalidated"] == [
+        ("COCA COLA 1.5L", "Esselunga"),
+        ("COCA COLA 1.5L", "Esselunga"),
+        ("PASTA BARILLA 500G", "Esselunga"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_modified_products_categorized_in_one_batch(receipts_routes, stubs):
+    modified = [
+        receipts_routes.ModifiedProduct(
+            receipt_item_id="i1", canonical_name="Coca Cola 1.5L", brand="Coca Cola",
+            size="1.5", unit_type="L", quantity=1, total_price=1.5
+        ),
+        receipts_routes.ModifiedProduct(
+            receipt_item_id="i3", canonical_name="Prodotto sconosciuto", quantity=1, total_price=2.0
+        ),
+    ]
+
+    await receipts_routes.confirm_receipt(confirm_request(receipts_routes, modified))
+
+    assert stubs["categorized"] == [[
+        {"canonical_name": "Coca Cola 1.5L", "brand": "Coca Cola", "size": "1.5", "unit_type": "L"},
+        {"canonical_name": "Prodotto sconosciuto", "brand": None, "size": None, "unit_type": None},
+    ]]
+    assert len(stubs["purchases"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_receipt_not_found(receipts_routes, stubs, monkeypatch):
+    monkeypatch.setattr(receipts_routes.supabase_service, "get_receipt", lambda receipt_id: None)
+
+    with pytest.raises(receipts_routes.HTTPException) as error:
+        await receipts_routes.confirm_receipt(confirm_request(receipts_routes))
+    assert error.value.status_code == 404
+
+
+def test_get_mapped_product_ids_single_query(monkeypatch):
+    db = FakeSupabase()
+    db.table_data["product_mappings"] = [
+        {"raw_name": "COCA COLA 1.5L", "normalized_product_id": "p-coca"},
+        {"raw_name": "COCA COLA 1.5L", "normalized_product_id": "p-other"},
+        {"raw_name": "PASTA BARILLA 500G", "normalized_product_id": "p-pasta"},
+    ]
+    monkeypatch.setattr(supabase_service, "client", db)
+
+    mapped = supabase_service.get_mapped_product_ids(["COCA COLA 1.5L", "COCA COLA 1.5L", "PASTA BARILLA 500G"])
+
+    assert mapped == {"COCA COLA 1.5L": "p-coca", "PASTA BARILLA 500G": "p-pasta"}
+    assert db.calls == [("product_mappings", None)]
+    assert supabase_service.get_mapped_product_ids([]) == {}
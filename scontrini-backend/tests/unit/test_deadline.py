@@ -0,0 +1,72 @@
+"""
+Unit Tests - Deadline
+Scadenza propagata via contextvar: scope annidati e task figli (nessun servizio esterno)
+"""
+import asyncio
+import pytest
+from app.utils import deadline
+from app.utils.deadline import deadline_scope
+
+
+def test_no_deadline_by_default():
+    assert deadline.remaining() is None
+
+
+def test_scope_sets_and_resets():
+    with deadline_scope(10):
+        assert deadline.remaining() == pytest.approx(10, abs=0.1)
+    assert deadline.remaining() is None
+
+
+@pytest.mark.parametrize("seconds", [None, 0, -5])
+def test_non_positive_seconds_set_nothing(seconds):
+    with deadline_scope(seconds):
+        assert deadline.remaining() is None
+
+
+def test_non_positive_seconds_keep_outer_deadline():
+    with deadline_scope(10):
+        with deadline_scope(None):
+            assert deadline.remaining() == pytest.approx(10, abs=0.1)
+
+
+def test_nested_tighter_scope_wins():
+    with deadline_scope(10):
+        with deadline_scope(2):
+            assert deadline.remaining() == pytest.approx(2, abs=0.1)
+        assert deadline.remaining() == pytest.approx(10, abs=0.1)
+
+
+def test_nested_looser_scope_keeps_outer():
+    with deadline_scope(2):
+        with deadline_scope(10):
+            assert deadline.remaining() == pytest.approx(2, abs=0.1)
+
+
+def test_reset_on_exception():
+    with pytest.raises(RuntimeError):
+        with deadline_scope(10):
+            raise RuntimeError("boom")
+    assert deadline.remaining() is None
+
+
+@pytest.mark.asyncio
+async def test_propagates_to_child_tasks():
+    async def child():
+        return deadline.remaining()
+
+    with deadline_scope(5):
+        results = await asyncio.gather(child(), asyncio.ensure_future(child()))
+
+    assert all(result == pytest.approx(5, abs=0.1) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_child_scope_does_not_leak_to_parent():
+    async def child():
+        with deadline_scope(1):
+            await asyncio.sleep(0)
+
+    with deadline_scope(5):
+        await asyncio.gather(child())
+        assert deadline.remaining() == pytest.approx(5, abs=0.1)
@@ -0,0 +1,74 @@
+"""
+Unit Tests - Fast path e write-back
+Scelte del fast path (senza LLM) non salvate in product_mappings (servizi sostituiti da stub)
+"""
+import pytest
+from app.agents import product_normalizer as module
+from app.agents.product_normalizer import ProductNormalizerV2
+from app.services.llm_validate_service import build_validation
+
+INTERPRET = {
+    "success": True,
+    "hypothesis": "latte parzialmente scremato granarolo 1l",
+    "brand": "Granarolo",
+    "category": "Latticini",
+    "size": "1",
+    "unit_type": "L",
+    "tags": []
+}
+TOP = {"product_id": "p1", "canonical_name": "Latte PS Granarolo 1L", "brand": "Granarolo",
+       "size": 1000, "unit_type": "ml", "combined_score": 0.9, "business_score": 0.97}
+SECOND = {"product_id": "p2", "canonical_name": "Latte Intero Parmalat 1L", "brand": "Parmalat",
+          "size": 1000, "unit_type": "ml", "combined_score": 0.6, "business_score": 0.60}
+
+
+@pytest.fixture
+def normalizer(monkeypatch):
+    monkeypatch.setattr(module.settings, "RERANKER_FAST_PATH_ENABLED", True)
+    monkeypatch.setattr(module.settings, "LLM_FUSED_SELECT_VALIDATE_ENABLED", False)
+    normalizer = ProductNormalizerV2()
+    normalizer.enqueued = []
+
+    monkeypatch.setattr(normalizer.sql_retriever_service, "search_products", lambda **kwargs: [TOP, SECOND])
+    monkeypatch.setattr(
+        module.mapping_writeback_service, "enqueue",
+        lambda **kwargs: normalizer.enqueued.append(kwargs) or True
+    )
+
+    async def select_best_match(**kwargs):
+        return {"success": True, "selected_product": TOP}
+
+    async def validate_mapping(**kwargs):
+        return build_validation({"confidence_score": 0.93, "reasoning": "ok", "flags": {}})
+
+    monkeypatch.setattr(normalizer.llm_select_service, "select_best_match", select_best_match)
+    monkeypatch.setattr(normalizer.llm_validate_service, "validate_mapping", validate_mapping)
+    return normalizer
+
+
+async def run(normalizer, reranked):
+    normalizer.business_reranker_service.rerank_candidates = lambda **kwargs: reranked
+    return await normalizer._run_pipeline(
+        "LATTE PS GRAN 1L", "household", "Esselunga", 1.5, True, dict(INTERPRET)
+    )
+
+
+@pytest.mark.asyncio
+async def test_fast_path_not_written_back(normalizer):
+    result = await run(normalizer, [TOP, SECOND])
+
+    assert result["normalized_product_id"] == "p1"
+    assert result["confidence"] >= module.settings.CACHE_TIER2_MIN_CONFIDENCE
+    assert normalizer.get_stats()["fast_path"]["accepted"] == 1
+    assert normalizer.enqueued == []
+
+
+@pytest.mark.asyncio
+async def test_validated_result_written_back(normalizer):
+    # Margine insufficiente: fast path rifiutato, Select + Validate via LLM
+    result = await run(normalizer, [TOP, {**SECOND, "business_score": 0.9}])
+
+    assert result["confidence"] == 0.93
+    assert len(normalizer.enqueued) == 1
+    assert normalizer.enqueued[0]["normalized_product_id"] == "p1"
+    assert normalizer.enqueued[0]["confidence_score"] == 0.93
@@ -0,0 +1,126 @@
+"""
+Unit Tests - HTTP Fetch
+Size cap, errori HTTP, timeout complessivo e limite per host (httpx.MockTransport)
+"""
+import asyncio
+import httpx
+import pytest
+from app.services.http_fetch_service import HttpFetchService, ImageDownloadError, ImageTooLargeError
+
+URL = "https://storage.example.com/receipts/1.jpg"
+
+
+def make_service(handler, **overrides) -> HttpFetchService:
+    service = HttpFetchService()
+    for name, value in overrides.items():
+        setattr(service, name, value)
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+async def chunked(*chunks: bytes):
+    """Body in streaming senza Content-Length"""
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_download_ok():
+    service = make_service(lambda request: httpx.Response(200, content=b"image"))
+    assert await service.fetch_bytes(URL) == b"image"
+
+
+@pytest.mark.asyncio
+async def test_too_large_from_content_length():
+    service = make_service(lambda request: httpx.Response(200, content=b"x" * 11))
+
+    with pytest.raises(ImageTooLargeError, match="11 bytes"):
+        await service.fetch_bytes(URL, max_bytes=10)
+
+
+@pytest.mark.asyncio
+async def test_too_large_while_streaming():
+    received = []
+
+    async def body():
+        for chunk in (b"x" * 6, b"x" * 6, b"x" * 6):
+            received.append(chunk)
+            yield chunk
+
+    service = make_service(lambda request: httpx.Response(200, content=body()))
+
+    with pytest.raises(ImageTooLargeError, match="over 10 bytes"):
+        await service.fetch_bytes(URL, max_bytes=10)
+    assert len(received) == 2  # Interrotto appena superato il limite
+
+
+@pytest.mark.asyncio
+async def test_streaming_within_limit():
+    service = make_service(lambda request: httpx.Response(200, content=chunked(b"ab", b"cd")))
+    assert await service.fetch_bytes(URL, max_bytes=4) == b"abcd"
+
+
+@pytest.mark.asyncio
+async def test_default_max_bytes_from_settings():
+    service = make_service(lambda request: httpx.Response(200, content=b"x" * 6), max_image_bytes=5)
+
+    with pytest.raises(ImageTooLargeError):
+        await service.fetch_bytes(URL)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [400, 404, 500, 503])
+async def test_http_error_status(status):
+    service = make_service(lambda request: httpx.Response(status))
+
+    with pytest.raises(ImageDownloadError, match=f"HTTP {status}") as error:
+        await service.fetch_bytes(URL)
+    assert not isinstance(error.value, ImageTooLargeError)
+
+
+@pytest.mark.asyncio
+async def test_network_error_mapped():
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    service = make_service(handler)
+
+    with pytest.raises(ImageDownloadError, match="Download error"):
+        await service.fetch_bytes(URL)
+
+
+@pytest.mark.asyncio
+async def test_overall_timeout():
+    async def slow_body():
+        # Ogni chunk entro il timeout di I/O, il totale no
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            yield b"x"
+
+    service = make_service(
+        lambda request: httpx.Response(200, content=slow_body()), timeout_seconds=0.05
+    )
+
+    with pytest.raises(ImageDownloadError, match="timeout"):
+        await service.fetch_bytes(URL)
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit():
+    active = {}
+    peak = {}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] = active.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200, content=b"ok")
+
+    service = make_service(handler, max_connections_per_host=2)
+    urls = [f"https://a.example.com/{i}" for i in range(6)] + [f"https://b.example.com/{i}" for i in range(6)]
+
+    await asyncio.gather(*[service.fetch_bytes(url) for url in urls])
+
+    assert peak == {"a.example.com": 2, "b.example.com": 2}
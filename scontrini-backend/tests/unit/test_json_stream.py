@@ -0,0 +1,71 @@
+"""
+Test decodifica incrementale JSON (app/utils/json_stream.py)
+"""
+import json
+import pytest
+from app.utils.json_stream import JSONArrayStreamDecoder
+
+
+DOCUMENT = {
+    "store_name": "Esselunga",
+    "vat_number": "0123",
+    "total_amount": 12.5,
+    "payment_method": None,
+    "items": [
+        {"raw_product_name": "COCA COLA 1,5L", "quantity": 1.0, "total_price": 1.49},
+        {"raw_product_name": 'LATTE "PS" {1L}', "quantity": 2.0, "total_price": 2.58},
+        {"raw_product_name": "PANE [KG]", "quantity": 1.0, "total_price": 3.1}
+    ],
+    "discount_amount": 0.5
+}
+
+
+def _feed_in_chunks(text, size):
+    decoder = JSONArrayStreamDecoder("items")
+    emitted = []
+    for start in range(0, len(text), size):
+        emitted.extend(decoder.feed(text[start:start + size]))
+    return decoder, emitted
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 10000])
+def test_items_emitted_whatever_the_chunking(size):
+    text = json.dumps(DOCUMENT, indent=2, ensure_ascii=False)
+    decoder, emitted = _feed_in_chunks(text, size)
+
+    assert emitted == DOCUMENT["items"]
+    assert decoder.array_started
+
+
+def test_items_emitted_as_soon_as_complete():
+    text = json.dumps(DOCUMENT)
+    first_end = text.index("}") + 1
+
+    decoder = JSONArrayStreamDecoder("items")
+    assert decoder.feed(text[:first_end - 1]) == []
+    assert decoder.feed(text[first_end - 1:first_end]) == [DOCUMENT["items"][0]]
+
+
+def test_top_level_scalars_known_before_items():
+    text = json.dumps(DOCUMENT)
+    decoder = JSONArrayStreamDecoder("items")
+    decoder.feed(text[:text.index("[") + 1])
+
+    assert decoder.array_started
+    assert decoder.fields == {
+        "store_name": "Esselunga",
+        "vat_number": "0123",
+        "total_amount": 12.5,
+        "payment_method": None
+    }
+
+
+def test_trailing_scalar_after_array():
+    decoder, _ = _feed_in_chunks(json.dumps(DOCUMENT), 5)
+    assert decoder.fields["discount_amount"] == 0.5
+
+
+def test_nested_arrays_with_same_key_ignored():
+    text = json.dumps({"meta": {"items": [{"a": 1}]}, "items": [{"b": 2}]})
+    _, emitted = _feed_in_chunks(text, 4)
+    assert emitted == [{"b": 2}]
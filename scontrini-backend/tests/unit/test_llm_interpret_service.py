@@ -0,0 +1,107 @@
+"""
+Unit Tests - LLM Interpret
+Circuito aperto / deadline → success False (modalità degradata), altri errori
+→ ipotesi raw_name verso Select/Validate (chiamate LLM sostituite da stub)
+"""
+import asyncio
+import json
+import pytest
+from app.services import llm_interpret_service as module
+from app.services.llm_interpret_service import LLMInterpretService
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.utils.deadline import DeadlineExceeded
+
+
+def stub_llm(monkeypatch, handler):
+    calls = []
+
+    async def complete_json(client, **kwargs):
+        calls.append(kwargs["user_prompt"])
+        return handler(kwargs), 10
+
+    monkeypatch.setattr(module.llm_response_cache, "complete_json", complete_json)
+    return calls
+
+
+def raise_error(error):
+    def handler(kwargs):
+        raise error
+    return handler
+
+
+@pytest.fixture(autouse=True)
+def breaker(monkeypatch):
+    breaker = CircuitBreaker("openai", failure_threshold=1, recovery_seconds=60)
+    monkeypatch.setattr(module.openai_client_service, "breaker", breaker)
+    return breaker
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [
+    CircuitOpenError("Circuit 'openai' open"),
+    DeadlineExceeded("Receipt deadline exceeded"),
+])
+async def test_llm_unavailable_is_failure(monkeypatch, error):
+    stub_llm(monkeypatch, raise_error(error))
+
+    result = await LLMInterpretService().interpret_raw_name("LATTE PS 1L")
+
+    assert result["success"] is False
+    assert result["hypothesis"] == "LATTE PS 1L"
+    assert type(error).__name__ in result["error"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("handler", [
+    raise_error(asyncio.TimeoutError()),
+    raise_error(ValueError("bad request")),
+    lambda kwargs: "{not json",
+])
+async def test_other_errors_keep_raw_name_hypothesis(monkeypatch, handler):
+    stub_llm(monkeypatch, handler)
+
+    result = await LLMInterpretService().interpret_raw_name("LATTE PS 1L")
+
+    assert result["success"] is True
+    assert result["hypothesis"] == "LATTE PS 1L"
+    assert result["brand"] is None
+
+
+@pytest.mark.asyncio
+async def test_error_with_open_breaker_is_failure(monkeypatch, breaker):
+    stub_llm(monkeypatch, raise_error(asyncio.TimeoutError()))
+    breaker.record_failure()  # Soglia 1: circuito aperto
+
+    result = await LLMInterpretService().interpret_raw_name("LATTE PS 1L")
+
+    assert result["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_batch_circuit_open_skips_single_retries(monkeypatch):
+    calls = stub_llm(monkeypatch, raise_error(CircuitOpenError("Circuit 'openai' open")))
+
+    results = await LLMInterpretService().interpret_batch(
+        [{"raw_name": "LATTE PS 1L"}, {"raw_name": "MOZZ 125G"}]
+    )
+
+    assert [r["success"] for r in results] == [False, False]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_missing_rows_retried_singly(monkeypatch):
+    def handler(kwargs):
+        if "LATTE PS 1L" in kwargs["user_prompt"] and "MOZZ" in kwargs["user_prompt"]:
+            return json.dumps({"items": [{"index": 0, "hypothesis": "latte parzialmente scremato"}]})
+        raise asyncio.TimeoutError()
+
+    stub_llm(monkeypatch, handler)
+
+    results = await LLMInterpretService().interpret_batch(
+        [{"raw_name": "LATTE PS 1L"}, {"raw_name": "MOZZ 125G"}]
+    )
+
+    assert results[0] == {"success": True, "hypothesis": "latte parzialmente scremato"}
+    assert results[1]["success"] is True
+    assert results[1]["hypothesis"] == "MOZZ 125G"
@@ -0,0 +1,103 @@
+"""
+Unit Tests - LLM Response Cache
+Cache SQLite content-addressed delle risposte JSON (client OpenAI sostituito da stub)
+"""
+from types import SimpleNamespace
+import pytest
+from app.services import llm_response_cache as module
+from app.services.llm_response_cache import LLMResponseCache
+
+PROMPT = {"model": "gpt-4o-mini", "temperature": 0.3, "system_prompt": "sys", "user_prompt": "LATTE PS 1L"}
+
+
+class FakeClient:
+    def __init__(self, content='{"hypothesis": "latte"}'):
+        self.content = content
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))],
+            usage=SimpleNamespace(total_tokens=42)
+        )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache()
+    cache.enabled = True
+    cache.path = str(tmp_path / "llm.sqlite3")
+    yield cache
+    cache.close()
+
+
+def test_fingerprint_covers_all_parameters():
+    base = LLMResponseCache.fingerprint("m", 0.3, "sys", "user")
+    assert base == LLMResponseCache.fingerprint("m", 0.3, "sys", "user")
+    assert base != LLMResponseCache.fingerprint("m", 0.0, "sys", "user")
+    assert base != LLMResponseCache.fingerprint("m", 0.3, "sys2", "user")
+    assert base != LLMResponseCache.fingerprint("m2", 0.3, "sys", "user")
+
+
+@pytest.mark.asyncio
+async def test_second_call_served_from_cache(cache):
+    client = FakeClient()
+
+    assert await cache.complete_json(client, **PROMPT) == ('{"hypothesis": "latte"}', 42)
+    assert await cache.complete_json(client, **PROMPT) == ('{"hypothesis": "latte"}', None)
+    assert client.calls == 1
+    assert cache.get_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_persists_across_instances(cache):
+    await cache.complete_json(FakeClient(), **PROMPT)
+    cache.close()
+
+    reopened = LLMResponseCache()
+    reopened.enabled = True
+    reopened.path = cache.path
+    client = FakeClient()
+    assert (await reopened.complete_json(client, **PROMPT))[1] is None
+    assert client.calls == 0
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_not_cached(cache):
+    client = FakeClient(content="not json")
+
+    await cache.complete_json(client, **PROMPT)
+    await cache.complete_json(client, **PROMPT)
+    assert client.calls == 2
+    assert cache.get_stats()["writes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bypass(cache):
+    client = FakeClient()
+    await cache.complete_json(client, **PROMPT)
+
+    with cache.bypass():
+        await cache.complete_json(client, **PROMPT)
+    assert client.calls == 2
+
+
+def test_evicts_least_recently_used(cache, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(module.time, "time", lambda: now[0])
+    cache.max_bytes = 250
+
+    for key in ("a", "b", "c"):
+        now[0] += 1
+        cache._set(key, "x" * 100)
+        if key == "b":
+            now[0] += 1
+            assert cache._get("a") is not None  # "a" usata di recente: resta
+
+    assert cache.get_stats()["evictions"] == 1
+    assert cache._get("b") is None
+    assert cache._get("a") is not None and cache._get("c") is not None
+    assert cache.get_stats()["size_bytes"] == 200
@@ -0,0 +1,64 @@
+"""
+Unit Tests - LLM Select+Validate
+Parsing della risposta fusa e soglie di review (LLM sostituito da stub)
+"""
+import json
+import pytest
+from app.services import llm_select_validate_service as module
+from app.services.llm_select_validate_service import LLMSelectValidateService
+from app.services.llm_validate_service import build_validation
+
+CANDIDATES = [
+    {"product_id": "p1", "canonical_name": "Latte Intero 1L", "brand": "Granarolo"},
+    {"product_id": "p2", "canonical_name": "Latte Parzialmente Scremato 1L", "brand": "Granarolo"},
+]
+
+
+def stub_llm(monkeypatch, response):
+    async def complete_json(client, **kwargs):
+        return json.dumps(response), 10
+
+    monkeypatch.setattr(module.llm_response_cache, "complete_json", complete_json)
+
+
+@pytest.mark.asyncio
+async def test_selects_and_validates(monkeypatch):
+    stub_llm(monkeypatch, {"selected_index": 1, "confidence_score": 0.92, "reasoning": "PS = parz. scremato"})
+
+    result = await LLMSelectValidateService().select_and_validate("LATTE PS 1L", "latte ps", CANDIDATES)
+
+    assert result["success"]
+    assert result["selected_product_id"] == "p2"
+    assert result["validation"]["confidence_level"] == "high"
+    assert result["validation"]["needs_review"] is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("response", [
+    {"selected_index": 5, "confidence_score": 0.9},    # Fuori range
+    {"selected_index": "1", "confidence_score": 0.9},  # Non intero
+    {"selected_index": 0},                             # confidence mancante
+])
+async def test_invalid_response_falls_back(monkeypatch, response):
+    stub_llm(monkeypatch, response)
+
+    result = await LLMSelectValidateService().select_and_validate("LATTE PS 1L", "latte ps", CANDIDATES)
+    assert result["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_no_candidates():
+    result = await LLMSelectValidateService().select_and_validate("LATTE", "latte", [])
+    assert result["success"] is False
+
+
+@pytest.mark.parametrize("score,level,needs_review", [
+    (0.8, "high", False),
+    (0.79, "medium", True),
+    (0.5, "medium", True),
+    (0.49, "low", True),
+])
+def test_build_validation_thresholds(score, level, needs_review):
+    validation = build_validation({"confidence_score": score})
+    assert (validation["confidence_level"], validation["needs_review"]) == (level, needs_review)
+    assert validation["flags"] == {"brand_mismatch": False, "size_uncertain": False, "ambiguous": False}
@@ -0,0 +1,53 @@
+"""
+Unit Tests - Lookup Key
+Chiave di lookup cache tollerante a formattazione e OCR (nessun servizio esterno)
+"""
+import pytest
+from app.utils.lookup_key import build_lookup_key
+
+
+@pytest.mark.parametrize("raw_name", [
+    "COCA COLA 1,5L",
+    "COCA-COLA 1.5 L",
+    "C0CA COLA 1.5L",
+    "coca cola 1.50 l",
+    "Coca  Cola 1 , 5 L",
+])
+def test_variants_share_key(raw_name):
+    """Varianti di formattazione/OCR dello stesso prodotto → stessa chiave"""
+    assert build_lookup_key(raw_name) == "COCACOLA1.5L"
+
+
+@pytest.mark.parametrize("raw_name,expected", [
+    ("0LIO EVO 1L", "OLIOEVO1L"),
+    ("PASTA 5OO G", "PASTA500G"),
+    ("LATTE P.S. 1L", "LATTEPS1L"),
+    ("PERÒ 1,0KG", "PERO1KG"),
+    ("BIRRA 33CL X3", "BIRRA33CLX3"),
+])
+def test_folding_rules(raw_name, expected):
+    assert build_lookup_key(raw_name) == expected
+
+
+def test_different_sizes_keep_different_keys():
+    """Il separatore decimale non deve far collassare formati diversi"""
+    assert build_lookup_key("ACQUA 1.5L") != build_lookup_key("ACQUA 15L")
+
+
+@pytest.mark.parametrize("spaced,joined", [
+    ("ACQUA 1 5L", "ACQUA 15L"),
+    ("PANE 1 50G", "PANE 150G"),
+])
+def test_adjacent_numbers_do_not_collide(spaced, joined):
+    """Parole numeriche adiacenti non si fondono in un altro formato"""
+    assert build_lookup_key(spaced) != build_lookup_key(joined)
+
+
+def test_adjacent_numbers_keep_separator():
+    assert build_lookup_key("ACQUA 1 5L") == "ACQUA1_5L"
+    assert build_lookup_key("BIRRA 3 X 33CL") == "BIRRA3X33CL"
+
+
+@pytest.mark.parametrize("raw_name", [None, "", "  ", "..."])
+def test_empty_input(raw_name):
+    assert build_lookup_key(raw_name) is None
@@ -0,0 +1,119 @@
+"""
+Unit Tests - Mapping Write-back
+Coda, dedup per (raw_name, store_name), flush a blocchi e invalidazione cache
+(Supabase e cache sostituiti da stub)
+"""
+import asyncio
+import pytest
+import pytest_asyncio
+from app.services import mapping_writeback_service as module
+from app.services.mapping_writeback_service import MappingWriteBackService
+
+
+class FakeCache:
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate_many(self, mappings):
+        self.invalidated.extend(mappings)
+
+
+@pytest_asyncio.fixture
+async def writeback(monkeypatch):
+    batches = []
+
+    def upsert_auto_mappings(rows):
+        batches.append(rows)
+        return len(rows)
+
+    monkeypatch.setattr(module.supabase_service, "upsert_auto_mappings", upsert_auto_mappings)
+    monkeypatch.setattr(module, "cache_service", FakeCache())
+
+    service = MappingWriteBackService()
+    service.enabled = True
+    service.min_confidence = 0.85
+    service.batch_size = 3
+    service.flush_interval = 60
+    service.max_queue_size = 5
+    service.batches = batches
+    await service.start()
+    yield service
+    await service.stop()
+
+
+def test_threshold_and_product_required(writeback):
+    assert not writeback.enqueue("LATTE", "Conad", "p1", 0.80)
+    assert not writeback.enqueue("LATTE", "Conad", None, 0.95)
+    assert writeback.enqueue("LATTE", "Conad", "p1", 0.85)
+    assert writeback.get_stats()["pending"] == 1
+
+
+def test_duplicates_keep_highest_confidence(writeback):
+    writeback.enqueue("LATTE", "Conad", "p1", 0.95)
+    writeback.enqueue("LATTE", "Conad", "p2", 0.90)
+    writeback.enqueue("LATTE", "Esselunga", "p3", 0.90)
+
+    pending = writeback._pending
+    assert len(pending) == 2
+    assert pending[("LATTE", "Conad")]["normalized_product_id"] == "p1"
+
+
+@pytest.mark.asyncio
+async def test_flush_in_batches_and_invalidate(writeback):
+    writeback.batch_size = 10  # Nessun flush automatico
+    for idx in range(5):
+        writeback.enqueue(f"ITEM {idx}", "Conad", f"p{idx}", 0.9)
+    writeback.batch_size = 2
+
+    await writeback.flush()
+
+    assert [len(rows) for rows in writeback.batches] == [2, 2, 1]
+    assert writeback.batches[0][0]["lookup_key"] == "ITEM0"
+    assert len(module.cache_service.invalidated) == 5
+    assert writeback.get_stats()["written"] == 5
+
+
+@pytest.mark.asyncio
+async def test_full_batch_triggers_flush(writeback):
+    for idx in range(3):
+        writeback.enqueue(f"ITEM {idx}", "Conad", f"p{idx}", 0.9)
+
+    for _ in range(50):
+        if writeback.batches:
+            break
+        await asyncio.sleep(0.01)
+
+    assert [len(rows) for rows in writeback.batches] == [3]
+    assert writeback.get_stats()["pending"] == 0
+
+
+def test_queue_full_drops(writeback):
+    writeback.batch_size = 100
+    for idx in range(6):
+        writeback.enqueue(f"ITEM {idx}", "Conad", f"p{idx}", 0.9)
+
+    assert writeback.get_stats()["pending"] == 5
+    assert writeback.get_stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_counted(writeback, monkeypatch):
+    def upsert_auto_mappings(rows):
+        raise RuntimeError("timeout")
+
+    monkeypatch.setattr(module.supabase_service, "upsert_auto_mappings", upsert_auto_mappings)
+    writeback.enqueue("LATTE", "Conad", "p1", 0.9)
+
+    await writeback.flush()
+
+    assert writeback.get_stats()["failed_batches"] == 1
+    assert module.cache_service.invalidated == []
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending(writeback):
+    writeback.enqueue("LATTE", "Conad", "p1", 0.9)
+    await writeback.stop()
+
+    assert [len(rows) for rows in writeback.batches] == [1]
+    assert not writeback.enqueue("MOZZ", "Conad", "p2", 0.9)  # Flusher fermo
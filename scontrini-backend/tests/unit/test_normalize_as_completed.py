@@ -0,0 +1,63 @@
+"""
+Unit Tests - Normalizzazione in streaming
+Risultati emessi in ordine di completamento, cache hit per primi (pipeline sostituita da stub)
+"""
+import asyncio
+import pytest
+from app.agents.product_normalizer import ProductNormalizerV2
+
+# Secondi di pipeline per prodotto (miss)
+DELAYS = {"LENTO": 0.05, "VELOCE": 0.01}
+
+
+@pytest.fixture
+def normalizer(monkeypatch):
+    normalizer = ProductNormalizerV2()
+    normalizer.cancelled = []
+
+    async def lookup_cache_batch(items):
+        return [{"canonical_name": item["raw_product_name"]} if item["raw_product_name"] == "HIT" else None for item in items]
+
+    async def interpret_misses_batch(items, cache_hits):
+        return {}
+
+    async def normalize_product(raw_product_name, household_id, **kwargs):
+        try:
+            await asyncio.sleep(DELAYS[raw_product_name])
+        except asyncio.CancelledError:
+            normalizer.cancelled.append(raw_product_name)
+            raise
+        return {"success": True, "source": "sql_search", "canonical_name": raw_product_name}
+
+    monkeypatch.setattr(normalizer, "_lookup_cache_batch", lookup_cache_batch)
+    monkeypatch.setattr(normalizer, "_interpret_misses_batch", interpret_misses_batch)
+    monkeypatch.setattr(normalizer, "_format_cache_result", lambda hit: {"success": True, "source": "cache_tier1", **hit})
+    monkeypatch.setattr(normalizer, "normalize_product", normalize_product)
+    return normalizer
+
+
+def items(*names):
+    return [{"raw_product_name": name} for name in names]
+
+
+@pytest.mark.asyncio
+async def test_yields_in_completion_order(normalizer):
+    order = [
+        (idx, result["source"])
+        async for idx, result in normalizer.normalize_batch_as_completed(
+            items("LENTO", "HIT", "VELOCE"), household_id="h1"
+        )
+    ]
+
+    assert order == [(1, "cache_tier1"), (2, "sql_search"), (0, "sql_search")]
+
+
+@pytest.mark.asyncio
+async def test_closing_stream_cancels_pending(normalizer):
+    stream = normalizer.normalize_batch_as_completed(items("HIT", "LENTO"), household_id="h1")
+
+    assert (await stream.__anext__())[0] == 0
+    await stream.aclose()  # Client disconnesso
+    await asyncio.sleep(0)
+
+    assert normalizer.cancelled == ["LENTO"]
@@ -0,0 +1,76 @@
+"""
+Unit Tests - Finestra scorrevole di normalize_batch
+Concorrenza limitata per richiesta e globale, nessun blocco dietro un item lento
+(pipeline sostituita da stub)
+"""
+import asyncio
+import pytest
+from app.agents.product_normalizer import ProductNormalizerV2
+
+
+@pytest.fixture
+def normalizer(monkeypatch):
+    normalizer = ProductNormalizerV2()
+    normalizer.events = []
+    normalizer.running = 0
+    normalizer.peak = 0
+
+    async def lookup_cache_batch(items):
+        return [None] * len(items)
+
+    async def interpret_misses_batch(items, cache_hits):
+        return {}
+
+    async def normalize_product(raw_product_name, household_id, **kwargs):
+        normalizer.running += 1
+        normalizer.peak = max(normalizer.peak, normalizer.running)
+        normalizer.events.append(("start", raw_product_name))
+        await asyncio.sleep(0.05 if raw_product_name.startswith("LENTO") else 0.005)
+        normalizer.events.append(("end", raw_product_name))
+        normalizer.running -= 1
+        return {"success": True, "canonical_name": raw_product_name}
+
+    monkeypatch.setattr(normalizer, "_lookup_cache_batch", lookup_cache_batch)
+    monkeypatch.setattr(normalizer, "_interpret_misses_batch", interpret_misses_batch)
+    monkeypatch.setattr(normalizer, "normalize_product", normalize_product)
+    return normalizer
+
+
+def items(*names):
+    return [{"raw_product_name": name} for name in names]
+
+
+@pytest.mark.asyncio
+async def test_slow_item_does_not_block_window(normalizer):
+    results = await normalizer.normalize_batch(items("LENTO", "A", "B", "C"), "h1", batch_size=2)
+
+    assert [r["canonical_name"] for r in results] == ["LENTO", "A", "B", "C"]
+    assert normalizer.peak == 2
+    # A, B e C passano tutti nel secondo slot mentre LENTO è ancora in corso
+    assert normalizer.events.index(("end", "C")) < normalizer.events.index(("end", "LENTO"))
+
+
+@pytest.mark.asyncio
+async def test_global_limit_across_requests(normalizer):
+    normalizer._global_semaphore = asyncio.Semaphore(3)
+
+    await asyncio.gather(
+        normalizer.normalize_batch(items("LENTO 1", "LENTO 2", "A"), "h1", batch_size=2),
+        normalizer.normalize_batch(items("LENTO 3", "LENTO 4", "B"), "h2", batch_size=2)
+    )
+
+    assert normalizer.peak == 3
+
+
+@pytest.mark.asyncio
+async def test_item_error_isolated(normalizer, monkeypatch):
+    async def normalize_product(raw_product_name, household_id, **kwargs):
+        if raw_product_name == "ERR":
+            raise ValueError("boom")
+        return {"success": True}
+
+    monkeypatch.setattr(normalizer, "normalize_product", normalize_product)
+    results = await normalizer.normalize_batch(items("A", "ERR", "B"), "h1", batch_size=2)
+
+    assert [r["success"] for r in results] == [True, False, True]
+    assert results[1]["error"] == "boom"
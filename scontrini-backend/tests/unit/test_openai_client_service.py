@@ -0,0 +1,157 @@
+"""
+Unit Tests - OpenAI Client
+Client per stage, stima e correzione dei token, attesa sui bucket fuori dal timeout
+(chiamata al provider sostituita da stub)
+"""
+import asyncio
+import pytest
+from app.services.openai_client_service import OpenAIClientService
+from app.utils.deadline import DeadlineExceeded, deadline_scope
+from app.utils.token_bucket import TokenBucket
+
+
+@pytest.fixture
+def service():
+    service = OpenAIClientService()
+    service.stage_timeouts = {"interpret": 0.05}
+    service.hedge_after = 0
+    service.max_retries = 0
+    service._requests = TokenBucket(600)  # 10 richieste/s
+    service._tokens = TokenBucket(0)
+    service.calls = 0
+
+    async def call(kwargs, estimated_tokens):
+        service.calls += 1
+        return "response"
+
+    service._call = call
+    return service
+
+
+async def drain(bucket: TokenBucket):
+    await bucket.acquire(bucket.capacity)
+
+
+@pytest.mark.asyncio
+async def test_bucket_wait_not_counted_as_timeout(service):
+    await drain(service._requests)  # Attesa ~0.1s > timeout tentativo 0.05s
+
+    assert await service.create_chat_completion("interpret", messages=[]) == "response"
+    assert service.get_stats()["timeouts"] == 0
+    assert service.breaker.get_stats()["consecutive_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bucket_wait_past_deadline(service):
+    await drain(service._requests)
+
+    with deadline_scope(0.03):
+        with pytest.raises(DeadlineExceeded):
+            await service.create_chat_completion("interpret", messages=[])
+
+    assert service.calls == 0
+    assert service.breaker.get_stats()["consecutive_failures"] == 0
+    assert service.get_stats()["deadline_exceeded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_provider_timeout_still_counted(service):
+    async def slow_call(kwargs, estimated_tokens):
+        await asyncio.sleep(1)
+
+    service._call = slow_call
+    with pytest.raises(asyncio.TimeoutError):
+        await service.create_chat_completion("interpret", messages=[])
+
+    assert service.get_stats()["timeouts"] == 1
+    assert service.breaker.get_stats()["consecutive_failures"] == 1
+
+
+class FakeCompletions:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.kwargs = None
+
+    async def create(self, **kwargs):
+        self.kwargs = kwargs
+        if self.error:
+            raise self.error
+        return self.response
+
+
+class FakeOpenAI:
+    def __init__(self, completions: FakeCompletions):
+        self.chat = type("Chat", (), {"completions": completions})()
+
+
+class FakeResponse:
+    def __init__(self, total_tokens=None):
+        self.usage = type("Usage", (), {"total_tokens": total_tokens})() if total_tokens else None
+
+
+@pytest.mark.asyncio
+async def test_get_client_routes_stage(service):
+    stages = []
+
+    async def create_chat_completion(stage, **kwargs):
+        stages.append((stage, kwargs))
+        return "response"
+
+    service.create_chat_completion = create_chat_completion
+    client = service.get_client("validate")
+
+    assert await client.chat.completions.create(model="m", messages=[]) == "response"
+    assert stages == [("validate", {"model": "m", "messages": []})]
+
+
+def test_estimate_tokens(service):
+    messages = [{"role": "system", "content": "x" * 40}, {"role": "user", "content": None}]
+
+    assert service._estimate_tokens(messages, 100) == 110
+    assert service._estimate_tokens(messages, None) == 10 + service.default_output_tokens
+
+
+@pytest.fixture
+def real_call_service():
+    """Servizio con _call reale e bucket token piccolo (2 token/s) per leggere le correzioni"""
+    service = OpenAIClientService()
+    service._tokens = TokenBucket(120)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_call_adjusts_to_actual_usage(real_call_service):
+    service = real_call_service
+    completions = FakeCompletions(response=FakeResponse(total_tokens=30))
+    service._get_openai = lambda: FakeOpenAI(completions)
+    await service._tokens.acquire(100)
+
+    await service._call({"model": "m", "messages": []}, 100)
+
+    # 70 token stimati in eccesso restituiti al bucket
+    assert service._tokens.get_stats()["available"] == pytest.approx(90, abs=1)
+    assert completions.kwargs == {"model": "m", "messages": []}
+
+
+@pytest.mark.asyncio
+async def test_call_without_usage_keeps_estimate(real_call_service):
+    service = real_call_service
+    service._get_openai = lambda: FakeOpenAI(FakeCompletions(response=FakeResponse()))
+    await service._tokens.acquire(100)
+
+    await service._call({}, 100)
+
+    assert service._tokens.get_stats()["available"] == pytest.approx(20, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_call_error_refunds_estimate(real_call_service):
+    service = real_call_service
+    service._get_openai = lambda: FakeOpenAI(FakeCompletions(error=RuntimeError("boom")))
+    await service._tokens.acquire(100)
+
+    with pytest.raises(RuntimeError):
+        await service._call({}, 100)
+
+    assert service._tokens.get_stats()["available"] == pytest.approx(120, abs=1)
@@ -0,0 +1,121 @@
+"""
+Unit Tests - Receipt Jobs
+Ciclo di vita job, coda piena e stato condiviso tra worker (fakeredis)
+"""
+import asyncio
+import pytest
+import pytest_asyncio
+from app.services.cache_backend import RedisCacheNamespace
+from app.services.receipt_job_service import ReceiptJobQueueFullError, ReceiptJobService
+
+
+@pytest_asyncio.fixture
+async def service():
+    service = ReceiptJobService()
+    service.num_workers = 1
+    service.max_queue_size = 2
+    yield service
+    await service.stop()
+
+
+async def wait_finished(service, job_id):
+    for _ in range(100):
+        job = await service.get_job(job_id)
+        if job and job["finished_at"]:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job not finished")
+
+
+@pytest.mark.asyncio
+async def test_submit_run_status(service):
+    await service.start()
+
+    async def handler():
+        return {"items": 3}
+
+    job = await service.submit(handler, metadata={"household_id": "h1"})
+    assert job["status"] == ReceiptJobService.STATUS_QUEUED
+
+    job = await wait_finished(service, job["job_id"])
+    assert job["status"] == ReceiptJobService.STATUS_COMPLETED
+    assert job["result"] == {"items": 3}
+    assert job["metadata"] == {"household_id": "h1"}
+
+
+@pytest.mark.asyncio
+async def test_failed_job_keeps_error(service):
+    await service.start()
+
+    async def handler():
+        raise ValueError("OCR failed")
+
+    job = await wait_finished(service, (await service.submit(handler))["job_id"])
+    assert job["status"] == ReceiptJobService.STATUS_FAILED
+    assert job["error"] == "OCR failed"
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_expire(service):
+    service.job_ttl_seconds = 0
+    await service.start()
+
+    async def handler():
+        return None
+
+    job_id = (await service.submit(handler))["job_id"]
+    for _ in range(100):
+        if service._jobs[job_id]["finished_at"]:
+            break
+        await asyncio.sleep(0.01)
+
+    assert await service.get_job(job_id) is None
+
+
+@pytest.mark.asyncio
+async def test_queue_full(service):
+    await service.start()
+    release = asyncio.Event()
+
+    async def handler():
+        await release.wait()
+
+    await service.submit(handler)
+    await asyncio.sleep(0.01)  # Il worker preleva il primo job
+    await service.submit(handler)
+    await service.submit(handler)
+
+    # Mappato su 503 da POST /process/async
+    with pytest.raises(ReceiptJobQueueFullError):
+        await service.submit(handler)
+    release.set()
+
+
+@pytest.mark.asyncio
+async def test_submit_requires_started_workers(service):
+    async def handler():
+        return None
+
+    with pytest.raises(RuntimeError):
+        await service.submit(handler)
+
+
+@pytest.mark.asyncio
+async def test_status_visible_from_other_worker(service):
+    fakeredis = pytest.importorskip("fakeredis")  # requirements-dev.txt
+    client = fakeredis.FakeRedis()
+    service._shared = RedisCacheNamespace(client, "test:receipt_jobs", 60, 1024)
+    other = ReceiptJobService()
+    other._shared = RedisCacheNamespace(client, "test:receipt_jobs", 60, 1024)
+    await service.start()
+
+    async def handler():
+        return {"items": 1}
+
+    job_id = (await service.submit(handler))["job_id"]
+    await wait_finished(service, job_id)
+
+    job = await other.get_job(job_id)
+    assert job["status"] == ReceiptJobService.STATUS_COMPLETED
+    assert job["result"] == {"items": 1}
+    assert await other.get_job("missing") is None
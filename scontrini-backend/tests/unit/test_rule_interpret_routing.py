@@ -0,0 +1,65 @@
+"""
+Unit Tests - Rule Interpret nel batch
+Miss delle regole contati una sola volta per item (LLM sostituito da stub)
+"""
+import pytest
+from app.agents import product_normalizer as module
+from app.agents.product_normalizer import ProductNormalizerV2
+
+RULE_HIT = "LATTE PS GRANAROLO 1LT"
+RULE_MISS = "XYZ ABC 12"
+
+
+@pytest.fixture
+def normalizer(monkeypatch):
+    monkeypatch.setattr(module.settings, "RULE_INTERPRET_ENABLED", True)
+    monkeypatch.setattr(module.settings, "LLM_INTERPRET_BATCH_ENABLED", True)
+    normalizer = ProductNormalizerV2()
+    normalizer.batches = []
+
+    async def interpret_batch(items, store_name=None):
+        normalizer.batches.append(items)
+        return [{"success": True, "hypothesis": item["raw_name"].lower()} for item in items]
+
+    monkeypatch.setattr(normalizer.llm_interpret_service, "interpret_batch", interpret_batch)
+    return normalizer
+
+
+def stats(normalizer):
+    rule = normalizer.get_stats()["rule_interpret"]
+    return rule["hits"], rule["below_threshold"]
+
+
+@pytest.mark.asyncio
+async def test_batched_misses_counted_once(normalizer):
+    items = [{"raw_product_name": name} for name in (RULE_HIT, RULE_MISS, RULE_MISS + " B", "CACHED")]
+
+    interpretations = await normalizer._interpret_misses_batch(items, [None, None, None, {"hit": 1}])
+
+    assert sorted(interpretations) == [0, 1, 2]
+    assert interpretations[0]["coverage"] == 1.0
+    assert len(normalizer.batches) == 1 and len(normalizer.batches[0]) == 2
+    assert stats(normalizer) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_single_miss_left_to_pipeline(normalizer):
+    items = [{"raw_product_name": RULE_HIT}, {"raw_product_name": RULE_MISS}]
+
+    interpretations = await normalizer._interpret_misses_batch(items, [None, None])
+    assert list(interpretations) == [0]
+    assert normalizer.batches == []
+
+    # La pipeline per item ripete la regola sul miss e lo conta
+    assert normalizer._rule_interpret(RULE_MISS, None) is None
+    assert stats(normalizer) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_empty_name_left_to_llm(normalizer):
+    items = [{"raw_product_name": ""}, {"raw_product_name": RULE_MISS}, {"raw_product_name": RULE_HIT}]
+
+    interpretations = await normalizer._interpret_misses_batch(items, [None, None, None])
+
+    assert sorted(interpretations) == [0, 1, 2]
+    assert [item["raw_name"] for item in normalizer.batches[0]] == ["", RULE_MISS]
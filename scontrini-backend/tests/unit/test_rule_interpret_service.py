@@ -0,0 +1,101 @@
+"""
+Unit Tests - Rule Interpret
+Espansione abbreviazioni, brand e formato senza LLM (nessun servizio esterno)
+"""
+import json
+import pytest
+from app.services.rule_interpret_service import RuleInterpretService, tokenize
+
+
+@pytest.fixture
+def service():
+    return RuleInterpretService()
+
+
+def test_tokenize_keeps_decimals():
+    assert tokenize("AC.MINGAS.S.ANNA 1,5X6") == ["AC", "MINGAS", "S", "ANNA", "1,5X6"]
+
+
+def test_expands_abbreviations_brand_and_size(service):
+    result = service.interpret_raw_name("LATTE PS GRANAROLO 1LT")
+    assert result["hypothesis"] == "Granarolo latte parzialmente scremato 1L"
+    assert result["brand"] == "Granarolo"
+    assert result["product_type"] == "latte"
+    assert (result["size"], result["unit_type"]) == ("1", "L")
+    assert result["category"] == "Freschi"
+    assert "parzialmente-scremato" in result["tags"]
+    assert result["coverage"] == 1.0
+
+
+@pytest.mark.parametrize("raw_name,size,unit_type", [
+    ("MOZZ GALBANI 125 GR", "125", "g"),
+    ("ACQ FRIZZ SAN BENEDETTO 6X1,5L", "1.5", "L"),
+    ("BIO YOG NAT 2X125G CONF", "125", "g"),
+    ("PARM REGG GRAT GR 100", "100", "g"),
+])
+def test_size_formats(service, raw_name, size, unit_type):
+    result = service.interpret_raw_name(raw_name)
+    assert (result["size"], result["unit_type"]) == (size, unit_type)
+    assert result["coverage"] == 1.0
+
+
+def test_unknown_tokens_lower_coverage_and_stay_in_hypothesis(service):
+    result = service.interpret_raw_name("AC.MINGAS.S.ANNA 1.5X6")
+    assert result["brand"] == "Sant'Anna"
+    assert "mingas" in result["hypothesis"]
+    assert result["coverage"] == pytest.approx(0.8)
+
+
+def test_unrecognized_name(service):
+    result = service.interpret_raw_name("XYZ ABC 12")
+    assert result["product_type"] is None
+    assert result["coverage"] == 0.0
+
+
+@pytest.mark.parametrize("raw_name", ["", "   "])
+def test_empty_name(service, raw_name):
+    result = service.interpret_raw_name(raw_name)
+    assert result["hypothesis"] == raw_name
+    assert result["coverage"] == 0.0
+
+
+def test_extra_lexicon_overrides_defaults():
+    service = RuleInterpretService(abbreviations={"MINGAS": "minerale gassata"})
+    result = service.interpret_raw_name("AC.MINGAS.S.ANNA 1.5X6")
+    assert result["coverage"] == 1.0
+    assert result["hypothesis"] == "Sant'Anna acqua minerale gassata 1.5"
+
+
+def test_mined_lexicon_store_and_support(tmp_path):
+    lexicon = {
+        "format": 1,
+        "version": 4,
+        "abbreviations": {
+            "global": {
+                "MINGAS": {"minerale gassata": 5},
+                "NEGR": {"negroni": 1},                # Supporto insufficiente
+                "PS": {"pane speciale": 9},            # Dizionario predefinito vince
+            },
+            "stores": {"ESSELUNGA": {"MINGAS": {"minerale gasata": 3}}},
+        },
+        "brands": {"global": {"SANNA": {"Sant'Anna": 4}}, "stores": {}},
+    }
+    path = tmp_path / "lexicon.json"
+    path.write_text(json.dumps(lexicon))
+
+    service = RuleInterpretService()
+    assert service.load_lexicon(str(path), min_support=3)
+    assert service.lexicon_version == 4
+    assert "NEGR" not in service.abbreviations
+    assert service.abbreviations["PS"] == "parzialmente scremato"
+
+    result = service.interpret_raw_name("ACQ MINGAS SANNA")
+    assert result["hypothesis"] == "Sant'Anna acqua minerale gassata"
+    store_result = service.interpret_raw_name("ACQ MINGAS SANNA", store_name="Esselunga")
+    assert store_result["hypothesis"] == "Sant'Anna acqua minerale gasata"
+
+
+def test_missing_lexicon(tmp_path):
+    service = RuleInterpretService()
+    assert not service.load_lexicon(str(tmp_path / "missing.json"), min_support=3)
+    assert service.lexicon_version is None
@@ -0,0 +1,99 @@
+"""
+Unit Tests - Single Flight
+Deduplica di normalizzazioni concorrenti identiche (pipeline sostituita da stub)
+"""
+import asyncio
+import pytest
+from app.agents.product_normalizer import ProductNormalizerV2
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_execution():
+    group = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    results = await asyncio.gather(*[group.do("key", work) for _ in range(5)])
+
+    assert len(runs) == 1
+    assert all(result == {"ok": True} for result in results)
+    assert group.get_stats() == {"calls": 5, "executions": 1, "deduplicated": 4, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_error_shared_and_key_released():
+    group = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(group.do("key", fail), group.do("key", fail), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def ok():
+        return 1
+
+    assert await group.do("key", ok) == 1  # Nuova esecuzione dopo l'errore
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    group = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(group.do("key", work))
+    second = asyncio.ensure_future(group.do("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+
+
+@pytest.fixture
+def normalizer(monkeypatch):
+    normalizer = ProductNormalizerV2()
+    normalizer.runs = []
+
+    async def run_pipeline(raw_product_name, household_id, store_name, price, skip_cache, interpret_result):
+        normalizer.runs.append((price, skip_cache, interpret_result))
+        await asyncio.sleep(0.01)
+        return {"success": True, "price_seen": price}
+
+    monkeypatch.setattr(normalizer, "_run_pipeline", run_pipeline)
+    return normalizer
+
+
+@pytest.mark.asyncio
+async def test_normalize_deduplicates_identical_requests(normalizer):
+    results = await asyncio.gather(*[
+        normalizer.normalize_product("COCA COLA 1.5L", "h1", "Conad", price=1.49)
+        for _ in range(3)
+    ])
+
+    assert len(normalizer.runs) == 1
+    assert results[0] == results[1] and results[0] is not results[1]  # Copie
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("other", [
+    {"price": 2.99},
+    {"price": 1.49, "skip_cache": True},
+    {"price": 1.49, "interpret_result": {"success": True, "hypothesis": "Coca Cola 1.5L"}},
+])
+async def test_normalize_keys_on_price_skip_cache_and_interpret(normalizer, other):
+    first, second = await asyncio.gather(
+        normalizer.normalize_product("COCA COLA 1.5L", "h1", "Conad", price=1.49),
+        normalizer.normalize_product("COCA COLA 1.5L", "h1", "Conad", **other)
+    )
+
+    assert len(normalizer.runs) == 2
+    assert second["price_seen"] == other["price"]
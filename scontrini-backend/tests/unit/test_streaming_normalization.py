@@ -0,0 +1,105 @@
+"""
+Unit Tests - Parsing in streaming + normalizzazione
+Riuso dei risultati in streaming solo a parità di input con la modalità batch
+(parser e normalizzatore sostituiti da stub)
+"""
+import pytest
+
+COCA_1 = {"raw_product_name": "COCA COLA 1.5L", "quantity": 1, "total_price": 1.5}
+COCA_2 = {"raw_product_name": "COCA COLA 1.5L", "quantity": 2, "total_price": 3.0}
+PASTA = {"raw_product_name": "PASTA BARILLA 500G", "quantity": 1, "total_price": 0.9}
+
+
+@pytest.fixture
+def pipeline(monkeypatch, receipts_routes):
+    pipeline = {"events": [], "streamed": [], "batched": []}
+
+    async def parse_receipt_stream(text):
+        for event in pipeline["events"]:
+            yield event
+
+    async def normalize_stream(items, household_id):
+        idx = 0
+        async for item in items:
+            pipeline["streamed"].append((item["raw_product_name"], item["store_name"], item["price"]))
+            yield idx, {"success": True, "source": "stream", "price": item["price"]}
+            idx += 1
+
+    async def normalize_batch(items, household_id):
+        pipeline["batched"].extend((i["raw_product_name"], i["store_name"], i["price"]) for i in items)
+        return [{"success": True, "source": "batch", "price": i["price"]} for i in items]
+
+    monkeypatch.setattr(receipts_routes.ai_receipt_parser, "parse_receipt_stream", parse_receipt_stream)
+    monkeypatch.setattr(receipts_routes.product_normalizer_v2, "normalize_stream", normalize_stream)
+    monkeypatch.setattr(receipts_routes.product_normalizer_v2, "normalize_batch", normalize_batch)
+    return pipeline
+
+
+async def run(receipts_routes, pipeline, header, items, store_name="Esselunga"):
+    pipeline["events"] = (
+        [("header", header)]
+        + [("item", dict(item)) for item in items]
+        + [("result", {"success": True, "store_name": store_name, "items": [dict(item) for item in items]})]
+    )
+    request = receipts_routes.ProcessReceiptRequest(household_id="h1", uploaded_by="u1", image_url="x")
+    return await receipts_routes._parse_and_normalize_streaming(request, {"text": "..."})
+
+
+@pytest.mark.asyncio
+async def test_streamed_results_reused(receipts_routes, pipeline):
+    _, batch_items, norm_results = await run(receipts_routes, pipeline, {"store_name": "Esselunga"}, [PASTA])
+
+    assert pipeline["streamed"] == [("PASTA BARILLA 500G", "Esselunga", 0.9)]
+    assert pipeline["batched"] == []
+    assert [r["source"] for r in norm_results] == ["stream"]
+    assert len(batch_items) == 1
+
+
+@pytest.mark.asyncio
+async def test_items_before_store_name_normalized_once(receipts_routes, pipeline):
+    _, _, norm_results = await run(receipts_routes, pipeline, {}, [COCA_1, PASTA])
+
+    assert pipeline["streamed"] == []
+    assert pipeline["batched"] == [
+        ("COCA COLA 1.5L", "Esselunga", 1.5),
+        ("PASTA BARILLA 500G", "Esselunga", 0.9),
+    ]
+    assert [r["source"] for r in norm_results] == ["batch", "batch"]
+
+
+@pytest.mark.asyncio
+async def test_duplicates_use_aggregated_price(receipts_routes, pipeline):
+    _, batch_items, norm_results = await run(
+        receipts_routes, pipeline, {"store_name": "Esselunga"}, [COCA_1, PASTA, COCA_2]
+    )
+
+    # Prima riga in streaming col proprio prezzo, poi di nuovo col prezzo aggregato (come in batch)
+    assert pipeline["streamed"] == [
+        ("COCA COLA 1.5L", "Esselunga", 1.5),
+        ("PASTA BARILLA 500G", "Esselunga", 0.9),
+    ]
+    assert pipeline["batched"] == [("COCA COLA 1.5L", "Esselunga", 4.5)]
+    assert [(item["raw_product_name"], item["price"]) for item in batch_items] == [
+        ("COCA COLA 1.5L", 4.5),
+        ("PASTA BARILLA 500G", 0.9),
+    ]
+    assert [(r["source"], r["price"]) for r in norm_results] == [("batch", 4.5), ("stream", 0.9)]
+
+
+@pytest.mark.asyncio
+async def test_store_changed_after_header(receipts_routes, pipeline):
+    _, _, norm_results = await run(
+        receipts_routes, pipeline, {"store_name": "ESSELUNGA SPA"}, [PASTA], store_name="Esselunga"
+    )
+
+    assert pipeline["batched"] == [("PASTA BARILLA 500G", "Esselunga", 0.9)]
+    assert norm_results[0]["source"] == "batch"
+
+
+@pytest.mark.asyncio
+async def test_parsing_failure_raises(receipts_routes, pipeline):
+    pipeline["events"] = [("result", {"success": False, "error": "boom"})]
+    request = receipts_routes.ProcessReceiptRequest(household_id="h1", uploaded_by="u1", image_url="x")
+
+    with pytest.raises(Exception, match="Parsing failed: boom"):
+        await receipts_routes._parse_and_normalize_streaming(request, {"text": "..."})
@@ -0,0 +1,52 @@
+"""
+Unit Tests - Token Bucket
+Attesa FIFO sulla ricarica, prelievo immediato e correzioni (nessun servizio esterno)
+"""
+import asyncio
+import pytest
+from app.utils.token_bucket import TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_waits_for_refill():
+    bucket = TokenBucket(600)  # 10 unità/s
+    assert await bucket.acquire(600) == 0.0
+
+    waited = await bucket.acquire(1)
+    assert waited == pytest.approx(0.1, abs=0.02)
+    assert bucket.get_stats()["waits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_oversized_request_capped_at_capacity():
+    bucket = TokenBucket(60)
+    assert await bucket.acquire(10_000) == 0.0
+    assert bucket.get_stats()["available"] == pytest.approx(0.0, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_try_acquire_never_waits():
+    bucket = TokenBucket(600)
+    assert bucket.try_acquire(590)
+    assert not bucket.try_acquire(20)
+
+    # Con un chiamante in coda il prelievo immediato cede il passo
+    waiter = asyncio.ensure_future(bucket.acquire(20))
+    await asyncio.sleep(0)
+    assert not bucket.try_acquire(1)
+    await waiter
+
+
+def test_adjust_refunds_and_charges():
+    bucket = TokenBucket(60)
+    bucket.adjust(-100)
+    assert bucket.get_stats()["available"] < 0
+    bucket.adjust(1000)
+    assert bucket.get_stats()["available"] == 60
+
+
+@pytest.mark.asyncio
+async def test_disabled_bucket():
+    bucket = TokenBucket(0)
+    assert await bucket.acquire(1_000_000) == 0.0
+    assert bucket.try_acquire(1_000_000)
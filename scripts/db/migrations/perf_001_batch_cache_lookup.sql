@@ -0,0 +1,129 @@
+-- ===================================
+-- Migration: PERF_001 - Batch Cache Lookup Function
+-- ===================================
+-- Descrizione: Lookup cache 2-tier per TUTTE le righe di uno scontrino in una sola chiamata
+-- Problema: get_cached_product + query Tier 2 + fetch normalized_products = fino a 3 round trip
+--           per riga (scontrino da 40 righe → ~120 chiamate PostgREST)
+-- Soluzione:
+--   1. Input JSONB con tutte le righe (idx, raw_name, store_name, price)
+--   2. Tier 1 (product_cache_stats) + Tier 2 (product_mappings) risolti in set-based CTE
+--   3. JOIN con normalized_products per i dati prodotto
+--   4. Output JSONB: solo gli hit, ciascuno con idx della riga di input
+-- Stessa semantica di get_cached_product() + CacheService._query_cache_tier2()
+-- Prerequisiti: mvp_003 (product_cache_stats), mvp_004 (get_cached_product)
+-- Performance target: <30ms per scontrino da 40 righe
+-- ===================================
+
+CREATE OR REPLACE FUNCTION get_cached_products_batch(
+  p_items JSONB,  -- [{"idx": 0, "raw_name": "...", "store_name": "...", "price": 1.49}, ...]
+  p_tier2_min_confidence FLOAT DEFAULT 0.85,
+  p_price_tolerance FLOAT DEFAULT 0.30
+) RETURNS JSONB AS $$
+  WITH items AS (
+    SELECT
+      (i->>'idx')::int AS idx,
+      i->>'raw_name' AS raw_name,
+      i->>'store_name' AS store_name,
+      (i->>'price')::numeric AS price
+    FROM jsonb_array_elements(p_items) AS i
+  ),
+  -- TIER 1: product_cache_stats (verified by user)
+  -- Ordine come get_cached_product: exact store match > usage_count > recency
+  tier1 AS (
+    SELECT DISTINCT ON (it.idx)
+      it.idx,
+      cs.normalized_product_id AS product_id,
+      jsonb_build_object(
+        'usage_count', cs.usage_count,
+        'verified_by_households', cs.verified_by_households,
+        'avg_price', cs.avg_price,
+        'price_stddev', cs.price_stddev,
+        'last_used', cs.last_used,
+        'first_used', cs.first_used,
+        'price_coherent', CASE
+          WHEN it.price IS NULL THEN true
+          WHEN cs.avg_price IS NULL THEN true
+          ELSE ABS(it.price - cs.avg_price) / NULLIF(cs.avg_price, 0) <= p_price_tolerance
+        END
+      ) AS stats
+    FROM items it
+    JOIN product_cache_stats cs
+      ON cs.raw_name = it.raw_name
+     AND (cs.store_name = it.store_name OR (cs.store_name IS NULL AND it.store_name IS NULL))
+    ORDER BY
+      it.idx,
+      CASE WHEN cs.store_name = it.store_name THEN 1 ELSE 2 END,
+      cs.usage_count DESC,
+      cs.last_used DESC
+  ),
+  -- TIER 2: product_mappings auto-verificati con alta confidence (solo righe senza Tier 1)
+  tier2 AS (
+    SELECT DISTINCT ON (it.idx)
+      it.idx,
+      pm.normalized_product_id AS product_id,
+      jsonb_build_object('confidence_score', pm.confidence_score) AS stats
+    FROM items it
+    JOIN product_mappings pm
+      ON pm.raw_name = it.raw_name
+     AND pm.verified_by_user = false
+     AND pm.confidence_score >= p_tier2_min_confidence
+     AND (it.store_name IS NULL OR pm.store_name = it.store_name)
+    WHERE NOT EXISTS (SELECT 1 FROM tier1 t1 WHERE t1.idx = it.idx)
+    ORDER BY it.idx, pm.confidence_score DESC
+  ),
+  hits AS (
+    SELECT idx, 'cache_tier1' AS tier, product_id, stats FROM tier1
+    UNION ALL
+    SELECT idx, 'cache_tier2' AS tier, product_id, stats FROM tier2
+  )
+  SELECT COALESCE(
+    jsonb_agg(
+      jsonb_build_object(
+        'idx', h.idx,
+        'tier', h.tier,
+        'product_id', h.product_id,
+        'stats', h.stats,
+        'product', CASE WHEN np.id IS NULL THEN NULL ELSE jsonb_build_object(
+          'canonical_name', np.canonical_name,
+          'brand', np.brand,
+          'category', np.category,
+          'subcategory', np.subcategory,
+          'size', np.size,
+          'unit_type', np.unit_type
+        ) END
+      )
+      ORDER BY h.idx
+    ),
+    '[]'::jsonb
+  )
+  FROM hits h
+  LEFT JOIN normalized_products np ON np.id = h.product_id;
+$$ LANGUAGE sql STABLE;
+
+-- ===================================
+-- GRANT PERMISSIONS
+-- ===================================
+GRANT EXECUTE ON FUNCTION get_cached_products_batch(JSONB, FLOAT, FLOAT) TO authenticated;
+GRANT EXECUTE ON FUNCTION get_cached_products_batch(JSONB, FLOAT, FLOAT) TO service_role;
+
+-- ===================================
+-- VERIFICA FUNZIONE
+-- ===================================
+-- Test 1: Righe inesistenti
+SELECT get_cached_products_batch('[{"idx": 0, "raw_name": "PRODOTTO_NON_ESISTENTE", "store_name": "Conad", "price": 1.50}]'::jsonb);
+-- Expected: []
+
+-- Test 2: Se hai dati in cache, testa con più righe
+-- SELECT get_cached_products_batch('[
+--   {"idx": 0, "raw_name": "COCA COLA 1.5L", "store_name": "Conad", "price": 1.80},
+--   {"idx": 1, "raw_name": "PANE INTEGRALE 500G", "store_name": "Conad", "price": null}
+-- ]'::jsonb);
+-- Expected: array JSONB con un oggetto per ogni hit (idx, tier, product_id, stats, product)
+
+-- ===================================
+-- COMMENTI
+-- ===================================
+COMMENT ON FUNCTION get_cached_products_batch IS
+'Lookup cache 2-tier batch per uno scontrino intero.
+Input: array JSONB di righe {idx, raw_name, store_name, price}.
+Output: array JSONB dei soli hit {idx, tier, product_id, stats, product}.';
@@ -0,0 +1,322 @@
+-- ===================================
+-- Migration: PERF_002 - Incremental Cache Stats
+-- ===================================
+-- Descrizione: Sostituisce la materialized view product_cache_stats (mvp_003) con statistiche
+--              mantenute in modo incrementale ad ogni scrittura su purchase_history
+-- Problema: REFRESH MATERIALIZED VIEW ricalcola l'intero join product_mappings × purchase_history
+--           → costo lineare con lo storico acquisti, dati stale tra un refresh e l'altro
+-- Soluzione:
+--   1. Tabella product_purchase_stats: per prodotto running count, sum e sum of squares
+--      dei prezzi (avg_price e price_stddev come colonne generate)
+--   2. Tabella product_household_purchases: acquisti per (prodotto, household)
+--      → verified_by_households mantenuto senza COUNT(DISTINCT)
+--   3. Trigger su purchase_history (INSERT/UPDATE/DELETE) → aggiornamento O(1) per riga
+--   4. product_cache_stats diventa una VIEW (stesse colonne) su product_mappings verificati
+--      × product_purchase_stats → mapping appena verificati visibili subito
+--   5. refresh_product_cache_stats() resta come rebuild completo (solo riparazione/backfill)
+-- Compatibile con: get_cached_product (mvp_004), get_cached_products_batch (perf_001)
+-- Prerequisiti: mvp_002 (indici), mvp_003 (product_cache_stats)
+-- Performance target: trigger <1ms per riga, lookup invariato
+-- ===================================
+
+-- ===================================
+-- TABELLA: product_purchase_stats
+-- ===================================
+-- Statistiche acquisto per prodotto normalizzato
+-- STDDEV campionaria come STDDEV() di PostgreSQL:
+--   sqrt((sum_sq - sum^2 / n) / (n - 1)) per n > 1
+CREATE TABLE IF NOT EXISTS product_purchase_stats (
+  normalized_product_id UUID PRIMARY KEY REFERENCES normalized_products(id) ON DELETE CASCADE,
+  usage_count INTEGER NOT NULL DEFAULT 0,
+  verified_by_households INTEGER NOT NULL DEFAULT 0,
+  price_count INTEGER NOT NULL DEFAULT 0,  -- Acquisti con unit_price valorizzato
+  price_sum NUMERIC NOT NULL DEFAULT 0,
+  price_sum_sq NUMERIC NOT NULL DEFAULT 0,
+  first_used DATE,
+  last_used DATE,
+  avg_price NUMERIC GENERATED ALWAYS AS (
+    price_sum / NULLIF(price_count, 0)
+  ) STORED,
+  price_stddev NUMERIC GENERATED ALWAYS AS (
+    CASE
+      WHEN price_count > 1 THEN
+        SQRT(GREATEST((price_sum_sq - price_sum * price_sum / price_count) / (price_count - 1), 0))
+      ELSE NULL
+    END
+  ) STORED,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- ===================================
+-- TABELLA: product_household_purchases
+-- ===================================
+-- Contatore acquisti per (prodotto, household): verified_by_households = righe con count > 0
+CREATE TABLE IF NOT EXISTS product_household_purchases (
+  normalized_product_id UUID NOT NULL REFERENCES normalized_products(id) ON DELETE CASCADE,
+  household_id UUID NOT NULL REFERENCES households(id) ON DELETE CASCADE,
+  purchase_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (normalized_product_id, household_id)
+);
+
+-- Indice per ricalcolo first_used/last_used dopo DELETE
+CREATE INDEX IF NOT EXISTS idx_purchase_product_date
+ON purchase_history(normalized_product_id, purchase_date);
+
+-- ===================================
+-- FUNZIONE: apply_purchase_to_cache_stats
+-- ===================================
+-- Applica (p_sign = 1) o rimuove (p_sign = -1) un acquisto dalle statistiche
+CREATE OR REPLACE FUNCTION apply_purchase_to_cache_stats(
+  p_product_id UUID,
+  p_household_id UUID,
+  p_unit_price NUMERIC,
+  p_purchase_date DATE,
+  p_sign INTEGER
+) RETURNS void AS $$
+DECLARE
+  v_household_count INTEGER;
+  v_household_delta INTEGER := 0;
+  v_usage_count INTEGER;
+  v_first_used DATE;
+  v_last_used DATE;
+BEGIN
+  -- Acquisti senza prodotto normalizzato non entrano in cache
+  IF p_product_id IS NULL THEN
+    RETURN;
+  END IF;
+
+  IF p_sign > 0 THEN
+    -- Household: primo acquisto di questo prodotto → +1 household
+    INSERT INTO product_household_purchases AS hp (normalized_product_id, household_id, purchase_count)
+    VALUES (p_product_id, p_household_id, 1)
+    ON CONFLICT (normalized_product_id, household_id)
+    DO UPDATE SET purchase_count = hp.purchase_count + 1
+    RETURNING hp.purchase_count INTO v_household_count;
+
+    IF v_household_count = 1 THEN
+      v_household_delta := 1;
+    END IF;
+
+    INSERT INTO product_purchase_stats AS s (
+      normalized_product_id, usage_count, verified_by_households,
+      price_count, price_sum, price_sum_sq, first_used, last_used
+    )
+    VALUES (
+      p_product_id, 1, v_household_delta,
+      (p_unit_price IS NOT NULL)::int,
+      COALESCE(p_unit_price, 0),
+      COALESCE(p_unit_price * p_unit_price, 0),
+      p_purchase_date, p_purchase_date
+    )
+    ON CONFLICT (normalized_product_id) DO UPDATE SET
+      usage_count = s.usage_count + 1,
+      verified_by_households = s.verified_by_households + v_household_delta,
+      price_count = s.price_count + EXCLUDED.price_count,
+      price_sum = s.price_sum + EXCLUDED.price_sum,
+      price_sum_sq = s.price_sum_sq + EXCLUDED.price_sum_sq,
+      first_used = LEAST(s.first_used, EXCLUDED.first_used),
+      last_used = GREATEST(s.last_used, EXCLUDED.last_used),
+      updated_at = NOW();
+
+    RETURN;
+  END IF;
+
+  -- Rimozione: household senza più acquisti → -1 household
+  UPDATE product_household_purchases
+  SET purchase_count = purchase_count - 1
+  WHERE normalized_product_id = p_product_id
+    AND household_id = p_household_id
+  RETURNING purchase_count INTO v_household_count;
+
+  IF v_household_count IS NOT NULL AND v_household_count <= 0 THEN
+    DELETE FROM product_household_purchases
+    WHERE normalized_product_id = p_product_id
+      AND household_id = p_household_id;
+    v_household_delta := -1;
+  END IF;
+
+  UPDATE product_purchase_stats SET
+    usage_count = usage_count - 1,
+    verified_by_households = verified_by_households + v_household_delta,
+    price_count = price_count - (p_unit_price IS NOT NULL)::int,
+    price_sum = price_sum - COALESCE(p_unit_price, 0),
+    price_sum_sq = price_sum_sq - COALESCE(p_unit_price * p_unit_price, 0),
+    updated_at = NOW()
+  WHERE normalized_product_id = p_product_id
+  RETURNING usage_count, first_used, last_used
+  INTO v_usage_count, v_first_used, v_last_used;
+
+  IF v_usage_count IS NULL THEN
+    RETURN;
+  END IF;
+
+  IF v_usage_count <= 0 THEN
+    DELETE FROM product_purchase_stats WHERE normalized_product_id = p_product_id;
+  ELSIF p_purchase_date = v_first_used OR p_purchase_date = v_last_used THEN
+    -- MIN/MAX non sono decrementabili: ricalcolo sul solo prodotto (idx_purchase_product_date)
+    UPDATE product_purchase_stats s SET
+      first_used = d.first_used,
+      last_used = d.last_used
+    FROM (
+      SELECT MIN(purchase_date) AS first_used, MAX(purchase_date) AS last_used
+      FROM purchase_history
+      WHERE normalized_product_id = p_product_id
+    ) d
+    WHERE s.normalized_product_id = p_product_id;
+  END IF;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- ===================================
+-- TRIGGER: purchase_history → product_purchase_stats
+-- ===================================
+CREATE OR REPLACE FUNCTION trg_purchase_history_cache_stats()
+RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM apply_purchase_to_cache_stats(
+      OLD.normalized_product_id, OLD.household_id, OLD.unit_price, OLD.purchase_date, -1
+    );
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM apply_purchase_to_cache_stats(
+      NEW.normalized_product_id, NEW.household_id, NEW.unit_price, NEW.purchase_date, 1
+    );
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS purchase_history_cache_stats_ins_del ON purchase_history;
+CREATE TRIGGER purchase_history_cache_stats_ins_del
+AFTER INSERT OR DELETE ON purchase_history
+FOR EACH ROW EXECUTE FUNCTION trg_purchase_history_cache_stats();
+
+DROP TRIGGER IF EXISTS purchase_history_cache_stats_upd ON purchase_history;
+CREATE TRIGGER purchase_history_cache_stats_upd
+AFTER UPDATE OF normalized_product_id, household_id, unit_price, purchase_date ON purchase_history
+FOR EACH ROW EXECUTE FUNCTION trg_purchase_history_cache_stats();
+
+-- ===================================
+-- VIEW: product_cache_stats (sostituisce la materialized view)
+-- ===================================
+-- Stesse colonne di mvp_003: get_cached_product e get_cached_products_batch invariati
+-- La verifica di un mapping (verified_by_user = true) è visibile immediatamente
+-- Una riga per mapping verificato: nessuna ipotesi di unicità su (raw_name, store_name)
+-- (UNIQUE presente in schema.sql, assente in schema_final.sql). I lookup scelgono una
+-- sola riga con ORDER BY deterministico. Nessun DISTINCT ON: la view resta un join
+-- semplice e i filtri dei chiamanti (raw_name, store_name) arrivano agli indici di
+-- product_mappings invece di materializzare l'intero join
+DROP MATERIALIZED VIEW IF EXISTS product_cache_stats;
+
+CREATE OR REPLACE VIEW product_cache_stats AS
+SELECT
+  pm.raw_name,
+  pm.store_name,
+  pm.normalized_product_id,
+  ps.usage_count,
+  ps.verified_by_households,
+  ps.avg_price,
+  ps.price_stddev,
+  ps.last_used,
+  ps.first_used
+FROM product_mappings pm
+JOIN product_purchase_stats ps ON ps.normalized_product_id = pm.normalized_product_id
+WHERE pm.verified_by_user = true;
+
+-- ===================================
+-- FUNZIONE: refresh_product_cache_stats (rebuild completo)
+-- ===================================
+-- Non più necessaria nel flusso normale (i trigger mantengono le statistiche):
+-- mantenuta con lo stesso nome per backfill e riparazione
+CREATE OR REPLACE FUNCTION refresh_product_cache_stats()
+RETURNS void AS $$
+BEGIN
+  LOCK TABLE product_purchase_stats, product_household_purchases IN EXCLUSIVE MODE;
+
+  DELETE FROM product_household_purchases;
+  DELETE FROM product_purchase_stats;
+
+  INSERT INTO product_household_purchases (normalized_product_id, household_id, purchase_count)
+  SELECT normalized_product_id, household_id, COUNT(*)
+  FROM purchase_history
+  WHERE normalized_product_id IS NOT NULL
+  GROUP BY normalized_product_id, household_id;
+
+  INSERT INTO product_purchase_stats (
+    normalized_product_id, usage_count, verified_by_households,
+    price_count, price_sum, price_sum_sq, first_used, last_used
+  )
+  SELECT
+    normalized_product_id,
+    COUNT(*),
+    COUNT(DISTINCT household_id),
+    COUNT(unit_price),
+    COALESCE(SUM(unit_price), 0),
+    COALESCE(SUM(unit_price * unit_price), 0),
+    MIN(purchase_date),
+    MAX(purchase_date)
+  FROM purchase_history
+  WHERE normalized_product_id IS NOT NULL
+  GROUP BY normalized_product_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Backfill iniziale dallo storico esistente
+SELECT refresh_product_cache_stats();
+
+-- ===================================
+-- GRANT PERMISSIONS
+-- ===================================
+GRANT SELECT ON product_purchase_stats TO authenticated, service_role;
+GRANT SELECT ON product_household_purchases TO service_role;
+GRANT SELECT ON product_cache_stats TO authenticated, service_role;
+GRANT EXECUTE ON FUNCTION refresh_product_cache_stats TO service_role;
+
+-- ===================================
+-- VERIFICA
+-- ===================================
+-- Verifica view e trigger creati
+SELECT table_name, table_type
+FROM information_schema.tables
+WHERE table_name IN ('product_cache_stats', 'product_purchase_stats', 'product_household_purchases');
+
+SELECT trigger_name, event_manipulation
+FROM information_schema.triggers
+WHERE event_object_table = 'purchase_history';
+
+-- Verifica pushdown: Index Scan su idx_mappings_cache_tier1, nessun join completo
+-- EXPLAIN SELECT * FROM product_cache_stats WHERE raw_name = 'COCA COLA 1.5L' AND store_name = 'Conad';
+
+-- Verifica coerenza statistiche incrementali vs calcolo completo
+-- Expected: 0 righe
+SELECT ps.normalized_product_id
+FROM product_purchase_stats ps
+JOIN (
+  SELECT
+    normalized_product_id,
+    COUNT(*) AS usage_count,
+    COUNT(DISTINCT household_id) AS verified_by_households,
+    AVG(unit_price) AS avg_price,
+    STDDEV(unit_price) AS price_stddev
+  FROM purchase_history
+  WHERE normalized_product_id IS NOT NULL
+  GROUP BY normalized_product_id
+) full_stats USING (normalized_product_id)
+WHERE ps.usage_count <> full_stats.usage_count
+   OR ps.verified_by_households <> full_stats.verified_by_households
+   OR ABS(COALESCE(ps.avg_price, 0) - COALESCE(full_stats.avg_price, 0)) > 0.0001
+   OR ABS(COALESCE(ps.price_stddev, 0) - COALESCE(full_stats.price_stddev, 0)) > 0.0001;
+
+-- ===================================
+-- COMMENTI
+-- ===================================
+COMMENT ON TABLE product_purchase_stats IS
+'Statistiche acquisto per prodotto (running count/sum/sum of squares).
+Mantenuta dai trigger su purchase_history; rebuild con refresh_product_cache_stats().';
+
+COMMENT ON VIEW product_cache_stats IS
+'Cache Tier 1: mapping verificati × product_purchase_stats.
+Sempre aggiornata, nessun refresh necessario.';
@@ -0,0 +1,105 @@
+-- ===================================
+-- Migration: PERF_003 - Cache Warm-up Functions
+-- ===================================
+-- Descrizione: Funzioni per precaricare la cache L1 all'avvio del backend
+-- Problema: dopo un deploy ogni worker parte con cache vuota → la prima ora di scontrini
+--           paga il costo pieno dei cache miss
+-- Soluzione:
+--   1. get_cache_warmup_stores: negozi ordinati per utilizzo totale
+--   2. get_cache_warmup_entries: top-N mapping verificati di un negozio + dati prodotto
+--      (stesso formato riga di get_cached_products_batch, tier = cache_tier1)
+-- Prerequisiti: perf_002 (product_cache_stats view), perf_001
+-- Performance target: <50ms per negozio con N=200
+-- ===================================
+
+-- ===================================
+-- FUNCTION: get_cache_warmup_stores
+-- ===================================
+CREATE OR REPLACE FUNCTION get_cache_warmup_stores(
+  p_max_stores INT DEFAULT 50
+) RETURNS JSONB AS $$
+  SELECT COALESCE(jsonb_agg(s.store_name ORDER BY s.total_usage DESC), '[]'::jsonb)
+  FROM (
+    SELECT cs.store_name, SUM(cs.usage_count) AS total_usage
+    FROM product_cache_stats cs
+    GROUP BY cs.store_name
+    ORDER BY total_usage DESC
+    LIMIT p_max_stores
+  ) s;
+$$ LANGUAGE sql STABLE;
+
+-- ===================================
+-- FUNCTION: get_cache_warmup_entries
+-- ===================================
+-- Top-N mapping per usage_count (stesso ordine di priorità di get_cached_product)
+-- p_store_name NULL → mapping senza negozio
+CREATE OR REPLACE FUNCTION get_cache_warmup_entries(
+  p_store_name TEXT,
+  p_limit INT DEFAULT 200
+) RETURNS JSONB AS $$
+  SELECT COALESCE(
+    jsonb_agg(
+      jsonb_build_object(
+        'raw_name', top.raw_name,
+        'store_name', top.store_name,
+        'tier', 'cache_tier1',
+        'product_id', top.normalized_product_id,
+        'stats', jsonb_build_object(
+          'usage_count', top.usage_count,
+          'verified_by_households', top.verified_by_households,
+          'avg_price', top.avg_price,
+          'price_stddev', top.price_stddev,
+          'last_used', top.last_used,
+          'first_used', top.first_used
+        ),
+        'product', jsonb_build_object(
+          'canonical_name', np.canonical_name,
+          'brand', np.brand,
+          'category', np.category,
+          'subcategory', np.subcategory,
+          'size', np.size,
+          'unit_type', np.unit_type
+        )
+      )
+      ORDER BY top.usage_count DESC
+    ),
+    '[]'::jsonb
+  )
+  FROM (
+    SELECT *
+    FROM (
+      -- Una riga per raw_name (come get_cached_product: usage_count, poi recency)
+      SELECT DISTINCT ON (cs.raw_name) cs.*
+      FROM product_cache_stats cs
+      WHERE cs.store_name IS NOT DISTINCT FROM p_store_name
+      ORDER BY cs.raw_name, cs.usage_count DESC, cs.last_used DESC
+    ) best
+    ORDER BY best.usage_count DESC
+    LIMIT p_limit
+  ) top
+  JOIN normalized_products np ON np.id = top.normalized_product_id;
+$$ LANGUAGE sql STABLE;
+
+-- ===================================
+-- GRANT PERMISSIONS
+-- ===================================
+GRANT EXECUTE ON FUNCTION get_cache_warmup_stores(INT) TO service_role;
+GRANT EXECUTE ON FUNCTION get_cache_warmup_entries(TEXT, INT) TO service_role;
+
+-- ===================================
+-- VERIFICA FUNZIONI
+-- ===================================
+-- Test 1: Negozi più usati
+SELECT get_cache_warmup_stores(10);
+-- Expected: array JSONB di store_name (può contenere null)
+
+-- Test 2: Top mapping di un negozio
+-- SELECT get_cache_warmup_entries('Conad', 20);
+-- Expected: array JSONB {raw_name, store_name, tier, product_id, stats, product}
+
+-- ===================================
+-- COMMENTI
+-- ===================================
+COMMENT ON FUNCTION get_cache_warmup_entries IS
+'Top-N mapping verificati di un negozio con statistiche e dati prodotto.
+Usata dal warm-up cache all''avvio del backend.';
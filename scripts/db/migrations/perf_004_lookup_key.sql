@@ -0,0 +1,280 @@
+-- ===================================
+-- Migration: PERF_004 - OCR-tolerant Lookup Key
+-- ===================================
+-- Descrizione: Chiave di lookup normalizzata per la cache 2-tier
+-- Problema: match esatto su raw_name → "COCA COLA 1,5L", "COCA-COLA 1.5 L" e "C0CA COLA 1.5L"
+--           sono tre miss distinti e finiscono tutti nel path LLM
+-- Soluzione:
+--   1. Colonna product_mappings.lookup_key calcolata in Python
+--      (app/utils/lookup_key.py: maiuscolo, spazi/punteggiatura, separatore decimale, confusioni OCR)
+--   2. Indici partial per Tier 1 / Tier 2 su (lookup_key, store_name)
+--   3. product_cache_stats espone lookup_key
+--   4. get_cached_product e get_cached_products_batch: match su raw_name OR lookup_key
+--      nella stessa query (nessun round trip aggiuntivo), match esatto preferito.
+--      Interrogano product_mappings ⋈ product_purchase_stats direttamente, un ramo
+--      UNION ALL per raw_name e uno per lookup_key: ogni ramo usa il proprio indice
+--      partial (un OR tra colonne diverse non sarebbe indicizzabile)
+--   5. set_mapping_lookup_keys: update batch per il backfill
+--      (python -m scripts.backfill_lookup_keys da scontrini-backend/)
+-- Prerequisiti: perf_001, perf_002
+-- ===================================
+
+-- ===================================
+-- COLONNA + INDICI
+-- ===================================
+ALTER TABLE product_mappings ADD COLUMN IF NOT EXISTS lookup_key TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_mappings_lookup_key_tier1
+ON product_mappings(lookup_key, store_name)
+WHERE verified_by_user = true;
+
+CREATE INDEX IF NOT EXISTS idx_mappings_lookup_key_tier2
+ON product_mappings(lookup_key, store_name, confidence_score)
+WHERE verified_by_user = false AND confidence_score >= 0.85;
+
+-- ===================================
+-- VIEW: product_cache_stats (+ lookup_key)
+-- ===================================
+-- Join semplice, senza DISTINCT ON (vedi perf_002): una riga per mapping verificato
+CREATE OR REPLACE VIEW product_cache_stats AS
+SELECT
+  pm.raw_name,
+  pm.store_name,
+  pm.normalized_product_id,
+  ps.usage_count,
+  ps.verified_by_households,
+  ps.avg_price,
+  ps.price_stddev,
+  ps.last_used,
+  ps.first_used,
+  pm.lookup_key
+FROM product_mappings pm
+JOIN product_purchase_stats ps ON ps.normalized_product_id = pm.normalized_product_id
+WHERE pm.verified_by_user = true;
+
+-- ===================================
+-- FUNCTION: get_cached_product (+ p_lookup_key)
+-- ===================================
+-- Nuova firma: la vecchia (3 parametri) va rimossa per evitare overload ambigui
+DROP FUNCTION IF EXISTS get_cached_product(TEXT, TEXT, NUMERIC);
+
+CREATE OR REPLACE FUNCTION get_cached_product(
+  p_raw_name TEXT,
+  p_store_name TEXT,
+  p_current_price NUMERIC DEFAULT NULL,
+  p_lookup_key TEXT DEFAULT NULL
+) RETURNS JSONB AS $$
+DECLARE
+  v_result JSONB;
+BEGIN
+  SELECT jsonb_build_object(
+    'product_id', m.normalized_product_id,
+    'usage_count', ps.usage_count,
+    'verified_by_households', ps.verified_by_households,
+    'avg_price', ps.avg_price,
+    'price_stddev', ps.price_stddev,
+    'last_used', ps.last_used,
+    'first_used', ps.first_used,
+    'price_coherent', CASE
+      WHEN p_current_price IS NULL THEN true
+      WHEN ps.avg_price IS NULL THEN true
+      ELSE ABS(p_current_price - ps.avg_price) / NULLIF(ps.avg_price, 0) <= 0.30
+    END
+  )
+  INTO v_result
+  FROM (
+    -- idx_mappings_cache_tier1 (raw_name, store_name)
+    SELECT pm.id, pm.raw_name, pm.store_name, pm.normalized_product_id
+    FROM product_mappings pm
+    WHERE pm.verified_by_user = true
+      AND pm.raw_name = p_raw_name
+      AND (pm.store_name = p_store_name OR (pm.store_name IS NULL AND p_store_name IS NULL))
+    UNION ALL
+    -- idx_mappings_lookup_key_tier1 (lookup_key, store_name)
+    SELECT pm.id, pm.raw_name, pm.store_name, pm.normalized_product_id
+    FROM product_mappings pm
+    WHERE pm.verified_by_user = true
+      AND p_lookup_key IS NOT NULL
+      AND pm.lookup_key = p_lookup_key
+      AND (pm.store_name = p_store_name OR (pm.store_name IS NULL AND p_store_name IS NULL))
+  ) m
+  JOIN product_purchase_stats ps ON ps.normalized_product_id = m.normalized_product_id
+  ORDER BY
+    -- Priorità 1: Exact store match
+    CASE WHEN m.store_name = p_store_name THEN 1 ELSE 2 END,
+    -- Priorità 2: raw_name esatto prima della chiave normalizzata
+    CASE WHEN m.raw_name = p_raw_name THEN 1 ELSE 2 END,
+    -- Priorità 3: Più utilizzato
+    ps.usage_count DESC,
+    -- Priorità 4: Più recente
+    ps.last_used DESC,
+    -- Spareggio deterministico (mapping duplicati)
+    m.id
+  LIMIT 1;
+
+  RETURN v_result;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION get_cached_product(TEXT, TEXT, NUMERIC, TEXT) TO authenticated;
+GRANT EXECUTE ON FUNCTION get_cached_product(TEXT, TEXT, NUMERIC, TEXT) TO service_role;
+
+-- ===================================
+-- FUNCTION: get_cached_products_batch (+ lookup_key per riga)
+-- ===================================
+CREATE OR REPLACE FUNCTION get_cached_products_batch(
+  p_items JSONB,  -- [{"idx": 0, "raw_name": "...", "lookup_key": "...", "store_name": "...", "price": 1.49}, ...]
+  p_tier2_min_confidence FLOAT DEFAULT 0.85,
+  p_price_tolerance FLOAT DEFAULT 0.30
+) RETURNS JSONB AS $$
+  WITH items AS (
+    SELECT
+      (i->>'idx')::int AS idx,
+      i->>'raw_name' AS raw_name,
+      i->>'lookup_key' AS lookup_key,
+      i->>'store_name' AS store_name,
+      (i->>'price')::numeric AS price
+    FROM jsonb_array_elements(p_items) AS i
+  ),
+  -- Mapping verificati per riga: un ramo per indice (raw_name / lookup_key)
+  tier1_matches AS (
+    SELECT it.idx, it.raw_name AS item_raw_name, it.store_name AS item_store_name, it.price,
+           pm.id, pm.raw_name, pm.store_name, pm.normalized_product_id
+    FROM items it
+    JOIN product_mappings pm
+      ON pm.verified_by_user = true
+     AND pm.raw_name = it.raw_name
+     AND (pm.store_name = it.store_name OR (pm.store_name IS NULL AND it.store_name IS NULL))
+    UNION ALL
+    SELECT it.idx, it.raw_name, it.store_name, it.price,
+           pm.id, pm.raw_name, pm.store_name, pm.normalized_product_id
+    FROM items it
+    JOIN product_mappings pm
+      ON pm.verified_by_user = true
+     AND it.lookup_key IS NOT NULL
+     AND pm.lookup_key = it.lookup_key
+     AND (pm.store_name = it.store_name OR (pm.store_name IS NULL AND it.store_name IS NULL))
+  ),
+  tier1 AS (
+    SELECT DISTINCT ON (m.idx)
+      m.idx,
+      m.normalized_product_id AS product_id,
+      jsonb_build_object(
+        'usage_count', ps.usage_count,
+        'verified_by_households', ps.verified_by_households,
+        'avg_price', ps.avg_price,
+        'price_stddev', ps.price_stddev,
+        'last_used', ps.last_used,
+        'first_used', ps.first_used,
+        'price_coherent', CASE
+          WHEN m.price IS NULL THEN true
+          WHEN ps.avg_price IS NULL THEN true
+          ELSE ABS(m.price - ps.avg_price) / NULLIF(ps.avg_price, 0) <= p_price_tolerance
+        END
+      ) AS stats
+    FROM tier1_matches m
+    JOIN product_purchase_stats ps ON ps.normalized_product_id = m.normalized_product_id
+    ORDER BY
+      m.idx,
+      CASE WHEN m.store_name = m.item_store_name THEN 1 ELSE 2 END,
+      CASE WHEN m.raw_name = m.item_raw_name THEN 1 ELSE 2 END,
+      ps.usage_count DESC,
+      ps.last_used DESC,
+      m.id
+  ),
+  tier2_matches AS (
+    SELECT it.idx, pm.id, pm.normalized_product_id, pm.confidence_score
+    FROM items it
+    JOIN product_mappings pm
+      ON pm.raw_name = it.raw_name
+     AND pm.verified_by_user = false
+     AND pm.confidence_score >= p_tier2_min_confidence
+     AND (it.store_name IS NULL OR pm.store_name = it.store_name)
+    UNION ALL
+    SELECT it.idx, pm.id, pm.normalized_product_id, pm.confidence_score
+    FROM items it
+    JOIN product_mappings pm
+      ON it.lookup_key IS NOT NULL
+     AND pm.lookup_key = it.lookup_key
+     AND pm.verified_by_user = false
+     AND pm.confidence_score >= p_tier2_min_confidence
+     AND (it.store_name IS NULL OR pm.store_name = it.store_name)
+  ),
+  tier2 AS (
+    SELECT DISTINCT ON (m.idx)
+      m.idx,
+      m.normalized_product_id AS product_id,
+      jsonb_build_object('confidence_score', m.confidence_score) AS stats
+    FROM tier2_matches m
+    WHERE NOT EXISTS (SELECT 1 FROM tier1 t1 WHERE t1.idx = m.idx)
+    ORDER BY m.idx, m.confidence_score DESC, m.id
+  ),
+  hits AS (
+    SELECT idx, 'cache_tier1' AS tier, product_id, stats FROM tier1
+    UNION ALL
+    SELECT idx, 'cache_tier2' AS tier, product_id, stats FROM tier2
+  )
+  SELECT COALESCE(
+    jsonb_agg(
+      jsonb_build_object(
+        'idx', h.idx,
+        'tier', h.tier,
+        'product_id', h.product_id,
+        'stats', h.stats,
+        'product', CASE WHEN np.id IS NULL THEN NULL ELSE jsonb_build_object(
+          'canonical_name', np.canonical_name,
+          'brand', np.brand,
+          'category', np.category,
+          'subcategory', np.subcategory,
+          'size', np.size,
+          'unit_type', np.unit_type
+        ) END
+      )
+      ORDER BY h.idx
+    ),
+    '[]'::jsonb
+  )
+  FROM hits h
+  LEFT JOIN normalized_products np ON np.id = h.product_id;
+$$ LANGUAGE sql STABLE;
+
+-- ===================================
+-- FUNCTION: set_mapping_lookup_keys (backfill)
+-- ===================================
+CREATE OR REPLACE FUNCTION set_mapping_lookup_keys(
+  p_rows JSONB  -- [{"id": "<uuid>", "lookup_key": "..."}, ...]
+) RETURNS INT AS $$
+  WITH updated AS (
+    UPDATE product_mappings pm
+    SET lookup_key = r->>'lookup_key'
+    FROM jsonb_array_elements(p_rows) AS r
+    WHERE pm.id = (r->>'id')::uuid
+    RETURNING 1
+  )
+  SELECT COUNT(*)::int FROM updated;
+$$ LANGUAGE sql;
+
+GRANT EXECUTE ON FUNCTION set_mapping_lookup_keys(JSONB) TO service_role;
+
+-- ===================================
+-- VERIFICA
+-- ===================================
+-- Mapping ancora senza lookup_key (dopo il backfill: 0)
+SELECT COUNT(*) AS missing_lookup_key
+FROM product_mappings
+WHERE lookup_key IS NULL;
+
+-- Test: stessa chiave per varianti OCR
+-- SELECT get_cached_product('C0CA COLA 1.5L', 'Conad', 1.80, 'COCACOLA1.5L');
+
+-- Verifica piano: entrambi i rami su indice partial (nessun Seq Scan su product_mappings)
+-- Expected: Index Scan using idx_mappings_cache_tier1 + idx_mappings_lookup_key_tier1
+-- EXPLAIN
+-- SELECT pm.normalized_product_id FROM product_mappings pm
+-- WHERE pm.verified_by_user = true AND pm.raw_name = 'C0CA COLA 1.5L' AND pm.store_name = 'Conad'
+-- UNION ALL
+-- SELECT pm.normalized_product_id FROM product_mappings pm
+-- WHERE pm.verified_by_user = true AND pm.lookup_key = 'COCACOLA1.5L' AND pm.store_name = 'Conad';
+
+COMMENT ON COLUMN product_mappings.lookup_key IS
+'Chiave normalizzata di raw_name (app/utils/lookup_key.py). Calcolata in Python, non modificare a mano.';
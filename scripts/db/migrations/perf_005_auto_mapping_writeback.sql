@@ -0,0 +1,97 @@
+-- ===================================
+-- Migration: PERF_005 - Auto Mapping Write-back
+-- ===================================
+-- Descrizione: Upsert batch dei mapping ad alta confidence prodotti dalla pipeline (sql_search)
+-- Problema: i risultati validati con alta confidence non finiscono mai in product_mappings
+--           → la stessa riga grezza paga 3 chiamate LLM ad ogni scontrino
+-- Soluzione:
+--   1. upsert_auto_mappings(p_rows JSONB): una RPC per batch di mapping
+--   2. Mapping verificati dall'utente MAI sovrascritti
+--   3. Mapping auto esistenti aggiornati solo se la nuova confidence è >= alla precedente
+--   4. Advisory lock per (raw_name, store_name): niente duplicati tra worker concorrenti
+--      (product_mappings non ha vincolo UNIQUE su raw_name/store_name)
+-- Prerequisiti: perf_004 (lookup_key)
+-- Performance target: <20ms per batch da 50 righe
+-- ===================================
+
+CREATE OR REPLACE FUNCTION upsert_auto_mappings(
+  p_rows JSONB  -- [{"raw_name", "store_name", "lookup_key", "normalized_product_id", "confidence_score", "interpretation_details"}, ...]
+) RETURNS INT AS $$
+DECLARE
+  r JSONB;
+  v_existing product_mappings%ROWTYPE;
+  v_written INT := 0;
+BEGIN
+  FOR r IN SELECT * FROM jsonb_array_elements(p_rows)
+  LOOP
+    PERFORM pg_advisory_xact_lock(
+      hashtext(COALESCE(r->>'raw_name', '') || '|' || COALESCE(r->>'store_name', ''))
+    );
+
+    -- Mapping verificato dall'utente per la stessa chiave → vince sempre
+    PERFORM 1
+    FROM product_mappings
+    WHERE raw_name = r->>'raw_name'
+      AND store_name IS NOT DISTINCT FROM r->>'store_name'
+      AND verified_by_user = true;
+    IF FOUND THEN
+      CONTINUE;
+    END IF;
+
+    SELECT * INTO v_existing
+    FROM product_mappings
+    WHERE raw_name = r->>'raw_name'
+      AND store_name IS NOT DISTINCT FROM r->>'store_name'
+      AND verified_by_user = false
+    ORDER BY confidence_score DESC NULLS LAST
+    LIMIT 1;
+
+    IF v_existing.id IS NULL THEN
+      INSERT INTO product_mappings (
+        raw_name, store_name, lookup_key, normalized_product_id,
+        confidence_score, verified_by_user, interpretation_details
+      ) VALUES (
+        r->>'raw_name',
+        r->>'store_name',
+        r->>'lookup_key',
+        (r->>'normalized_product_id')::uuid,
+        (r->>'confidence_score')::float,
+        false,
+        COALESCE(r->'interpretation_details', '{}'::jsonb)
+      );
+      v_written := v_written + 1;
+    ELSIF (r->>'confidence_score')::float >= COALESCE(v_existing.confidence_score, 0) THEN
+      UPDATE product_mappings SET
+        normalized_product_id = (r->>'normalized_product_id')::uuid,
+        confidence_score = (r->>'confidence_score')::float,
+        lookup_key = r->>'lookup_key',
+        interpretation_details = COALESCE(r->'interpretation_details', interpretation_details)
+      WHERE id = v_existing.id;
+      v_written := v_written + 1;
+    END IF;
+
+    v_existing := NULL;
+  END LOOP;
+
+  RETURN v_written;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ===================================
+-- GRANT PERMISSIONS
+-- ===================================
+GRANT EXECUTE ON FUNCTION upsert_auto_mappings(JSONB) TO service_role;
+
+-- ===================================
+-- VERIFICA FUNZIONE
+-- ===================================
+-- Test: batch vuoto
+SELECT upsert_auto_mappings('[]'::jsonb);
+-- Expected: 0
+
+-- ===================================
+-- COMMENTI
+-- ===================================
+COMMENT ON FUNCTION upsert_auto_mappings IS
+'Upsert batch di mapping auto-verificati (verified_by_user = false) dalla pipeline di normalizzazione.
+Non tocca i mapping verificati dagli utenti. Ritorna il numero di righe inserite/aggiornate.';